@@ -1,11 +1,19 @@
+import sys
+
 import gmsh
 
+from meshtools.estimate import check_budget, element_budget, estimate_model
+from meshtools.limits import MeshTooLarge
+
 # Инициализация GMSH
 gmsh.initialize()
 
 # Задание разрешения сетки
 resolution = 0.001
 
+# Запись сетки в двоичном формате MSH: файл меньше, записывается и читается быстрее
+binary = True
+
 # Параметры канала
 L = 2.2
 H = 0.41
@@ -67,10 +75,23 @@ model.mesh.field.setNumber(threshold_field, "DistMax", 2 * r)  # Конец об
 # Установка порогового поля как фонового поля размера сетки
 model.mesh.field.setAsBackgroundMesh(threshold_field)
 
+# Оценка размера сетки до построения: слишком большая сетка не строится (бюджет — MESH_ELEMENT_BUDGET)
+estimate = estimate_model()
+print(f"Оценка сетки: {estimate.describe()}")
+try:
+    check_budget(estimate)
+except MeshTooLarge:
+    print(f"Сетка слишком большая: около {estimate.elements:_} элементов "
+          f"при бюджете {element_budget():_}".replace("_", " "))
+    print("Увеличьте resolution или задайте бюджет через MESH_ELEMENT_BUDGET (0 — без ограничения)")
+    gmsh.finalize()
+    sys.exit(1)
+
 # Генерация 2D сетки
 model.mesh.generate(2)
 
 # Запись сетки в файл
+gmsh.option.setNumber("Mesh.Binary", 1 if binary else 0)
 gmsh.write("meshik.msh")
 
 # Опционально: визуализация сетки в графическом интерфейсе GMSH
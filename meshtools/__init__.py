@@ -0,0 +1,3 @@
+"""Вспомогательные модули для генерации сеток в страницах презентации"""
+
+from .pool import MeshWorkerError, MeshWorkerPool, get_pool
@@ -0,0 +1,161 @@
+"""Пакетное построение семейств сеток по сетке параметров
+
+    python -m meshtools.batch out_dir rectangle nx=10,100,1000 ny=10,100,1000 element_type=Треугольные,Четырехугольные
+
+Каждое сочетание параметров — отдельное задание генератора страницы 9. Задания выполняются
+в пуле процессов gmsh по числу процессоров, готовые сетки сразу записываются в столбцовом
+формате (.mshc), а строка о задании (параметры, файл, время или ошибка) дописывается
+в out_dir/sweep.jsonl. Ошибка одного задания (в том числе превышение пределов памяти
+и времени, meshtools.limits) не останавливает остальные; повторный запуск пропускает
+уже построенные сетки.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from .columnar import SUFFIX, ColumnarMesh
+from .generators import ELEMENT_TYPES, generate_box_mesh, generate_rectangle_mesh, run_generator
+from .limits import MeshTooLarge
+from .pool import MeshWorkerPool
+from .threads import MeshingOptions
+
+# Генераторы, их параметры по порядку и значения по умолчанию (как в интерфейсе страницы 9)
+GENERATORS = {
+    "rectangle": (generate_rectangle_mesh, ("mesh_type", "element_type", "width", "height", "nx", "ny")),
+    "box": (generate_box_mesh, ("mesh_type", "element_type", "width", "height", "length", "nx", "ny", "nz")),
+}
+DEFAULTS = dict(mesh_type="Структурированная", element_type="Треугольные",
+                width=10, height=10, length=10, nx=10, ny=10, nz=10)
+
+MANIFEST = "sweep.jsonl"
+
+
+def parameter_grid(generator, **values):
+    """Все сочетания значений: [{параметр: значение}]; одиночные значения допустимы"""
+    _, names = GENERATORS[generator]
+    unknown = set(values) - set(names)
+    if unknown:
+        raise ValueError(f"Генератор {generator} не принимает параметры {', '.join(sorted(unknown))}")
+    lists = [values.get(name, DEFAULTS[name]) for name in names]
+    lists = [v if isinstance(v, (list, tuple, range)) else [v] for v in lists]
+    return [dict(zip(names, combo)) for combo in itertools.product(*lists)]
+
+
+def job_name(generator, params):
+    """Имя файла сетки: хэш генератора и параметров"""
+    text = json.dumps([generator, params], sort_keys=True, ensure_ascii=False)
+    return f"{generator}_{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _size(params):
+    """Оценка трудоемкости задания для порядка запуска"""
+    return params["nx"] * params["ny"] * params.get("nz", 1)
+
+
+def _run_job(generator, params, options, pool):
+    func, names = GENERATORS[generator]
+    start = time.perf_counter()
+    nodes, elements, config = run_generator(func, *(params[n] for n in names), options=options, pool=pool)
+    return nodes, elements, config, time.perf_counter() - start
+
+
+def _save(path, nodes, elements, element_type):
+    nodes = np.asarray(nodes, dtype=np.float64)
+    if nodes.shape[1] == 2:
+        nodes = np.column_stack([nodes, np.zeros(len(nodes))])
+    ColumnarMesh.from_arrays(nodes, {ELEMENT_TYPES[element_type]: elements}).save(path)
+
+
+def run_sweep(out_dir, generator, grid, options=None, processes=None, on_result=None):
+    """Построение всех сеток grid (список параметров из parameter_grid) в out_dir
+
+    on_result(record) вызывается по мере завершения заданий; record — строка sweep.jsonl.
+    Возвращает список записей в порядке завершения.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    options = options or MeshingOptions()
+    processes = processes or max(1, (os.cpu_count() or 1) // options.demand)
+    # Крупные задания запускаются первыми, чтобы в конце не ждать одного долгого
+    jobs = sorted(grid, key=_size, reverse=True)
+    records = []
+    pool = MeshWorkerPool(size=processes)
+    with open(os.path.join(out_dir, MANIFEST), "a", encoding="utf-8") as manifest:
+        def emit(record):
+            manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+            manifest.flush()
+            records.append(record)
+            if on_result is not None:
+                on_result(record)
+
+        try:
+            with ThreadPoolExecutor(max_workers=processes) as executor:
+                futures = {}
+                for params in jobs:
+                    name = job_name(generator, params)
+                    path = os.path.join(out_dir, name + SUFFIX)
+                    if os.path.exists(path):
+                        emit(dict(generator=generator, params=params, file=name + SUFFIX, status="skipped"))
+                        continue
+                    futures[executor.submit(_run_job, generator, params, options, pool)] = (params, name, path)
+                for future in as_completed(futures):
+                    params, name, path = futures[future]
+                    record = dict(generator=generator, params=params, file=name + SUFFIX)
+                    try:
+                        nodes, elements, config, elapsed = future.result()
+                        start = time.perf_counter()
+                        _save(path, nodes, elements, params["element_type"])
+                        record.update(status="ok", nodes=len(nodes), elements=len(elements), seconds=elapsed,
+                                      write_seconds=time.perf_counter() - start,
+                                      options=repr(MeshingOptions.from_array(config)))
+                    except MeshTooLarge as e:
+                        record.update(status="too_large", error=str(e))
+                    except Exception as e:
+                        record.update(status="error", error=repr(e))
+                    emit(record)
+        finally:
+            pool.close()
+    return records
+
+
+def _parse_value(text):
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in GENERATORS:
+        sys.exit("Использование: python -m meshtools.batch out_dir rectangle|box [параметр=значение,значение ...]")
+    out_dir, generator = argv[:2]
+    values = {}
+    for arg in argv[2:]:
+        key, _, text = arg.partition("=")
+        values[key] = [_parse_value(v) for v in text.split(",")]
+    threads = values.pop("threads", [1])[0]
+    processes = values.pop("processes", [None])[0]
+    grid = parameter_grid(generator, **values)
+    print(f"Заданий: {len(grid)}, результаты: {out_dir}")
+
+    def report(record):
+        status = record["status"]
+        detail = f"{record['seconds']:.2f} с, элементов: {record['elements']}" if status == "ok" else record.get("error", "")
+        print(f"{status:>8} {record['file']} {record['params']} {detail}", flush=True)
+
+    records = run_sweep(out_dir, generator, grid, MeshingOptions(threads), processes, on_result=report)
+    failed = sum(r["status"] in ("error", "too_large") for r in records)
+    print(f"Готово: {len(records) - failed}, ошибок: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,160 @@
+"""Масштабирование 3D-алгоритмов gmsh по потокам: python -m meshtools.bench_3d [box|cylinders] [размер] [отчет.jsonl]
+
+Для каждой пары (Mesh.Algorithm3D, число потоков) сетка строится заново в отдельном процессе:
+время построения поверхностной и объемной сетки, число тетраэдров в секунду, ускорение
+относительно одного потока, пиковая память и показатели качества тетраэдров.
+Замеры выполняются по одному, чтобы процессы не делили ядра и не искажали масштабирование.
+Каждый запуск дописывается в отчет JSON Lines одной записью, так что отчеты за разные
+даты и версии gmsh можно сравнивать.
+"""
+
+import datetime
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+from .connectivity import TagIndex
+from .limits import peak_rss_mib
+from .quality import element_quality, quality_summary
+from .threads import ALGORITHMS_3D, MeshingOptions
+
+REPORT_VERSION = 1
+
+
+def build_box(size):
+    """Единичный куб — неструктурированный вариант генератора generate_box_mesh"""
+    import gmsh
+
+    gmsh.model.occ.addBox(0, 0, 0, 1, 1, 1)
+    gmsh.model.occ.synchronize()
+    gmsh.option.setNumber("Mesh.MeshSizeMax", size)
+
+
+def build_cylinders(size):
+    """Объединение двух пересекающихся цилиндров со страницы 12 (CSG)"""
+    import gmsh
+
+    first = gmsh.model.occ.addCylinder(0, 0, 0, 2, 0, 0, 0.5)
+    second = gmsh.model.occ.addCylinder(1, -1, 0, 0, 2, 0, 0.5)
+    gmsh.model.occ.fuse([(3, first)], [(3, second)])
+    gmsh.model.occ.synchronize()
+    gmsh.option.setNumber("Mesh.MeshSizeMax", size)
+
+
+GEOMETRIES_3D = {"box": build_box, "cylinders": build_cylinders}
+
+
+def default_threads():
+    """1, 2, 4, ... до числа процессоров включительно"""
+    cpus = os.cpu_count() or 1
+    threads = [1]
+    while threads[-1] * 2 <= cpus:
+        threads.append(threads[-1] * 2)
+    if threads[-1] != cpus:
+        threads.append(cpus)
+    return threads
+
+
+def _mesh_once(job):
+    """Один замер в отдельном процессе: словарь с результатами или с текстом ошибки"""
+    name, algorithm, threads, size = job
+    import gmsh
+
+    gmsh.initialize()
+    gmsh.option.setNumber("General.Terminal", 0)
+    try:
+        MeshingOptions(threads, algorithm, max_threads_3d=threads).apply()
+        gmsh.model.add(name)
+        GEOMETRIES_3D[name](size)
+        start = time.perf_counter()
+        gmsh.model.mesh.generate(2)
+        surface_time = time.perf_counter() - start
+        start = time.perf_counter()
+        gmsh.model.mesh.generate(3)
+        volume_time = time.perf_counter() - start
+
+        node_tags, coords, _ = gmsh.model.mesh.getNodes()
+        tets = TagIndex(node_tags)(gmsh.model.mesh.getElementsByType(4)[1]).reshape(-1, 4)
+        quality = quality_summary(element_quality(coords.reshape(-1, 3), tets, 4))
+        return dict(
+            algorithm=algorithm, threads=threads, nodes=len(node_tags), tetrahedra=len(tets),
+            surface_time=surface_time, volume_time=volume_time,
+            elements_per_second=len(tets) / volume_time if volume_time > 0 else None,
+            peak_rss_mib=peak_rss_mib(), quality=quality,
+        )
+    except Exception as e:
+        return dict(algorithm=algorithm, threads=threads, error=repr(e))
+    finally:
+        gmsh.finalize()
+
+
+def run_scaling(geometry, algorithms=None, threads=None, size=0.1, processes=1):
+    """Замеры по всем парам (алгоритм, потоки); возвращает запись отчета (dict)
+
+    processes > 1 ускоряет прогон, но параллельные замеры делят ядра между собой,
+    поэтому для кривых масштабирования оставляется 1.
+    """
+    import gmsh
+
+    algorithms = list(algorithms or ALGORITHMS_3D)
+    threads = sorted(threads or default_threads())
+    jobs = [(geometry, a, n, size) for a in algorithms for n in threads]
+    with multiprocessing.Pool(processes, maxtasksperchild=1) as pool:
+        runs = pool.map(_mesh_once, jobs, chunksize=1)
+    # Ускорение относительно наименьшего числа потоков того же алгоритма
+    base = {}
+    for run in runs:
+        if "error" not in run:
+            base.setdefault(run["algorithm"], run["volume_time"])
+            run["speedup"] = base[run["algorithm"]] / run["volume_time"] if run["volume_time"] > 0 else None
+    return dict(
+        version=REPORT_VERSION,
+        date=datetime.datetime.now().isoformat(timespec="seconds"),
+        gmsh=gmsh.__version__,
+        python=platform.python_version(),
+        machine=platform.machine(),
+        cpus=os.cpu_count(),
+        geometry=geometry,
+        geometry_hash=hashlib.sha256(inspect.getsource(GEOMETRIES_3D[geometry]).encode("utf-8")).hexdigest(),
+        size=size,
+        runs=runs,
+    )
+
+
+def append_report(report, path):
+    """Дописывание записи в отчет JSON Lines"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(report, ensure_ascii=False) + "\n")
+
+
+def load_reports(path):
+    """Все записи отчета в порядке запуска"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main(geometry="box", size=0.1, path="bench_3d.jsonl"):
+    report = run_scaling(geometry, size=size)
+    append_report(report, path)
+    print(f"{geometry}, размер элементов {size}, gmsh {report['gmsh']}, процессоров: {report['cpus']}")
+    print(f"{'алгоритм':>10} {'потоки':>7} {'тетраэдры':>10} {'3D, с':>8} {'тетр./с':>10} "
+          f"{'ускорение':>10} {'SICN мин.':>10} {'МиБ':>7}")
+    for run in report["runs"]:
+        if "error" in run or not run["tetrahedra"]:
+            print(f"{run['algorithm']:>10} {run['threads']:>7} ошибка: {run.get('error', 'нет тетраэдров')}")
+            continue
+        print(f"{run['algorithm']:>10} {run['threads']:>7} {run['tetrahedra']:>10} {run['volume_time']:>8.2f} "
+              f"{run['elements_per_second']:>10.0f} {run['speedup']:>10.2f} "
+              f"{run['quality']['sicn']['min']:>10.3f} {run['peak_rss_mib']:>7.0f}")
+    print(f"Отчет дописан в {path}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 4 or (len(sys.argv) > 1 and sys.argv[1] not in GEOMETRIES_3D):
+        sys.exit("Использование: python -m meshtools.bench_3d [box|cylinders] [размер] [отчет.jsonl]")
+    main(*sys.argv[1:2], *map(float, sys.argv[2:3]), *sys.argv[3:4])
@@ -0,0 +1,204 @@
+"""Сравнение алгоритмов построения 2D-сеток gmsh: python -m meshtools.bench_algorithms [channel|plate] [размер]
+
+Одна и та же геометрия строится каждым алгоритмом в отдельном процессе: время построения,
+число элементов, пиковая память процесса и показатели качества (meshtools.quality).
+Процесс на каждый замер нужен, чтобы пиковая память относилась только к этому замеру.
+Результаты кэшируются по хэшу описания геометрии, алгоритму, размеру элементов и версии gmsh.
+"""
+
+import hashlib
+import inspect
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from .cache import get_cache
+from .connectivity import TagIndex
+from .limits import peak_rss_mib
+from .quality import element_quality
+
+# Алгоритмы gmsh (Mesh.Algorithm) для 2D-сеток
+ALGORITHMS_2D = {
+    "MeshAdapt": 1,
+    "Delaunay": 5,
+    "Frontal-Delaunay": 6,
+    "BAMG": 7,
+    "Frontal-Delaunay для четырехугольников": 8,
+    "Упаковка параллелограммов": 9,
+    "Квазиструктурированные четырехугольники": 11,
+}
+
+# Алгоритмы, строящие четырехугольники: треугольники объединяются после построения
+QUAD_ALGORITHMS = {8, 9, 11}
+
+
+def build_channel(size):
+    """Канал с цилиндром из gmsh_example.py, сгущение у цилиндра"""
+    import gmsh
+
+    model = gmsh.model
+    L, H, c, r = 2.2, 0.41, (0.2, 0.2, 0), 0.05
+    channel = model.occ.addRectangle(0, 0, 0, L, H)
+    cylinder = model.occ.addDisk(*c, r, r)
+    model.occ.cut([(2, channel)], [(2, cylinder)])
+    model.occ.synchronize()
+    circle = [tag for dim, tag in model.getBoundary(model.getEntities(2), oriented=False)
+              if np.allclose(model.occ.getCenterOfMass(dim, tag)[:2], c[:2])]
+    distance = model.mesh.field.add("Distance")
+    model.mesh.field.setNumbers(distance, "CurvesList", circle)
+    threshold = model.mesh.field.add("Threshold")
+    model.mesh.field.setNumber(threshold, "IField", distance)
+    model.mesh.field.setNumber(threshold, "LcMin", size / 4)
+    model.mesh.field.setNumber(threshold, "LcMax", size)
+    model.mesh.field.setNumber(threshold, "DistMin", r)
+    model.mesh.field.setNumber(threshold, "DistMax", 2 * r)
+    model.mesh.field.setAsBackgroundMesh(threshold)
+
+
+def build_plate(size):
+    """Прямоугольник с круглым отверстием из rectangle_geometry.geo"""
+    import gmsh
+
+    model = gmsh.model
+    plate = model.occ.addRectangle(0, 0, 0, 2, 1)
+    hole = model.occ.addDisk(1, 0.5, 0, 0.25, 0.25)
+    model.occ.cut([(2, plate)], [(2, hole)])
+    model.occ.synchronize()
+    gmsh.option.setNumber("Mesh.MeshSizeMin", 0.4 * size)
+    gmsh.option.setNumber("Mesh.MeshSizeMax", size)
+
+
+GEOMETRIES = {"channel": build_channel, "plate": build_plate}
+
+
+def geometry_hash(name):
+    """Хэш описания геометрии: изменение построителя делает старые замеры недействительными"""
+    return hashlib.sha256(inspect.getsource(GEOMETRIES[name]).encode("utf-8")).hexdigest()
+
+
+def _mesh_once(job):
+    """Построение сетки одним алгоритмом в отдельном процессе: (узлы, треугольники, четырехугольники, замеры)"""
+    name, algorithm, size = job
+    import gmsh
+
+    gmsh.initialize()
+    gmsh.option.setNumber("General.Terminal", 0)
+    try:
+        gmsh.model.add(name)
+        GEOMETRIES[name](size)
+        gmsh.option.setNumber("Mesh.Algorithm", algorithm)
+        gmsh.option.setNumber("Mesh.RecombineAll", 1 if algorithm in QUAD_ALGORITHMS else 0)
+        before = peak_rss_mib()
+        start = time.perf_counter()
+        gmsh.model.mesh.generate(2)
+        elapsed = time.perf_counter() - start
+        peak = peak_rss_mib()
+
+        node_tags, coords, _ = gmsh.model.mesh.getNodes()
+        nodes = coords.reshape(-1, 3)[:, :2]
+        index = TagIndex(node_tags)
+        cells = {2: [np.empty((0, 3), np.int64)], 3: [np.empty((0, 4), np.int64)]}
+        for element_type, _, element_nodes in zip(*gmsh.model.mesh.getElements(2)):
+            if element_type in cells:
+                cells[element_type].append(index(element_nodes).reshape(-1, cells[element_type][0].shape[1]))
+        cells = {t: np.vstack(c) for t, c in cells.items()}
+        return nodes, cells[2], cells[3], np.array([elapsed, peak, peak - before])
+    except Exception as e:
+        return repr(e)
+    finally:
+        gmsh.finalize()
+
+
+class AlgorithmResult:
+    """Результат замера одного алгоритма"""
+
+    def __init__(self, algorithm, nodes, triangles, quads, stats, cached):
+        self.algorithm = algorithm
+        self.nodes = nodes
+        self.triangles = triangles
+        self.quads = quads
+        self.wall_time, self.peak_rss, self.mesh_rss = (float(v) for v in stats)
+        self.cached = cached
+
+    @property
+    def num_elements(self):
+        return len(self.triangles) + len(self.quads)
+
+    def quality(self):
+        """Показатели качества всех элементов (треугольники, затем четырехугольники)"""
+        parts = [element_quality(self.nodes, e, t) for t, e in ((2, self.triangles), (3, self.quads)) if len(e)]
+        if not parts:
+            return element_quality(self.nodes, self.triangles, 2)
+        return {metric: np.concatenate([q[metric] for q in parts]) for metric in parts[0]}
+
+    def summary(self):
+        """Строка таблицы сравнения"""
+        quality = self.quality()
+        sicn = quality["sicn"]
+        return {
+            "Алгоритм": self.algorithm,
+            "Время, с": round(self.wall_time, 3),
+            "Узлы": len(self.nodes),
+            "Треугольники": len(self.triangles),
+            "Четырехугольники": len(self.quads),
+            "Пик памяти, МиБ": round(self.peak_rss, 1),
+            "Прирост памяти, МиБ": round(self.mesh_rss, 1),
+            "SICN мин.": round(float(sicn.min()), 3) if len(sicn) else None,
+            "SICN сред.": round(float(sicn.mean()), 3) if len(sicn) else None,
+            "Мин. угол, °": round(float(quality["min_angle"].min()), 1) if len(sicn) else None,
+            "Из кэша": self.cached,
+        }
+
+
+def run_benchmark(geometry, algorithms=None, size=0.05, processes=None, cache=None):
+    """Замеры алгоритмов на одной геометрии: ({алгоритм: AlgorithmResult}, {алгоритм: ошибка})
+
+    Недостающие в кэше замеры выполняются параллельно, каждый в новом процессе.
+    Ошибки (например, gmsh собран без BAMG) не прерывают остальные замеры.
+    """
+    algorithms = list(algorithms or ALGORITHMS_2D)
+    cache = cache or get_cache()
+    digest = geometry_hash(geometry)
+    keys = {a: cache.key(_mesh_once, (digest, ALGORITHMS_2D[a], size)) for a in algorithms}
+    results, errors, missing = {}, {}, []
+    for a in algorithms:
+        arrays = cache.get(keys[a])
+        if arrays is None:
+            missing.append(a)
+        else:
+            results[a] = AlgorithmResult(a, *arrays, cached=True)
+
+    if missing:
+        processes = min(len(missing), processes or os.cpu_count() or 1)
+        jobs = [(geometry, ALGORITHMS_2D[a], size) for a in missing]
+        # Новый процесс на каждый замер: пиковая память не наследуется от предыдущих
+        with multiprocessing.Pool(processes, maxtasksperchild=1) as pool:
+            outputs = pool.map(_mesh_once, jobs, chunksize=1)
+        for a, output in zip(missing, outputs):
+            if isinstance(output, str):
+                errors[a] = output
+                continue
+            cache.put(keys[a], output)
+            results[a] = AlgorithmResult(a, *output, cached=False)
+    return {a: results[a] for a in algorithms if a in results}, errors
+
+
+def main(geometry="channel", size=0.05):
+    results, errors = run_benchmark(geometry, size=size)
+    print(f"{geometry}, размер элементов {size}")
+    print(f"{'алгоритм':>40} {'время, с':>9} {'элементы':>9} {'SICN мин.':>10} {'SICN сред.':>10} {'МиБ':>7}")
+    for a, r in results.items():
+        row = r.summary()
+        print(f"{a:>40} {r.wall_time:>9.3f} {r.num_elements:>9} {row['SICN мин.'] or 0:>10.3f} "
+              f"{row['SICN сред.'] or 0:>10.3f} {r.peak_rss:>7.0f}")
+    for a, error in errors.items():
+        print(f"{a:>40} ошибка: {error}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 or (len(sys.argv) > 1 and sys.argv[1] not in GEOMETRIES):
+        sys.exit("Использование: python -m meshtools.bench_algorithms [channel|plate] [размер]")
+    main(*sys.argv[1:2], *map(float, sys.argv[2:3]))
@@ -0,0 +1,50 @@
+"""Масштабирование параллельного разбора MSH: python -m meshtools.bench_msh mesh.msh
+
+Большой текстовый файл можно получить из gmsh_example.py, уменьшив размер элементов
+и выключив двоичную запись (binary = False).
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from .msh import read_msh
+from .msh_index import load_index
+from .msh_parallel import read_msh_parallel
+
+
+def _same(a, b):
+    return (np.array_equal(a.node_tags, b.node_tags) and np.array_equal(a.nodes, b.nodes)
+            and all(np.array_equal(x.tags, y.tags) and np.array_equal(x.node_tags, y.node_tags)
+                    for x, y in zip(a.element_blocks, b.element_blocks)))
+
+
+def _measure(read, *args):
+    start = time.perf_counter()
+    mesh = read(*args)
+    return mesh, time.perf_counter() - start
+
+
+def main(path):
+    size = os.path.getsize(path) / 2 ** 20
+    # Индекс строится один раз и в замеры не входит
+    load_index(path)
+    serial, elapsed = _measure(read_msh, path)
+    print(f"{path}: {size:.0f} МиБ, процессоров: {os.cpu_count()}")
+    print(f"{'процессов':>10} {'время, с':>10} {'ускорение':>10} {'МиБ/с':>8}")
+    print(f"{'read_msh':>10} {elapsed:>10.2f} {1:>10.2f} {size / elapsed:>8.0f}")
+    processes = 1
+    while processes <= 2 * (os.cpu_count() or 1):
+        mesh, t = _measure(read_msh_parallel, path, processes)
+        if not _same(serial, mesh):
+            raise AssertionError(f"Результат при {processes} процессах отличается от read_msh")
+        print(f"{processes:>10} {t:>10.2f} {elapsed / t:>10.2f} {size / t:>8.0f}")
+        processes *= 2
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Использование: python -m meshtools.bench_msh mesh.msh")
+    main(sys.argv[1])
@@ -0,0 +1,50 @@
+"""Сравнение скорости отрисовки 2D-сеток: python -m meshtools.bench_plot"""
+
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from .plotting import plot_mesh_2d
+from .structured import QUADS, structured_rectangle
+
+# Поэлементная отрисовка при миллионе элементов занимает десятки минут
+LEGACY_LIMIT = 100_000
+
+
+def _legacy(ax, nodes, elements):
+    # Прежний способ: отдельный ax.plot на каждый элемент
+    for element in elements:
+        polygon = nodes[element]
+        polygon = np.vstack([polygon, polygon[0]])
+        ax.plot(polygon[:, 0], polygon[:, 1], color="black")
+
+
+def _measure(draw, nodes, elements):
+    fig, ax = plt.subplots()
+    start = time.perf_counter()
+    draw(ax, nodes, elements)
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    fig.canvas.draw()
+    elapsed = time.perf_counter() - start
+    plt.close(fig)
+    return elapsed
+
+
+def main():
+    print(f"{'элементов':>10} {'ax.plot, с':>12} {'PolyCollection, с':>18} {'LineCollection, с':>18}")
+    for n in (100, 316, 1000):
+        nodes, elements = structured_rectangle(QUADS, 1, 1, n, n)
+        legacy = _measure(_legacy, nodes, elements) if len(elements) <= LEGACY_LIMIT else float("nan")
+        polys = _measure(plot_mesh_2d, nodes, elements)
+        lines = _measure(lambda ax, x, e: plot_mesh_2d(ax, x, e, dedupe_edges=True), nodes, elements)
+        print(f"{len(elements):>10} {legacy:>12.3f} {polys:>18.3f} {lines:>18.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Версия формата записей кэша; увеличивается при несовместимых изменениях
+CACHE_FORMAT = 4
+
+
+class _FileLock:
+    """Межпроцессная блокировка на основе файла"""
+
+    def __init__(self, path, shared=False):
+        self.path = path
+        self.shared = shared
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+def _gmsh_version():
+    try:
+        import gmsh
+        return gmsh.__version__
+    except Exception:
+        return None
+
+
+def _compact(array):
+    """Наименьший целочисленный тип, в который помещается массив связности"""
+    if array.dtype.kind not in "iu" or array.size == 0:
+        return array
+    lo, hi = array.min(), array.max()
+    for dtype in (np.uint16, np.uint32, np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return array.astype(dtype, copy=False)
+    return array
+
+
+class MeshCache:
+    """Кэш сгенерированных сеток на диске с адресацией по содержимому и вытеснением LRU"""
+
+    def __init__(self, directory=None, max_bytes=512 * 1024 ** 2):
+        if directory is None:
+            directory = os.environ.get("MESH_CACHE_DIR") or os.path.join(
+                os.path.expanduser("~"), ".cache", "gmsh_meshes")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, ".lock")
+
+    def key(self, func, args=(), kwargs=None):
+        """Хэш параметров генератора, версии gmsh и опций"""
+        payload = {
+            "format": CACHE_FORMAT,
+            "func": f"{func.__module__}.{func.__qualname__}",
+            "args": list(args),
+            "kwargs": kwargs or {},
+            "gmsh": _gmsh_version(),
+        }
+        text = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key):
+        """Кортеж массивов из кэша или None"""
+        path = self._path(key)
+        with _FileLock(self._lock_path, shared=True):
+            try:
+                with np.load(path) as data:
+                    count = int(data["count"])
+                    dtypes = data["dtypes"]
+                    result = tuple(data[f"arr_{i}"].astype(dtypes[i], copy=False) for i in range(count))
+            except (FileNotFoundError, KeyError, ValueError, OSError):
+                return None
+            try:
+                # Время модификации служит отметкой последнего использования для LRU
+                os.utime(path)
+            except OSError:
+                pass
+        return result
+
+    def put(self, key, arrays):
+        """Сохранение кортежа массивов и вытеснение старых записей сверх бюджета
+
+        Запись больше всего бюджета не сохраняется: иначе она вытеснила бы весь кэш вместе с собой.
+        """
+        arrays = [np.asarray(a) for a in arrays]
+        fields = {f"arr_{i}": _compact(a) for i, a in enumerate(arrays)}
+        fields["count"] = np.array(len(arrays))
+        fields["dtypes"] = np.array([a.dtype.str for a in arrays])
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **fields)
+            if os.path.getsize(tmp_path) > self.max_bytes:
+                os.remove(tmp_path)
+                return
+            with _FileLock(self._lock_path):
+                os.replace(tmp_path, self._path(key))
+                self._evict(keep=key + ".npz")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _evict(self, keep=None):
+        """Удаление давно не использованных записей, пока кэш больше бюджета; keep не удаляется"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def call(self, runner, func, *args, **kwargs):
+        """runner(func, *args, **kwargs) с сохранением результата в кэше"""
+        key = self.key(func, args, kwargs)
+        result = self.get(key)
+        if result is None:
+            result = runner(func, *args, **kwargs)
+            self.put(key, result)
+        return result
+
+    def clear(self):
+        with _FileLock(self._lock_path):
+            for name in os.listdir(self.directory):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.directory, name))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Общий для всех сессий кэш сеток"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MeshCache()
+        return _cache
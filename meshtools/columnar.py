@@ -0,0 +1,173 @@
+"""Компактный столбцовый формат сеток (.mshc) для быстрой повторной загрузки
+
+Файл состоит из сигнатуры, заголовка JSON и выровненных по 64 байтам массивов:
+координаты узлов, теги узлов и для каждого типа элементов связность в индексах
+строк (int32, пока узлов меньше 2**31), теги элементов и принадлежность блоков
+сущностям. Загрузка отображает файл в память, массивы не копируются и не разбираются.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .msh import ELEMENT_DIM, ElementBlock, Entity, MshMesh, read_msh
+from .msh_writer import save_msh
+
+MAGIC = b"GMSHCOL\0"
+VERSION = 1
+SUFFIX = ".mshc"
+
+_ALIGN = 64
+
+
+def _index_dtype(n):
+    """Наименьший знаковый тип для индексов и тегов до n включительно"""
+    return np.dtype("<i4") if n < 2 ** 31 else np.dtype("<i8")
+
+
+class ColumnarMesh:
+    """Сетка в столбцовом виде: узлы, связность по типам элементов, сущности и физические группы"""
+
+    def __init__(self, nodes, node_tags, connectivity, element_tags, element_blocks, node_blocks,
+                 entities, physical_names):
+        self.nodes = nodes
+        self.node_tags = node_tags
+        self.connectivity = connectivity  # {тип элемента: (число элементов, число узлов) индексов строк nodes}
+        self.element_tags = element_tags  # {тип элемента: теги элементов}
+        self.element_blocks = element_blocks  # [(dim, entity_tag, тип, число элементов)] в порядке файла
+        self.node_blocks = node_blocks  # [(dim, entity_tag, число узлов)]
+        self.entities = entities
+        self.physical_names = physical_names
+
+    @classmethod
+    def from_mesh(cls, mesh, coords_dtype=np.float64):
+        """Преобразование MshMesh (например, результата read_msh)"""
+        index_dtype = _index_dtype(len(mesh.nodes))
+        node_tags = np.asarray(mesh.node_tags)
+        connectivity, element_tags = {}, {}
+        for element_type in dict.fromkeys(b.element_type for b in mesh.element_blocks):
+            blocks = [b for b in mesh.element_blocks if b.element_type == element_type]
+            connectivity[element_type] = np.concatenate(
+                [mesh.connectivity(b) for b in blocks]).astype(index_dtype, copy=False)
+            tags = np.concatenate([b.tags for b in blocks])
+            element_tags[element_type] = tags.astype(_index_dtype(int(tags.max()) if len(tags) else 0))
+        element_blocks = [(b.dim, b.entity_tag, b.element_type, len(b.tags)) for b in mesh.element_blocks]
+        node_blocks = mesh.node_blocks or [(max((b[0] for b in element_blocks), default=0), 1, len(mesh.nodes))]
+        return cls(np.asarray(mesh.nodes, dtype=coords_dtype),
+                   node_tags.astype(_index_dtype(int(node_tags.max()) if len(node_tags) else 0)),
+                   connectivity, element_tags, element_blocks, node_blocks, dict(mesh.entities),
+                   dict(mesh.physical_names))
+
+    @classmethod
+    def from_arrays(cls, nodes, elements, coords_dtype=np.float64):
+        """Сетка генератора: узлы и {тип элемента gmsh: связность с нуля} на одной сущности"""
+        nodes = np.asarray(nodes, dtype=coords_dtype)
+        index_dtype = _index_dtype(len(nodes))
+        connectivity = {t: np.asarray(e).astype(index_dtype, copy=False) for t, e in elements.items()}
+        element_tags, element_blocks, first = {}, [], 1
+        for t, e in connectivity.items():
+            element_tags[t] = np.arange(first, first + len(e), dtype=_index_dtype(first + len(e)))
+            element_blocks.append((ELEMENT_DIM[t], 1, t, len(e)))
+            first += len(e)
+        dim = max((b[0] for b in element_blocks), default=0)
+        return cls(nodes, np.arange(1, len(nodes) + 1, dtype=index_dtype), connectivity, element_tags,
+                   element_blocks, [(dim, 1, len(nodes))], {}, {})
+
+    def elements_of_type(self, element_type):
+        """Связность всех элементов данного типа в индексах строк nodes"""
+        return self.connectivity[element_type]
+
+    def to_mesh(self):
+        """Сетка в том же виде, что возвращает read_msh"""
+        node_tags = self.node_tags.astype(np.int64)
+        blocks, offsets = [], dict.fromkeys(self.connectivity, 0)
+        for dim, entity_tag, element_type, count in self.element_blocks:
+            rows = slice(offsets[element_type], offsets[element_type] + count)
+            blocks.append(ElementBlock(dim, entity_tag, element_type,
+                                       self.element_tags[element_type][rows].astype(np.int64),
+                                       node_tags[self.connectivity[element_type][rows]]))
+            offsets[element_type] = rows.stop
+        return MshMesh(node_tags, self.nodes.astype(np.float64, copy=False), blocks,
+                       self.entities, self.physical_names, list(self.node_blocks))
+
+    def save(self, path):
+        """Запись в файл: заголовок JSON и массивы, выровненные для отображения в память"""
+        arrays = {"nodes": self.nodes, "node_tags": self.node_tags}
+        for t in self.connectivity:
+            arrays[f"connectivity/{t}"] = self.connectivity[t]
+            arrays[f"element_tags/{t}"] = self.element_tags[t]
+        specs, offset = {}, 0
+        for name, a in arrays.items():
+            a = np.ascontiguousarray(a)
+            dtype = a.dtype.newbyteorder("<")
+            specs[name] = [dtype.str, list(a.shape), offset]
+            offset += a.nbytes + (-a.nbytes % _ALIGN)
+        header = json.dumps(dict(
+            version=VERSION,
+            arrays=specs,
+            element_blocks=self.element_blocks,
+            node_blocks=self.node_blocks,
+            entities=[[e.dim, e.tag, list(e.physical_tags), list(e.bounding)] for e in self.entities.values()],
+            physical_names=[[d, t, n] for (d, t), n in self.physical_names.items()],
+        ), ensure_ascii=False).encode()
+        start = len(MAGIC) + 8 + len(header)
+        start += -start % _ALIGN
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", start) + header)
+            f.write(b"\0" * (start - f.tell()))
+            for name, a in arrays.items():
+                f.write(np.ascontiguousarray(a, dtype=specs[name][0]).reshape(-1).view(np.uint8))
+                f.write(b"\0" * (-a.nbytes % _ALIGN))
+        os.replace(tmp, path)
+
+
+def load_columnar(path, mmap_mode=True):
+    """Загрузка файла .mshc
+
+    При mmap_mode=True массивы — представления отображенного в память файла (только чтение),
+    иначе файл читается в память одним вызовом readinto.
+    """
+    with open(path, "rb") as f:
+        if mmap_mode:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buf = bytearray(os.fstat(f.fileno()).st_size)
+            f.readinto(buf)
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} не является файлом сетки .mshc")
+    (start,) = struct.unpack("<Q", buf[len(MAGIC):len(MAGIC) + 8])
+    header = json.loads(bytes(buf[len(MAGIC) + 8:start]).rstrip(b"\0"))
+    if header["version"] != VERSION:
+        raise ValueError(f"Версия файла {path} ({header['version']}) не поддерживается")
+    arrays = {
+        name: np.frombuffer(buf, dtype=dtype, count=int(np.prod(shape)), offset=start + offset).reshape(shape)
+        for name, (dtype, shape, offset) in header["arrays"].items()
+    }
+    types = [int(name.split("/")[1]) for name in arrays if name.startswith("connectivity/")]
+    return ColumnarMesh(
+        arrays["nodes"], arrays["node_tags"],
+        {t: arrays[f"connectivity/{t}"] for t in types},
+        {t: arrays[f"element_tags/{t}"] for t in types},
+        [tuple(b) for b in header["element_blocks"]],
+        [tuple(b) for b in header["node_blocks"]],
+        {(d, t): Entity(d, t, phys, bound) for d, t, phys, bound in header["entities"]},
+        {(d, t): n for d, t, n in header["physical_names"]},
+    )
+
+
+def msh_to_columnar(msh_path, path=None, coords_dtype=np.float64):
+    """Преобразование файла MSH в .mshc; возвращает путь к новому файлу"""
+    path = path or os.path.splitext(msh_path)[0] + SUFFIX
+    ColumnarMesh.from_mesh(read_msh(msh_path), coords_dtype).save(path)
+    return path
+
+
+def columnar_to_msh(path, msh_path=None, binary=True):
+    """Преобразование файла .mshc в MSH 4.1; возвращает путь к новому файлу"""
+    msh_path = msh_path or os.path.splitext(path)[0] + ".msh"
+    save_msh(msh_path, load_columnar(path).to_mesh(), binary)
+    return msh_path
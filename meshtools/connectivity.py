@@ -0,0 +1,92 @@
+import numpy as np
+
+# Плотная таблица используется, пока она не более чем в DENSE_FACTOR раз длиннее списка узлов
+DENSE_FACTOR = 4
+
+
+class TagIndex:
+    """Отображение тегов узлов gmsh в индексы строк массива координат"""
+
+    def __init__(self, node_tags):
+        node_tags = np.asarray(node_tags).astype(np.int64, copy=False).ravel()
+        self.size = node_tags.size
+        self.max_tag = int(node_tags.max()) if node_tags.size else 0
+        if self.max_tag <= DENSE_FACTOR * self.size + 1024:
+            # Плотная таблица: индекс узла по его тегу за одно обращение
+            self._lookup = np.full(self.max_tag + 1, -1, dtype=np.int64)
+            self._lookup[node_tags] = np.arange(self.size)
+            self._order = self._sorted = None
+        else:
+            # Разреженные теги (OCC, объединенные сетки): двоичный поиск по отсортированным тегам
+            self._lookup = None
+            self._order = np.argsort(node_tags, kind="stable")
+            self._sorted = node_tags[self._order]
+
+    def __call__(self, tags):
+        """Индексы для массива тегов любой формы"""
+        tags = np.asarray(tags).astype(np.int64, copy=False)
+        if self._lookup is not None:
+            inside = (tags >= 0) & (tags <= self.max_tag)
+            index = self._lookup[np.where(inside, tags, 0)]
+            valid = inside & (index >= 0)
+        else:
+            pos = np.searchsorted(self._sorted, tags)
+            pos = np.minimum(pos, self.size - 1)
+            valid = self._sorted[pos] == tags
+            index = self._order[pos]
+        if not valid.all():
+            missing = np.unique(tags[~valid])[:5]
+            raise ValueError(f"Элементы ссылаются на отсутствующие узлы: {missing.tolist()}")
+        return index
+
+
+def remap_connectivity(node_tags, element_node_tags, nodes_per_element):
+    """Связность gmsh в виде массива (число элементов, nodes_per_element) индексов с нуля"""
+    index = TagIndex(node_tags)
+    return index(element_node_tags).reshape(-1, nodes_per_element)
+
+
+# Грани тетраэдра (v0, v1, v2, v3), ориентированные наружу при положительном объеме
+TET_FACES = np.array([[1, 2, 3], [0, 3, 2], [0, 1, 3], [0, 2, 1]])
+
+
+def _row_keys(rows):
+    """Целочисленные ключи для строк отсортированных индексов"""
+    rows = rows.astype(np.int64, copy=False)
+    n = int(rows.max()) + 1 if rows.size else 1
+    if n ** rows.shape[1] < 2 ** 63:
+        keys = rows[:, 0]
+        for k in range(1, rows.shape[1]):
+            keys = keys * n + rows[:, k]
+        return keys
+    # Слишком много узлов для упаковки в int64
+    return np.unique(rows, axis=0, return_inverse=True)[1].ravel()
+
+
+def boundary_faces(nodes, tetrahedra):
+    """Граничные грани тетраэдральной сетки, ориентированные наружу"""
+    tetrahedra = np.asarray(tetrahedra)
+    nodes = np.asarray(nodes)
+    # Тетраэдры с отрицательным объемом переворачиваются перестановкой двух вершин
+    p = nodes[tetrahedra]
+    volume = np.einsum("ij,ij->i", np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]), p[:, 3] - p[:, 0])
+    tetrahedra = tetrahedra.copy()
+    flip = volume < 0
+    tetrahedra[flip, 1:3] = tetrahedra[flip, 2:0:-1]
+
+    faces = tetrahedra[:, TET_FACES].reshape(-1, 3)
+    if not len(faces):
+        return faces
+    keys = _row_keys(np.sort(faces, axis=1))
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    change = sorted_keys[1:] != sorted_keys[:-1]
+    # Грань на границе встречается ровно один раз
+    once = np.concatenate([[True], change]) & np.concatenate([change, [True]])
+    return faces[np.sort(order[once])]
+
+
+def compact_nodes(nodes, elements):
+    """Только используемые элементами узлы и перенумерованная связность"""
+    used, inverse = np.unique(np.asarray(elements), return_inverse=True)
+    return np.asarray(nodes)[used], inverse.reshape(np.shape(elements))
@@ -0,0 +1,404 @@
+"""Оценка размера сетки до построения по полю размеров элементов
+
+Число элементов — интеграл плотности по области: для треугольников 4/(√3·h²)
+(площадь равностороннего треугольника со стороной h), для четырехугольников 1/h²,
+для тетраэдров 6√2/h³ (объем правильного тетраэдра). Эффективный размер h учитывает
+Mesh.MeshSizeMin/Max/Factor, размеры в точках (meshSize) и поля Distance + Threshold
+и вычисляется сразу для всей сетки точек выборки. Память линейна по числу элементов,
+время построения растет как степень числа элементов (для четырехугольников заметно быстрее
+линейного из-за recombine); сетка второго порядка строится дольше в second_order_time раз.
+Коэффициенты (CALIBRATION) подобраны по замерам на единичном квадрате и кубе:
+python -m meshtools.estimate [отчет.jsonl] повторяет замеры и печатает новые значения.
+"""
+
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from .limits import MeshTooLarge
+
+# Плотность элементов (на единицу площади или объема) при размере h = 1
+DENSITY = {2: 4 / math.sqrt(3), 3: 1.0, 4: 6 * math.sqrt(2)}
+# Узлов на элемент в сетке первого порядка и множитель числа узлов для второго порядка
+NODES_PER_ELEMENT = {2: 0.5, 3: 1.0, 4: 1 / 5.5}
+SECOND_ORDER_NODES = {2: 4, 3: 4, 4: 8}
+
+# Замеры calibrate(measure_runs()) для одного потока (gmsh 4.15, x86-64); count_factor — поправка
+# к идеальной формуле, elements_per_second — скорость при REFERENCE_ELEMENTS элементах,
+# time_exponent — показатель степени в зависимости времени от числа элементов
+CALIBRATION = {
+    2: dict(count_factor=1.0, elements_per_second=2.1e4, time_exponent=1.16, mib_per_element=4.3e-4,
+            second_order_time=1.2),
+    3: dict(count_factor=1.16, elements_per_second=400, time_exponent=1.64, mib_per_element=9.2e-4,
+            second_order_time=1.2),
+    4: dict(count_factor=0.57, elements_per_second=2.9e4, time_exponent=1.11, mib_per_element=3.1e-4,
+            second_order_time=1.9),
+}
+REFERENCE_ELEMENTS = 1e5
+# Память процесса gmsh без сетки
+BASE_MIB = 60
+
+DEFAULT_ELEMENT_BUDGET = 5_000_000
+# Число точек выборки по каждой оси
+SAMPLES = {2: 512, 3: 64}
+
+
+class MeshEstimate:
+    """Оценка сетки: число элементов и узлов, память (МиБ) и время построения (с)"""
+
+    def __init__(self, element_type, elements, order=1, calibration=None):
+        model = (calibration or CALIBRATION)[element_type]
+        self.element_type = element_type
+        self.elements = int(round(elements))
+        nodes = elements * NODES_PER_ELEMENT[element_type]
+        self.nodes = int(round(nodes * (SECOND_ORDER_NODES[element_type] if order > 1 else 1)))
+        self.memory_mib = BASE_MIB + model["mib_per_element"] * elements
+        scale = (elements / REFERENCE_ELEMENTS) ** (model["time_exponent"] - 1)
+        self.seconds = elements / model["elements_per_second"] * scale
+        if order > 1:
+            self.seconds *= model["second_order_time"]
+
+    def __repr__(self):
+        return (f"MeshEstimate(element_type={self.element_type}, elements={self.elements}, nodes={self.nodes}, "
+                f"memory_mib={self.memory_mib:.0f}, seconds={self.seconds:.3g})")
+
+    def describe(self):
+        """Описание для интерфейса"""
+        return (f"около {self.elements:_} элементов и {self.nodes:_} узлов, "
+                f"{self.memory_mib:_.0f} МиБ, {self.seconds:.3g} с").replace("_", " ")
+
+
+class SizeField:
+    """Эффективный размер элементов: минимум по размерам в точках и полям Threshold,
+    умноженный на factor и ограниченный [size_min, size_max]; default — размер, если ничто не задано"""
+
+    def __init__(self, size_min=0.0, size_max=np.inf, factor=1.0, default=np.inf):
+        self.size_min = size_min
+        self.size_max = size_max
+        self.factor = factor
+        self.default = default
+        self.points = np.empty((0, 3))
+        self.point_sizes = np.empty(0)
+        self.thresholds = []
+
+    def add_points(self, coords, sizes):
+        """Размеры в точках; внутри области они интерполируются обратно пропорционально квадрату расстояния"""
+        self.points = np.vstack([self.points, np.asarray(coords, dtype=np.float64).reshape(-1, 3)])
+        self.point_sizes = np.concatenate([self.point_sizes, np.asarray(sizes, dtype=np.float64)])
+
+    def add_threshold(self, targets, size_min, size_max, dist_min, dist_max, sigmoid=False, stop_at_dist_max=False):
+        """Поле Threshold над Distance до точек targets (кривые и поверхности задаются выборкой точек)"""
+        targets = np.asarray(targets, dtype=np.float64).reshape(-1, 3)
+        self.thresholds.append((targets, size_min, size_max, dist_min, dist_max, sigmoid, stop_at_dist_max))
+
+    def __call__(self, xyz):
+        xyz = np.asarray(xyz, dtype=np.float64)
+        size = np.full(len(xyz), np.inf)
+        if len(self.points):
+            d2 = _squared_distances(xyz, self.points)
+            weights = 1 / np.maximum(d2, 1e-300)
+            size = np.minimum(size, weights @ self.point_sizes / weights.sum(axis=1))
+        for targets, lc_min, lc_max, dist_min, dist_max, sigmoid, stop in self.thresholds:
+            d = np.sqrt(_squared_distances(xyz, targets).min(axis=1))
+            r = np.clip((d - dist_min) / (dist_max - dist_min) if dist_max > dist_min else (d > dist_min) * 1.0, 0, 1)
+            if sigmoid:
+                r = 1 / (1 + np.exp(6 - 12 * r))
+            lc = lc_min + (lc_max - lc_min) * r
+            if stop:
+                lc[d > dist_max] = np.inf
+            size = np.minimum(size, lc)
+        size[np.isinf(size)] = self.default
+        return np.clip(size * self.factor, self.size_min, self.size_max)
+
+
+def _squared_distances(xyz, targets, chunk_bytes=32 * 2 ** 20):
+    """Квадраты расстояний (точки × цели) по частям, чтобы не занимать много памяти"""
+    out = np.empty((len(xyz), len(targets)))
+    step = max(1, chunk_bytes // (8 * max(1, len(targets))))
+    tt = (targets ** 2).sum(axis=1)
+    for start in range(0, len(xyz), step):
+        part = xyz[start:start + step]
+        d2 = (part ** 2).sum(axis=1)[:, None] + tt[None, :] - 2 * part @ targets.T
+        out[start:start + step] = np.maximum(d2, 0)
+    return out
+
+
+def estimate_elements(field, bounds, element_type, measure=None, samples=None, order=1, calibration=None):
+    """Интеграл плотности элементов по ограничивающему прямоугольнику bounds ((xmin, ...), (xmax, ...))
+
+    Если задана мера области measure (площадь или объем), средняя плотность по прямоугольнику
+    умножается на нее — так учитываются отверстия и области сложной формы.
+    """
+    lower, upper = (np.asarray(b, dtype=np.float64) for b in bounds)
+    dim = 3 if element_type == 4 else 2
+    axes = np.flatnonzero(upper - lower > 0)[:dim]
+    n = samples or SAMPLES[dim]
+    step = (upper - lower) / n
+    centers = [lower[a] + step[a] * (np.arange(n) + 0.5) for a in axes]
+    grid = np.meshgrid(*centers, indexing="ij")
+    xyz = np.zeros((grid[0].size, 3))
+    for a, g in zip(axes, grid):
+        xyz[:, a] = g.ravel()
+    h = field(xyz)
+    box = float(np.prod((upper - lower)[axes]))
+    density = DENSITY[element_type] * (calibration or CALIBRATION)[element_type]["count_factor"]
+    mean = float(np.mean(density / h ** len(axes)))
+    return MeshEstimate(element_type, mean * (box if measure is None else measure), order, calibration)
+
+
+def _sample_entity(dim, tag, n=64):
+    """Точки на сущности модели gmsh: сама точка, n точек кривой или n×n точек поверхности"""
+    import gmsh
+
+    if dim == 0:
+        return np.asarray(gmsh.model.getValue(0, tag, []))
+    lo, hi = gmsh.model.getParametrizationBounds(dim, tag)
+    ticks = [np.linspace(a, b, n) for a, b in zip(lo, hi)]
+    params = np.stack(np.meshgrid(*ticks, indexing="ij"), axis=-1).ravel()
+    return np.asarray(gmsh.model.getValue(dim, tag, params)).reshape(-1, 3)
+
+
+def _field_number(tag, *names):
+    """Значение параметра поля; старые и новые имена (IField/InField, LcMin/SizeMin) равноправны"""
+    import gmsh
+
+    for name in names:
+        try:
+            return gmsh.model.mesh.field.getNumber(tag, name)
+        except Exception:
+            continue
+    return None
+
+
+def _distance_targets(tag):
+    import gmsh
+
+    targets = []
+    for dim, option in ((0, "PointsList"), (1, "CurvesList"), (2, "SurfacesList")):
+        try:
+            tags = gmsh.model.mesh.field.getNumbers(tag, option)
+        except Exception:
+            continue
+        targets += [_sample_entity(dim, int(t)) for t in tags]
+    return np.vstack(targets) if targets else None
+
+
+def model_size_field():
+    """Поле размеров текущей модели gmsh (после synchronize, до generate)
+
+    Фоновое поле получить через API нельзя, поэтому учитываются все поля Threshold
+    над Distance (как если бы фоном было поле Min по ним).
+    """
+    import gmsh
+
+    xmin, ymin, zmin, xmax, ymax, zmax = gmsh.model.getBoundingBox(-1, -1)
+    field = SizeField(
+        size_min=gmsh.option.getNumber("Mesh.MeshSizeMin"),
+        size_max=gmsh.option.getNumber("Mesh.MeshSizeMax"),
+        factor=gmsh.option.getNumber("Mesh.MeshSizeFactor"),
+        # Размер по умолчанию в gmsh — диагональ модели
+        default=math.dist((xmin, ymin, zmin), (xmax, ymax, zmax)),
+    )
+    if gmsh.option.getNumber("Mesh.MeshSizeFromPoints") and gmsh.option.getNumber("Mesh.MeshSizeExtendFromBoundary"):
+        points = gmsh.model.getEntities(0)
+        try:
+            sizes = np.asarray(gmsh.model.mesh.getSizes(points))
+        except AttributeError:  # gmsh до 4.11
+            sizes = np.zeros(len(points))
+        # 0 и 1e22 — размер в точке не задан
+        given = [(tag, s) for (_, tag), s in zip(points, sizes) if 0 < s < 1e22]
+        if given:
+            field.add_points([_sample_entity(0, tag) for tag, _ in given], [s for _, s in given])
+    for tag in gmsh.model.mesh.field.list():
+        if gmsh.model.mesh.field.getType(tag) != "Threshold":
+            continue
+        source = _field_number(tag, "InField", "IField")
+        targets = _distance_targets(int(source)) if source is not None else None
+        limits = (_field_number(tag, "SizeMin", "LcMin"), _field_number(tag, "SizeMax", "LcMax"),
+                  _field_number(tag, "DistMin"), _field_number(tag, "DistMax"))
+        if targets is None or None in limits:
+            continue
+        field.add_threshold(targets, *limits, bool(_field_number(tag, "Sigmoid")),
+                            bool(_field_number(tag, "StopAtDistMax")))
+    return field, ((xmin, ymin, zmin), (xmax, ymax, zmax))
+
+
+def estimate_model(dim=None, samples=None, calibration=None):
+    """Оценка сетки текущей модели gmsh размерности dim (по умолчанию — размерности модели)"""
+    import gmsh
+
+    dim = dim or gmsh.model.getDimension()
+    field, bounds = model_size_field()
+    if dim == 3:
+        element_type = 4
+    else:
+        element_type = 3 if gmsh.option.getNumber("Mesh.RecombineAll") else 2
+    try:
+        measure = sum(gmsh.model.occ.getMass(d, t) for d, t in gmsh.model.getEntities(dim))
+    except Exception:  # модель встроенного ядра geo: мера — по ограничивающему прямоугольнику
+        measure = None
+    order = int(gmsh.option.getNumber("Mesh.ElementOrder"))
+    return estimate_elements(field, bounds, element_type, measure, samples, order, calibration)
+
+
+def _grid_counts(element_type, measure, cell, structured):
+    """Число элементов сетки с шагом cell (площадь или объем ячейки)"""
+    if structured:
+        # Структурированная сетка: 2 треугольника, 1 четырехугольник или 6 тетраэдров на ячейку
+        return measure / cell * {2: 2, 3: 1, 4: 6}[element_type]
+    return measure / cell * DENSITY[element_type] * CALIBRATION[element_type]["count_factor"]
+
+
+def estimate_rectangle(mesh_type, element_type, width, height, nx, ny):
+    """Оценка сетки generate_rectangle_mesh"""
+    from .generators import ELEMENT_TYPES
+
+    code = ELEMENT_TYPES[element_type]
+    return MeshEstimate(code, _grid_counts(code, width * height, width * height / (nx * ny),
+                                           mesh_type == "Структурированная"))
+
+
+def estimate_box(mesh_type, element_type, width, height, length, nx, ny, nz):
+    """Оценка сетки generate_box_mesh: объемной для тетраэдров, иначе поверхностной"""
+    from .generators import ELEMENT_TYPES
+
+    code = ELEMENT_TYPES[element_type]
+    structured = mesh_type == "Структурированная"
+    if code == 4:
+        return MeshEstimate(code, _grid_counts(code, width * height * length,
+                                               width * height * length / (nx * ny * nz), structured))
+    faces = [(width * height, nx * ny), (height * length, ny * nz), (width * length, nx * nz)]
+    return MeshEstimate(code, 2 * sum(_grid_counts(code, area, area / cells, structured) for area, cells in faces))
+
+
+def element_budget():
+    """Наибольшее допустимое число элементов (MESH_ELEMENT_BUDGET; 0 — без ограничения)"""
+    budget = os.environ.get("MESH_ELEMENT_BUDGET")
+    return int(float(budget)) if budget else DEFAULT_ELEMENT_BUDGET
+
+
+def check_budget(estimate, budget=None):
+    """MeshTooLarge, если оценка превышает бюджет элементов (по умолчанию element_budget())"""
+    budget = element_budget() if budget is None else budget
+    if budget and estimate.elements > budget:
+        raise MeshTooLarge("elements", budget, estimated=estimate.elements)
+
+
+# Размеры элементов для замеров на единичном квадрате (кубе); четырехугольники строятся медленнее
+MEASURE_SIZES = {2: (0.02, 0.01, 0.005), 3: (0.04, 0.02, 0.01), 4: (0.1, 0.05, 0.033)}
+
+
+def _measure_once(job):
+    """Один замер в отдельном процессе: элементы, время generate и пиковая память"""
+    element_type, size, order = job
+    import gmsh
+
+    from .limits import peak_rss_mib
+
+    dim = 3 if element_type == 4 else 2
+    gmsh.initialize()
+    gmsh.option.setNumber("General.Terminal", 0)
+    try:
+        if dim == 3:
+            gmsh.model.occ.addBox(0, 0, 0, 1, 1, 1)
+        else:
+            gmsh.model.occ.addRectangle(0, 0, 0, 1, 1)
+        gmsh.model.occ.synchronize()
+        gmsh.option.setNumber("Mesh.MeshSizeMax", size)
+        gmsh.option.setNumber("Mesh.RecombineAll", 1 if element_type == 3 else 0)
+        gmsh.option.setNumber("Mesh.ElementOrder", order)
+        start = time.perf_counter()
+        gmsh.model.mesh.generate(dim)
+        seconds = time.perf_counter() - start
+        elements = sum(len(tags) for tags in gmsh.model.mesh.getElements(dim)[1])
+        return dict(element_type=element_type, size=size, order=order, elements=elements,
+                    seconds=seconds, peak_rss_mib=peak_rss_mib())
+    except Exception as e:
+        return dict(element_type=element_type, size=size, order=order, error=repr(e))
+    finally:
+        gmsh.finalize()
+
+
+def measure_runs(element_types=(2, 3, 4), sizes=None):
+    """Замеры для calibrate: каждый тип на размерах sizes (MEASURE_SIZES), первый и второй порядок
+
+    Второй порядок строится на двух меньших сетках. Замеры идут по одному, каждый в новом процессе.
+    """
+    sizes = sizes or MEASURE_SIZES
+    jobs = [(t, size, 1) for t in element_types for size in sizes[t]]
+    jobs += [(t, size, 2) for t in element_types for size in sizes[t][:2]]
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        return pool.map(_measure_once, jobs, chunksize=1)
+
+
+def _model_seconds(model, elements):
+    return elements / model["elements_per_second"] * (elements / REFERENCE_ELEMENTS) ** (model["time_exponent"] - 1)
+
+
+def calibrate(reports, calibration=None):
+    """Коэффициенты по замерам measure_runs и отчетам meshtools.bench_3d (геометрия box, один поток)
+
+    Возвращает копию calibration (по умолчанию CALIBRATION) с уточненными значениями; для типа,
+    у которого замеров нет, значения остаются прежними. Время первого порядка приближается
+    степенью числа элементов (прямая в логарифмах), второй порядок — множителем к нему.
+    """
+    calibration = {k: dict(v) for k, v in (calibration or CALIBRATION).items()}
+    runs = [r for r in reports if r.get("element_type") and r.get("elements") and "error" not in r]
+    # Запуски bench_3d: единичный куб, размер элементов — size отчета
+    runs += [dict(element_type=4, size=report["size"], order=1, elements=run["tetrahedra"],
+                  seconds=run["volume_time"], peak_rss_mib=run.get("peak_rss_mib"))
+             for report in reports if report.get("geometry") == "box"
+             for run in report["runs"] if run.get("threads") == 1 and run.get("tetrahedra")]
+    for element_type, model in calibration.items():
+        first = [r for r in runs if r["element_type"] == element_type and r.get("order", 1) == 1]
+        second = [r for r in runs if r["element_type"] == element_type and r.get("order", 1) > 1]
+        if not first:
+            continue
+        dim = 3 if element_type == 4 else 2
+        # Единичная область: идеальное число элементов — DENSITY / size^dim
+        model["count_factor"] = float(np.median([r["elements"] * r["size"] ** dim / DENSITY[element_type]
+                                                 for r in first]))
+        timed = [r for r in first if r.get("seconds")]
+        if len({r["elements"] for r in timed}) > 1:
+            slope, _ = np.polyfit(np.log([r["elements"] for r in timed]), np.log([r["seconds"] for r in timed]), 1)
+            model["time_exponent"] = float(slope)
+        if timed:
+            model["elements_per_second"] = float(np.median(
+                [model["elements_per_second"] * _model_seconds(model, r["elements"]) / r["seconds"] for r in timed]))
+            # Второй порядок сравнивается с первым на том же размере элементов
+            base = {r["size"]: r["seconds"] for r in timed}
+            ratios = [r["seconds"] / base[r["size"]] for r in second if r.get("seconds") and r["size"] in base]
+            if ratios:
+                model["second_order_time"] = float(np.median(ratios))
+        memory = [(r["peak_rss_mib"] - BASE_MIB) / r["elements"] for r in first
+                  if r.get("peak_rss_mib") and r["peak_rss_mib"] > BASE_MIB]
+        if memory:
+            model["mib_per_element"] = float(np.median(memory))
+    return calibration
+
+
+def main(path=None):
+    runs = measure_runs()
+    if path:
+        with open(path, "a", encoding="utf-8") as f:
+            for run in runs:
+                f.write(json.dumps(run, ensure_ascii=False) + "\n")
+    for run in runs:
+        if "error" in run:
+            print(f"тип {run['element_type']}, h = {run['size']}: ошибка {run['error']}")
+            continue
+        print(f"тип {run['element_type']}, порядок {run['order']}, h = {run['size']}: {run['elements']} элементов, "
+              f"{run['seconds']:.2f} с, {run['peak_rss_mib']:.0f} МиБ")
+    for element_type, model in calibrate(runs).items():
+        print(element_type, {name: float(f"{value:.3g}") for name, value in model.items()})
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        sys.exit("Использование: python -m meshtools.estimate [отчет.jsonl]")
+    main(*sys.argv[1:])
@@ -0,0 +1,118 @@
+"""Отпечаток содержимого сетки: python -m meshtools.fingerprint a.msh b.mshc
+
+Отпечаток зависит только от геометрии и топологии: координат узлов (с округлением
+до tolerance), типов элементов, порядка узлов внутри элемента и имен физических групп.
+Теги узлов и элементов, порядок блоков и элементов и формат файла на него не влияют.
+Хэш элемента строится из хэшей его узлов, хэши элементов складываются по модулю 2**64,
+поэтому отпечаток считается векторно и накапливается по блокам в любом порядке.
+"""
+
+import sys
+
+import numpy as np
+
+from .columnar import SUFFIX, load_columnar
+from .msh import read_msh
+
+# Шаг округления координат, меньшие различия (форматирование чисел) не учитываются
+TOLERANCE = 1e-9
+
+# Две независимые 64-битные полосы дают отпечаток длиной 128 бит
+_SEEDS = np.array([0x243F6A8885A308D3, 0x13198A2E03707344], dtype=np.uint64)
+
+
+def _mix(x):
+    """Перемешивание splitmix64 для массивов uint64"""
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _string_hash(text):
+    h = _SEEDS.copy()
+    for byte in text.encode("utf-8"):
+        h = _mix(h ^ np.uint64(byte))
+    return h
+
+
+class MeshFingerprint:
+    """Накопление отпечатка по блокам элементов"""
+
+    def __init__(self, tolerance=TOLERANCE):
+        self.tolerance = tolerance
+        self.count = 0
+        self._sum = np.zeros(2, dtype=np.uint64)
+
+    def hash_nodes(self, nodes):
+        """Хэши узлов (n, 2) по округленным координатам"""
+        q = np.round(np.asarray(nodes, dtype=np.float64)[:, :3] / self.tolerance)
+        q = q.astype(np.int64).view(np.uint64)
+        h = np.broadcast_to(_SEEDS, (len(q), 2))
+        for k in range(3):
+            h = _mix(h ^ q[:, k, None])
+        return h
+
+    def update(self, element_type, node_hashes, connectivity, groups=()):
+        """Добавление блока: связность в индексах строк node_hashes и имена физических групп"""
+        connectivity = np.asarray(connectivity)
+        h = _mix(np.broadcast_to(_SEEDS ^ np.uint64(element_type), (len(connectivity), 2)))
+        for k in range(connectivity.shape[1] if connectivity.ndim == 2 else 0):
+            h = _mix(h ^ node_hashes[connectivity[:, k]])
+        for name in sorted(groups):
+            h = _mix(h ^ _string_hash(name))
+        with np.errstate(over="ignore"):
+            self._sum += h.sum(axis=0, dtype=np.uint64)
+        self.count += len(connectivity)
+
+    def combine(self, other):
+        """Объединение отпечатков частей сетки, посчитанных отдельно"""
+        with np.errstate(over="ignore"):
+            self._sum += other._sum
+        self.count += other.count
+
+    def hexdigest(self):
+        return f"{int(self._sum[0]):016x}{int(self._sum[1]):016x}-{self.count}"
+
+
+def _groups(mesh, block):
+    entity = mesh.entities.get((block.dim, block.entity_tag))
+    if entity is None:
+        return ()
+    # Номера групп без имени тоже являются нумерацией, но других сведений о группе нет
+    return [mesh.physical_names.get((block.dim, tag), str(tag)) for tag in entity.physical_tags]
+
+
+def mesh_fingerprint(mesh, tolerance=TOLERANCE):
+    """Отпечаток сетки MshMesh (результата read_msh, BinaryMsh.to_mesh, ColumnarMesh.to_mesh)"""
+    fp = MeshFingerprint(tolerance)
+    node_hashes = fp.hash_nodes(mesh.nodes)
+    for block in mesh.element_blocks:
+        fp.update(block.element_type, node_hashes, mesh.connectivity(block), _groups(mesh, block))
+    return fp.hexdigest()
+
+
+def arrays_fingerprint(nodes, elements, tolerance=TOLERANCE):
+    """Отпечаток сетки генератора: узлы и {тип элемента gmsh: связность с нуля}"""
+    fp = MeshFingerprint(tolerance)
+    node_hashes = fp.hash_nodes(nodes)
+    for element_type, connectivity in elements.items():
+        fp.update(element_type, node_hashes, connectivity)
+    return fp.hexdigest()
+
+
+def file_fingerprint(path, tolerance=TOLERANCE):
+    """Отпечаток файла MSH или колоночного файла .mshc"""
+    mesh = load_columnar(path).to_mesh() if str(path).endswith(SUFFIX) else read_msh(path)
+    return mesh_fingerprint(mesh, tolerance)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Использование: python -m meshtools.fingerprint mesh.msh [other.msh|other.mshc ...]")
+    digests = {path: file_fingerprint(path) for path in sys.argv[1:]}
+    for path, digest in digests.items():
+        print(digest, path)
+    if len(digests) > 1:
+        print("совпадают" if len(set(digests.values())) == 1 else "различаются")
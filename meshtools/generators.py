@@ -0,0 +1,257 @@
+import gmsh
+import numpy as np
+
+from .connectivity import TagIndex
+from .estimate import check_budget, estimate_box, estimate_rectangle
+from .pool import get_pool
+from .structured import box_fast_path, rectangle_fast_path
+from .threads import WITHOUT_GMSH, MeshingOptions, get_thread_budget
+from .warm import warm_model
+
+# Типы элементов gmsh, которые возвращают генераторы, по названиям из интерфейса
+ELEMENT_TYPES = {"Треугольные": 2, "Четырехугольные": 3, "Тетраэдальные": 4}
+
+
+def write_msh(path, binary=True):
+    """Запись текущей модели в файл MSH 4.1, по умолчанию в двоичном виде"""
+    gmsh.option.setNumber("Mesh.Binary", 1 if binary else 0)
+    gmsh.write(path)
+
+
+def _rectangle_geometry(mesh_type, element_type, width, height):
+    """Геометрия прямоугольника и ограничения, не зависящие от чисел разбиений: линии l1..l4"""
+    # Создание точек
+    p1 = gmsh.model.geo.addPoint(0, 0, 0)
+    p2 = gmsh.model.geo.addPoint(width, 0, 0)
+    p3 = gmsh.model.geo.addPoint(width, height, 0)
+    p4 = gmsh.model.geo.addPoint(0, height, 0)
+
+    # Создание линий
+    l1 = gmsh.model.geo.addLine(p1, p2)
+    l2 = gmsh.model.geo.addLine(p2, p3)
+    l3 = gmsh.model.geo.addLine(p3, p4)
+    l4 = gmsh.model.geo.addLine(p4, p1)
+
+    # Создание области
+    cl = gmsh.model.geo.addCurveLoop([l1, l2, l3, l4])
+    s = gmsh.model.geo.addPlaneSurface([cl])
+
+    gmsh.model.geo.synchronize()
+
+    if mesh_type == "Структурированная":
+        if element_type == "Треугольные":
+            gmsh.model.mesh.setTransfiniteSurface(s, "Left")
+        elif element_type == "Четырехугольные":
+            gmsh.model.mesh.setTransfiniteSurface(s)
+
+    return l1, l2, l3, l4
+
+
+def generate_rectangle_mesh(mesh_type, element_type, width, height, nx, ny, msh_path=None, options=None):
+    """Генерация 2D-сетки для прямоугольника: узлы, элементы и параметры построения (MeshingOptions.to_array)"""
+    options = options or MeshingOptions()
+    options.apply()
+    # Геометрия сохраняется в рабочем процессе: при изменении только nx, ny она не строится заново
+    l1, l2, l3, l4 = warm_model(warm_key(generate_rectangle_mesh, (mesh_type, element_type, width, height)),
+                                lambda: _rectangle_geometry(mesh_type, element_type, width, height))
+
+    gmsh.model.mesh.setTransfiniteCurve(l1, nx + 1)
+    gmsh.model.mesh.setTransfiniteCurve(l2, ny + 1)
+    gmsh.model.mesh.setTransfiniteCurve(l3, nx + 1)
+    gmsh.model.mesh.setTransfiniteCurve(l4, ny + 1)
+
+    gmsh.model.mesh.generate(2)
+
+    if element_type == "Четырехугольные":
+        gmsh.model.mesh.recombine()
+
+    if msh_path is not None:
+        write_msh(msh_path)
+
+    node_tags, node_coords, _ = gmsh.model.mesh.getNodes()
+    element_types, element_tags, element_nodes = gmsh.model.mesh.getElements(2)
+
+    nodes = np.array(node_coords).reshape(-1, 3)[:, :2]
+    # Теги узлов не обязаны идти подряд с единицы
+    index = TagIndex(node_tags)
+    elements = [index(e).reshape(-1, 4 if element_type == "Четырехугольные" else 3) for e in element_nodes]
+
+    return nodes, np.vstack(elements), options.to_array()
+
+
+def _box_geometry(mesh_type, element_type, width, height, length):
+    """Геометрия параллелепипеда и ограничения, не зависящие от чисел разбиений: 12 линий"""
+    # Создание точек
+    p1 = gmsh.model.geo.addPoint(0, 0, 0)
+    p2 = gmsh.model.geo.addPoint(width, 0, 0)
+    p3 = gmsh.model.geo.addPoint(width, height, 0)
+    p4 = gmsh.model.geo.addPoint(0, height, 0)
+    p5 = gmsh.model.geo.addPoint(0, 0, length)
+    p6 = gmsh.model.geo.addPoint(width, 0, length)
+    p7 = gmsh.model.geo.addPoint(width, height, length)
+    p8 = gmsh.model.geo.addPoint(0, height, length)
+
+    # Создание линий
+    lines = [
+        gmsh.model.geo.addLine(p1, p2),  # l1
+        gmsh.model.geo.addLine(p2, p3),  # l2
+        gmsh.model.geo.addLine(p3, p4),  # l3
+        gmsh.model.geo.addLine(p4, p1),  # l4
+        gmsh.model.geo.addLine(p5, p6),  # l5
+        gmsh.model.geo.addLine(p6, p7),  # l6
+        gmsh.model.geo.addLine(p7, p8),  # l7
+        gmsh.model.geo.addLine(p8, p5),  # l8
+        gmsh.model.geo.addLine(p1, p5),  # l9
+        gmsh.model.geo.addLine(p2, p6),  # l10
+        gmsh.model.geo.addLine(p3, p7),  # l11
+        gmsh.model.geo.addLine(p4, p8),  # l12
+    ]
+
+    # Создание поверхностей
+    curve_loops = [
+        gmsh.model.geo.addCurveLoop([lines[0], lines[1], lines[2], lines[3]]),  # cl1
+        gmsh.model.geo.addCurveLoop([lines[4], lines[5], lines[6], lines[7]]),  # cl2
+        gmsh.model.geo.addCurveLoop([lines[0], lines[9], -lines[4], -lines[8]]),  # cl3
+        gmsh.model.geo.addCurveLoop([lines[1], lines[10], -lines[5], -lines[9]]),  # cl4
+        gmsh.model.geo.addCurveLoop([lines[2], lines[11], -lines[6], -lines[10]]),  # cl5
+        gmsh.model.geo.addCurveLoop([lines[3], lines[8], -lines[7], -lines[11]]),  # cl6
+    ]
+
+    surfaces = [gmsh.model.geo.addPlaneSurface([cl]) for cl in curve_loops]
+
+    # Создание объема
+    surface_loop = gmsh.model.geo.addSurfaceLoop(surfaces)
+    volume = gmsh.model.geo.addVolume([surface_loop])
+
+    gmsh.model.geo.synchronize()
+
+    # Настройка сетки
+    if mesh_type == "Структурированная":
+        gmsh.model.mesh.setTransfiniteSurface(surfaces[0])
+        gmsh.model.mesh.setTransfiniteVolume(volume)
+        if element_type == "Треугольные":
+            for s in surfaces:
+                gmsh.model.mesh.setTransfiniteSurface(s, "Left")
+        elif element_type == "Четырехугольные":
+            for s in surfaces:
+                gmsh.model.mesh.setTransfiniteSurface(s)
+
+    return lines
+
+
+def generate_box_mesh(mesh_type, element_type, width, height, length, nx, ny, nz, msh_path=None, options=None):
+    """Генерация 3D-сетки: узлы, элементы и параметры построения (MeshingOptions.to_array)"""
+    options = options or MeshingOptions()
+    options.apply()
+    # Геометрия сохраняется в рабочем процессе: при изменении только nx, ny, nz она не строится заново
+    lines = warm_model(warm_key(generate_box_mesh, (mesh_type, element_type, width, height, length)),
+                       lambda: _box_geometry(mesh_type, element_type, width, height, length))
+
+    gmsh.model.mesh.setTransfiniteCurve(lines[0], nx + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[2], nx + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[4], nx + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[6], nx + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[1], ny + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[3], ny + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[5], ny + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[7], ny + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[8], nz + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[9], nz + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[10], nz + 1)
+    gmsh.model.mesh.setTransfiniteCurve(lines[11], nz + 1)
+
+    # Генерация сетки
+    if element_type == "Тетраэдальные":
+        gmsh.model.mesh.generate(3)
+    else:
+        gmsh.model.mesh.generate(2)
+
+        if element_type == "Четырехугольные":
+            gmsh.model.mesh.recombine()
+
+    if msh_path is not None:
+        write_msh(msh_path)
+
+    node_tags, node_coords, _ = gmsh.model.mesh.getNodes()
+    nodes = np.array(node_coords).reshape(-1, 3)
+    index = TagIndex(node_tags)
+
+    if element_type == "Тетраэдальные":
+        # Только объемные блоки: точки, линии и треугольники границы не нужны
+        element_types, element_tags, element_nodes = gmsh.model.mesh.getElements(3)
+        elements = [index(e).reshape(-1, 4) for e in element_nodes]
+    else:
+        # Поверхностная сетка граней
+        element_types, element_tags, element_nodes = gmsh.model.mesh.getElements(2)
+        elements = [index(e).reshape(-1, 4 if element_type == "Четырехугольные" else 3) for e in element_nodes]
+
+    return nodes, np.vstack(elements), options.to_array()
+
+
+# Генераторы, для которых есть построение структурированных сеток без gmsh
+FAST_PATHS = {
+    generate_rectangle_mesh: rectangle_fast_path,
+    generate_box_mesh: box_fast_path,
+}
+
+# Число первых параметров генератора, задающих геометрию и ограничения сетки; при изменении
+# только остальных (чисел разбиений) модель берется готовой (meshtools.warm)
+GEOMETRY_ARGS = {
+    generate_rectangle_mesh: 4,
+    generate_box_mesh: 5,
+}
+
+
+def warm_key(func, args):
+    """Ключ сохраненной модели генератора func для параметров args"""
+    return (func.__name__, *args[:GEOMETRY_ARGS[func]])
+
+
+# Оценки размера сетки до построения (meshtools.estimate)
+ESTIMATORS = {
+    generate_rectangle_mesh: estimate_rectangle,
+    generate_box_mesh: estimate_box,
+}
+
+
+def check_generator_budget(func, args):
+    """MeshTooLarge, если сетка генератора func по оценке больше бюджета элементов"""
+    estimator = ESTIMATORS.get(func)
+    if estimator is not None:
+        check_budget(estimator(*args))
+
+
+def effective_options(options):
+    """Параметры, с которыми задание будет выполнено: потоки урезаются до общего бюджета"""
+    return (options or MeshingOptions()).limited(get_thread_budget().total)
+
+
+def run_generator(func, *args, options=None, pool=None, job=None, **kwargs):
+    """Построение сетки: структурированные случаи без gmsh, остальные — в пуле процессов
+
+    Задание в пуле (по умолчанию общем, get_pool) занимает потоки из общего бюджета
+    (meshtools.threads); если запрошено больше, чем весь бюджет, число потоков
+    уменьшается, а в результате записывается фактически использованное.
+    job (meshtools.jobs.MeshJob) получает ход построения и может прервать его.
+    Задание выполняется в пределах памяти и времени пула (meshtools.limits),
+    предел времени умножается на число потоков. Задание, которое по оценке больше
+    бюджета элементов (MESH_ELEMENT_BUDGET), отклоняется до построения с MeshTooLarge.
+    """
+    check_generator_budget(func, args)
+    fast_path = FAST_PATHS.get(func)
+    # Запись файла (msh_path) требует модели gmsh
+    if fast_path is not None and not kwargs:
+        result = fast_path(*args)
+        if result is not None:
+            return (*result, WITHOUT_GMSH.to_array())
+    options = options or MeshingOptions()
+    budget = get_thread_budget()
+    threads = budget.acquire(options.demand, job)
+    pool = pool or get_pool()
+    # Задание направляется в процесс, где модель с той же геометрией уже построена
+    affinity = warm_key(func, args) if func in GEOMETRY_ARGS else None
+    try:
+        return pool.execute(func, args, dict(kwargs, options=options.limited(threads)), job,
+                            pool.limits.for_threads(threads), affinity)
+    finally:
+        budget.release(threads)
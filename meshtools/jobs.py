@@ -0,0 +1,192 @@
+"""Фоновые задания построения сеток: ход построения, ограничение времени и отмена
+
+Задание выполняется в отдельном потоке, который передает его в пул процессов gmsh
+и сразу возвращает управление; интерфейс периодически опрашивает состояние задания.
+Ход построения определяется по выводу gmsh в рабочем процессе.
+"""
+
+import functools
+import inspect
+import re
+import threading
+import time
+
+from .generators import check_generator_budget, effective_options, run_generator
+from .limits import MeshTooLarge
+
+# Доли общего хода построения, приходящиеся на этапы gmsh
+_STAGES = {"1D": (0.0, 0.1), "2D": (0.1, 0.5), "3D": (0.5, 1.0)}
+_STAGE = re.compile(r"Meshing ([123]D)\.\.\.")
+_PERCENT = re.compile(r"\[\s*(\d+)%\]")
+
+# Параметры генераторов с числом разбиений; для более грубой сетки они уменьшаются
+_COUNTS = ("nx", "ny", "nz")
+# Наименьшее допустимое число разбиений (как в интерфейсе страниц 9 и 10)
+_MIN_COUNT = 2
+
+
+class GmshProgress:
+    """Разбор строк вывода gmsh: «Meshing 2D...», «[ 40%] Meshing surface 3» и т. п."""
+
+    def __init__(self):
+        self.stage = _STAGES["1D"]
+        self.fraction = 0.0
+
+    def parse(self, line):
+        """(доля от 0 до 1, текст сообщения) или None для строк, не относящихся к ходу построения"""
+        kind, _, text = line.partition(":")
+        if kind.strip() != "Info":
+            return None
+        text = text.strip()
+        stage = _STAGE.search(text)
+        percent = _PERCENT.search(text)
+        if stage is not None:
+            self.stage = _STAGES[stage.group(1)]
+            fraction = self.stage[0]
+        elif percent is not None:
+            lo, hi = self.stage
+            fraction = lo + (hi - lo) * int(percent.group(1)) / 100
+        else:
+            fraction = self.fraction
+        # Ход не убывает, даже если этапы идут не по порядку
+        self.fraction = max(self.fraction, fraction)
+        return self.fraction, text
+
+
+class MeshJobCancelled(RuntimeError):
+    """Задание отменено пользователем"""
+
+
+class MeshJobTimeout(RuntimeError):
+    """Задание не уложилось в отведенное время"""
+
+
+class MeshJob:
+    """Фоновое задание: state — queued, running, done, failed, cancelled, timeout или too_large
+
+    usage — использование ресурсов рабочим процессом (время, процессорное время, пик памяти),
+    None, если сетка взята из кэша или построена без gmsh.
+    """
+
+    def __init__(self, func, args, kwargs, timeout=None, cache=None, pool=None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.state = "queued"
+        self.progress = 0.0
+        self.message = "Ожидание свободного процесса gmsh"
+        self.result = None
+        self.error = None
+        self.usage = None
+        self._derived = {}
+        self.submitted = time.monotonic()
+        self.finished = None
+        self._cache = cache
+        self._pool = pool
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def done(self):
+        return self.state not in ("queued", "running")
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.submitted
+
+    def derived(self, name, compute):
+        """Величина, вычисляемая по результату задания один раз, например качество элементов
+
+        Страница перезапускается при каждом действии пользователя, а задание хранится
+        в st.session_state, поэтому compute() вызывается только при первом обращении.
+        """
+        if name not in self._derived:
+            self._derived[name] = compute()
+        return self._derived[name]
+
+    def cancel(self):
+        """Отмена: процесс gmsh, выполняющий задание, завершается"""
+        self._cancel.set()
+
+    def stop_reason(self):
+        """Исключение, с которым задание должно прерваться, или None"""
+        if self._cancel.is_set():
+            return MeshJobCancelled("Построение сетки отменено")
+        if self.timeout and time.monotonic() - self.submitted > self.timeout:
+            return MeshJobTimeout(f"Построение сетки не уложилось в {self.timeout:g} с")
+        return None
+
+    def report(self, fraction, message):
+        """Сообщение о ходе построения из рабочего процесса"""
+        self.state = "running"
+        self.progress = fraction
+        self.message = message
+
+    def coarser(self, factor=None):
+        """Параметры более грубой сетки после MeshTooLarge: {параметр: значение} или None
+
+        Числа разбиений уменьшаются так, чтобы элементов стало примерно в 1/factor раз меньше.
+        По умолчанию factor — 1/4, а для задания, отклоненного по оценке числа элементов,
+        подбирается так, чтобы оценка уложилась в бюджет.
+        """
+        if factor is None:
+            estimated = getattr(self.error, "estimated", None)
+            factor = 0.9 * self.error.limit / estimated if estimated else 0.25
+        names = list(inspect.signature(self.func).parameters)
+        counts = [name for name in _COUNTS if name in names[:len(self.args)]]
+        if not counts:
+            return None
+        scale = factor ** (1 / len(counts))
+        changes = {}
+        for name in counts:
+            value = self.args[names.index(name)]
+            if value > _MIN_COUNT:
+                changes[name] = max(_MIN_COUNT, int(value * scale))
+        return changes or None
+
+    def retry(self, changes):
+        """Новое задание с теми же параметрами, кроме changes (например, из coarser)"""
+        names = list(inspect.signature(self.func).parameters)
+        args = list(self.args)
+        for name, value in changes.items():
+            args[names.index(name)] = value
+        return submit_mesh_job(self.func, *args, timeout=self.timeout, cache=self._cache, pool=self._pool,
+                               **self.kwargs)
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.done
+
+    def _run(self):
+        runner = functools.partial(run_generator, pool=self._pool, job=self)
+        try:
+            if self._cache is not None:
+                # Бюджет проверяется до обращения к кэшу, а в ключ попадают фактические параметры
+                # построения, чтобы из кэша не вернулась сетка с параметрами другого запуска
+                check_generator_budget(self.func, self.args)
+                kwargs = dict(self.kwargs, options=effective_options(self.kwargs.get("options")))
+                self.result = self._cache.call(runner, self.func, *self.args, **kwargs)
+            else:
+                self.result = runner(self.func, *self.args, **self.kwargs)
+            self.progress, self.message, self.state = 1.0, "Готово", "done"
+        except MeshJobCancelled as e:
+            self.error, self.state = e, "cancelled"
+        except MeshJobTimeout as e:
+            self.error, self.state = e, "timeout"
+        except MeshTooLarge as e:
+            self.error, self.state = e, "too_large"
+        except Exception as e:
+            self.error, self.state = e, "failed"
+        finally:
+            self.finished = time.monotonic()
+
+
+def submit_mesh_job(func, *args, timeout=None, cache=None, pool=None, **kwargs):
+    """Запуск run_generator(func, *args, **kwargs) в фоне; возвращает MeshJob
+
+    С cache (например, get_cache()) результат берется из кэша и сохраняется в нем.
+    """
+    job = MeshJob(func, args, kwargs, timeout, cache, pool)
+    job._thread.start()
+    return job
@@ -0,0 +1,246 @@
+"""Ограничения памяти и процессорного времени для заданий в рабочих процессах gmsh
+
+Перед каждым заданием рабочему процессу назначаются мягкие пределы RLIMIT_AS и RLIMIT_CPU
+с отсчетом от его текущего состояния, после задания прежние пределы возвращаются.
+Нехватку памяти gmsh видит как ошибку выделения (или аварийно завершается), превышение
+времени завершает процесс сигналом SIGXCPU; оба случая превращаются в MeshTooLarge.
+Аварийное завершение считается нехваткой памяти только при ее признаках (CrashWatch),
+остальные падения остаются ошибкой рабочего процесса.
+Пиковая память каждого задания дописывается в журнал MESH_USAGE_LOG (JSON Lines), если он задан.
+"""
+
+import json
+import math
+import os
+import signal
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: пределы не назначаются
+    resource = None
+
+# Процессорное время на поток по умолчанию, с
+DEFAULT_CPU_SECONDS = 300
+
+
+class MeshTooLarge(RuntimeError):
+    """Задание превысило предел памяти (kind="memory") или процессорного времени (kind="cpu")
+    либо отклонено заранее по оценке числа элементов (kind="elements", meshtools.estimate)"""
+
+    def __init__(self, kind, limit, peak_rss_mib=None, estimated=None):
+        self.kind = kind
+        self.limit = limit
+        self.peak_rss_mib = peak_rss_mib
+        self.estimated = estimated
+        if kind == "elements":
+            what = f"бюджет элементов ({limit:_}, по оценке {estimated:_})".replace("_", " ")
+        elif kind == "memory":
+            what = f"предел памяти ({limit:.0f} МиБ)"
+        else:
+            what = f"предел процессорного времени ({limit:.0f} с)"
+        super().__init__(f"Сетка слишком большая: превышен {what}")
+
+    def __reduce__(self):
+        # Исключение передается из рабочего процесса по каналу
+        return MeshTooLarge, (self.kind, self.limit, self.peak_rss_mib, self.estimated)
+
+
+def peak_rss_mib():
+    """Пиковая память процесса за все время его работы"""
+    # ru_maxrss в Linux — в КиБ, в macOS — в байтах
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def _status_kib(field, pid="self"):
+    """Поле VmSize, VmPeak или VmHWM из /proc/<pid>/status в КиБ; None вне Linux"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """Сброс VmHWM (Linux 4.0+), чтобы пик памяти относился к одному заданию"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _default_memory_mib(workers):
+    """80% оперативной памяти, поделенные между рабочими процессами"""
+    try:
+        total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+    return 0.8 * total / 2 ** 20 / max(1, workers)
+
+
+class JobLimits:
+    """Пределы одного задания: memory_mib — прирост адресного пространства процесса,
+    cpu_seconds — процессорное время, суммарное по всем потокам; None — без предела"""
+
+    def __init__(self, memory_mib=None, cpu_seconds=None):
+        self.memory_mib = memory_mib or None
+        self.cpu_seconds = cpu_seconds or None
+
+    def __repr__(self):
+        return f"JobLimits(memory_mib={self.memory_mib!r}, cpu_seconds={self.cpu_seconds!r})"
+
+    @classmethod
+    def from_env(cls, workers=1):
+        """MESH_MEMORY_LIMIT_MIB и MESH_CPU_LIMIT_S (на поток); 0 отключает предел
+
+        По умолчанию память делится между workers процессами, время — DEFAULT_CPU_SECONDS на поток.
+        """
+        memory = os.environ.get("MESH_MEMORY_LIMIT_MIB")
+        memory = float(memory) if memory else _default_memory_mib(workers)
+        cpu = float(os.environ.get("MESH_CPU_LIMIT_S") or DEFAULT_CPU_SECONDS)
+        return cls(memory, cpu)
+
+    def for_threads(self, threads):
+        """Пределы задания, занимающего threads потоков: время растет с их числом"""
+        return JobLimits(self.memory_mib, self.cpu_seconds and self.cpu_seconds * max(1, threads))
+
+
+class JobUsage:
+    """Пределы и замеры одного задания в рабочем процессе: создается перед заданием, finish — после"""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.start = time.perf_counter()
+        self.cpu_start = sum(os.times()[:2])
+        self.peak_start = _status_kib("VmPeak")
+        self.exact_peak = _reset_peak_rss()
+        self.memory_limit = None
+        self._saved = {}
+        if resource is None or limits is None:
+            return
+        size = _status_kib("VmSize")
+        if limits.memory_mib and size is not None:
+            self.memory_limit = size * 1024 + int(limits.memory_mib * 2 ** 20)
+            self._set(resource.RLIMIT_AS, self.memory_limit)
+        if limits.cpu_seconds:
+            self._set(resource.RLIMIT_CPU, math.ceil(self.cpu_start + limits.cpu_seconds))
+
+    def _set(self, which, soft):
+        old, hard = resource.getrlimit(which)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        self._saved[which] = (old, hard)
+        resource.setrlimit(which, (soft, hard))
+
+    def _near_memory_limit(self, error):
+        if isinstance(error, MemoryError):
+            return True
+        # gmsh сообщает о нехватке памяти общей ошибкой, поэтому смотрится рост VmPeak за задание
+        peak = _status_kib("VmPeak")
+        return peak is not None and peak > (self.peak_start or 0) and peak * 1024 >= 0.9 * self.memory_limit
+
+    def finish(self, error=None):
+        """Возврат прежних пределов: (запись об использовании ресурсов, ошибка задания)
+
+        Ошибка, случившаяся у предела памяти, заменяется на MeshTooLarge.
+        """
+        for which, limit in self._saved.items():
+            resource.setrlimit(which, limit)
+        peak = _status_kib("VmHWM") if self.exact_peak else None
+        if peak is not None:
+            peak = peak / 1024
+        elif resource is not None:
+            peak = peak_rss_mib()
+        if error is not None and self.memory_limit is not None and self._near_memory_limit(error):
+            error = MeshTooLarge("memory", self.limits.memory_mib, peak)
+        status = "ok" if error is None else "too_large" if isinstance(error, MeshTooLarge) else "error"
+        usage = dict(status=status, seconds=time.perf_counter() - self.start,
+                     cpu_seconds=sum(os.times()[:2]) - self.cpu_start, peak_rss_mib=peak)
+        return usage, error
+
+
+# Сообщения об ошибке выделения памяти в stderr рабочего процесса
+MEMORY_MESSAGES = ("bad_alloc", "MemoryError", "Cannot allocate memory", "out of memory", "Out of memory")
+
+
+class CrashWatch:
+    """Признаки нехватки памяти у рабочего процесса, собираемые пулом во время задания
+
+    Упавший процесс уже ничего не сообщит, поэтому пул замеряет его адресное пространство
+    (sample) и после падения читает stderr процесса, перенаправленный в файл stderr_path.
+    memory_limit — потолок RLIMIT_AS задания в байтах, о нем сообщает сам процесс (JobUsage).
+    """
+
+    def __init__(self, pid, stderr_path=None):
+        self.pid = pid
+        self.stderr_path = stderr_path
+        if stderr_path:
+            # Файл очищается перед заданием, чтобы сообщения относились только к нему
+            try:
+                os.truncate(stderr_path, 0)
+            except OSError:
+                pass
+        self.peak_kib = _status_kib("VmSize", pid)
+        self.memory_limit = None
+
+    def sample(self):
+        size = _status_kib("VmSize", self.pid)
+        if size is not None:
+            self.peak_kib = max(self.peak_kib or 0, size)
+
+    def near_ceiling(self):
+        return self.memory_limit is not None and (self.peak_kib or 0) * 1024 >= 0.9 * self.memory_limit
+
+    def stderr_tail(self, size=4096):
+        """Последние size байт stderr процесса за задание"""
+        if not self.stderr_path:
+            return ""
+        try:
+            with open(self.stderr_path, "rb") as f:
+                f.seek(max(0, os.path.getsize(self.stderr_path) - size))
+                return f.read().decode(errors="replace")
+        except OSError:
+            return ""
+
+    def memory_message(self):
+        tail = self.stderr_tail()
+        return any(message in tail for message in MEMORY_MESSAGES)
+
+
+def crash_error(exitcode, limits, watch=None):
+    """MeshTooLarge для процесса, завершенного из-за пределов задания, иначе None
+
+    SIGXCPU при пределе времени — превышение времени. Нехватка памяти признается только
+    при свидетельствах из watch (CrashWatch): сообщении об ошибке выделения в stderr
+    или SIGABRT (необработанный std::bad_alloc) у самого потолка адресного пространства.
+    SIGSEGV, SIGKILL и прочие сигналы без таких признаков — обычное падение процесса.
+    """
+    if limits is None or exitcode is None or exitcode >= 0:
+        return None
+    signum = -exitcode
+    if limits.cpu_seconds and signum == getattr(signal, "SIGXCPU", None):
+        return MeshTooLarge("cpu", limits.cpu_seconds)
+    if limits.memory_mib and watch is not None:
+        if watch.memory_message() or (signum == signal.SIGABRT and watch.near_ceiling()):
+            return MeshTooLarge("memory", limits.memory_mib)
+    return None
+
+
+_log_lock = threading.Lock()
+
+
+def record_usage(usage):
+    """Дописывание записи в журнал MESH_USAGE_LOG, если он задан"""
+    path = os.environ.get("MESH_USAGE_LOG")
+    if not path:
+        return
+    with _log_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(usage, ensure_ascii=False, default=repr) + "\n")
@@ -0,0 +1,244 @@
+"""Чтение файлов MSH 4.1 в массивы NumPy без инициализации gmsh"""
+
+import itertools
+import shlex
+
+import numpy as np
+
+from .connectivity import TagIndex
+
+# Число узлов элемента по его типу gmsh
+ELEMENT_NODES = {
+    1: 2, 2: 3, 3: 4, 4: 4, 5: 8, 6: 6, 7: 5, 8: 3, 9: 6, 10: 9, 11: 10, 12: 27,
+    13: 18, 14: 14, 15: 1, 16: 8, 17: 20, 18: 15, 19: 13, 20: 9, 21: 10, 26: 4,
+    27: 5, 28: 6, 29: 20, 30: 35, 31: 56, 92: 64, 93: 125,
+}
+
+# Размерность элемента по его типу gmsh
+ELEMENT_DIM = {
+    1: 1, 2: 2, 3: 2, 4: 3, 5: 3, 6: 3, 7: 3, 8: 1, 9: 2, 10: 2, 11: 3, 12: 3,
+    13: 3, 14: 3, 15: 0, 16: 2, 17: 3, 18: 3, 19: 3, 20: 2, 21: 2, 26: 1,
+    27: 1, 28: 1, 29: 3, 30: 3, 31: 3, 92: 3, 93: 3,
+}
+
+# Разбор ведется порциями, чтобы временная память не зависела от размера блока
+CHUNK_LINES = 1 << 16
+
+
+class MshFormatError(ValueError):
+    """Файл не соответствует формату MSH 4.1"""
+
+
+class Entity:
+    """Геометрическая сущность из раздела $Entities"""
+
+    def __init__(self, dim, tag, physical_tags, bounding=()):
+        self.dim = dim
+        self.tag = tag
+        self.physical_tags = tuple(physical_tags)
+        self.bounding = tuple(bounding)
+
+
+class ElementBlock:
+    """Блок элементов одного типа, принадлежащих одной сущности"""
+
+    def __init__(self, dim, entity_tag, element_type, tags, node_tags):
+        self.dim = dim
+        self.entity_tag = entity_tag
+        self.element_type = element_type
+        self.tags = tags
+        self.node_tags = node_tags  # (число элементов, число узлов элемента), теги узлов
+
+
+class MshMesh:
+    """Содержимое файла MSH: узлы, блоки элементов, сущности и физические группы"""
+
+    def __init__(self, node_tags, nodes, element_blocks, entities, physical_names, node_blocks=None):
+        self.node_tags = node_tags
+        self.nodes = nodes
+        self.element_blocks = element_blocks
+        self.entities = entities  # {(dim, tag): Entity}
+        self.physical_names = physical_names  # {(dim, physical_tag): name}
+        self.node_blocks = node_blocks  # [(dim, entity_tag, число узлов)] в порядке строк nodes
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = TagIndex(self.node_tags)
+        return self._index
+
+    def connectivity(self, block):
+        """Связность блока в индексах строк массива nodes"""
+        return self.index(block.node_tags)
+
+    def physical_tag(self, name, dim=None):
+        for (d, tag), n in self.physical_names.items():
+            if n == name and (dim is None or d == dim):
+                return d, tag
+        raise KeyError(f"Физическая группа {name!r} не найдена")
+
+    def physical_group(self, group, dim=None):
+        """Блоки элементов физической группы (по имени или номеру)"""
+        if isinstance(group, str):
+            dim, group = self.physical_tag(group, dim)
+        blocks = []
+        for b in self.element_blocks:
+            entity = self.entities.get((b.dim, b.entity_tag))
+            if entity is not None and (dim is None or b.dim == dim) and group in entity.physical_tags:
+                blocks.append(b)
+        return blocks
+
+    def elements_of_type(self, element_type):
+        """Связность всех элементов данного типа в индексах строк nodes"""
+        blocks = [b.node_tags for b in self.element_blocks if b.element_type == element_type]
+        if not blocks:
+            return np.empty((0, ELEMENT_NODES[element_type]), dtype=np.int64)
+        return self.index(np.concatenate(blocks))
+
+
+def node_columns(dim, parametric):
+    """Число чисел на узел в блоке $Nodes: x y z и параметрические координаты u, v, w по размерности сущности"""
+    return 3 + (dim if parametric else 0)
+
+
+def _iter_lines(f, count, cols, dtype, chunk=CHUNK_LINES):
+    """Разбор count строк по cols чисел порциями не более chunk строк"""
+    for start in range(0, count, chunk):
+        n = min(chunk, count - start)
+        # Разбор строк целиком в C-коде NumPy
+        values = np.loadtxt(itertools.islice(f, n), dtype=dtype, ndmin=2)
+        if values.shape != (n, cols):
+            raise MshFormatError(f"Ожидалось {n} строк по {cols} чисел, прочитано {values.shape}")
+        yield values
+
+
+def _parse_lines(f, count, cols, dtype):
+    """Разбор count строк по cols чисел в массив (count, cols)"""
+    out = np.empty((count, cols), dtype=dtype)
+    start = 0
+    for values in _iter_lines(f, count, cols, dtype):
+        out[start:start + len(values)] = values
+        start += len(values)
+    return out
+
+
+def _ints(line):
+    return [int(v) for v in line.split()]
+
+
+def _expect_end(f, name):
+    line = f.readline().strip()
+    if line != b"$End" + name:
+        raise MshFormatError(f"Ожидалось $End{name.decode()}, получено {line[:40]!r}")
+
+
+def _read_format(f):
+    version, file_type, _ = f.readline().split()
+    if not version.startswith(b"4"):
+        raise MshFormatError(f"Поддерживается только MSH 4.x, версия файла {version.decode()}")
+    if file_type != b"0":
+        raise MshFormatError("Двоичные файлы MSH не поддерживаются")
+    _expect_end(f, b"MeshFormat")
+
+
+def _read_physical_names(f):
+    names = {}
+    for _ in range(int(f.readline())):
+        dim, tag, name = f.readline().decode("utf-8").split(maxsplit=2)
+        names[(int(dim), int(tag))] = shlex.split(name)[0]
+    _expect_end(f, b"PhysicalNames")
+    return names
+
+
+def _read_entities(f):
+    entities = {}
+    counts = _ints(f.readline())
+    for dim, count in enumerate(counts):
+        for _ in range(count):
+            values = f.readline().split()
+            tag = int(values[0])
+            # Точка: tag x y z; остальные сущности: tag и ограничивающий параллелепипед
+            pos = 4 if dim == 0 else 7
+            n_phys = int(values[pos])
+            physical = [int(v) for v in values[pos + 1:pos + 1 + n_phys]]
+            bounding = ()
+            if dim > 0:
+                pos += 1 + n_phys
+                bounding = [int(v) for v in values[pos + 1:pos + 1 + int(values[pos])]]
+            entities[(dim, tag)] = Entity(dim, tag, physical, bounding)
+    _expect_end(f, b"Entities")
+    return entities
+
+
+def _read_nodes(f):
+    num_blocks, num_nodes, _, _ = _ints(f.readline())
+    node_tags = np.empty(num_nodes, dtype=np.int64)
+    nodes = np.empty((num_nodes, 3))
+    node_blocks = []
+    pos = 0
+    for _ in range(num_blocks):
+        dim, entity_tag, parametric, count = _ints(f.readline())
+        node_blocks.append((dim, entity_tag, count))
+        node_tags[pos:pos + count] = _parse_lines(f, count, 1, np.int64)[:, 0]
+        cols = node_columns(dim, parametric)
+        nodes[pos:pos + count] = _parse_lines(f, count, cols, np.float64)[:, :3]
+        pos += count
+    _expect_end(f, b"Nodes")
+    return node_tags, nodes, node_blocks
+
+
+def _read_elements(f):
+    num_blocks = _ints(f.readline())[0]
+    blocks = []
+    for _ in range(num_blocks):
+        dim, entity_tag, element_type, count = _ints(f.readline())
+        npe = ELEMENT_NODES[element_type]
+        data = _parse_lines(f, count, npe + 1, np.int64)
+        blocks.append(ElementBlock(dim, entity_tag, element_type, data[:, 0].copy(), data[:, 1:]))
+    _expect_end(f, b"Elements")
+    return blocks
+
+
+def _skip_section(f, name):
+    end = b"$End" + name
+    for line in f:
+        if line.strip() == end:
+            return
+    # В файле другого формата имя раздела может не быть текстом UTF-8
+    raise MshFormatError(f"Раздел ${name.decode(errors='replace')} не закрыт")
+
+
+def read_msh(path):
+    """Чтение файла MSH 4.1; двоичные файлы отображаются в память"""
+    from .msh_binary import BinaryMsh, is_binary_msh
+
+    if is_binary_msh(path):
+        return BinaryMsh(path).to_mesh()
+
+    node_tags = nodes = node_blocks = None
+    blocks, entities, physical_names = [], {}, {}
+    with open(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            name = line.strip()
+            if not name.startswith(b"$"):
+                continue
+            name = name[1:]
+            if name == b"MeshFormat":
+                _read_format(f)
+            elif name == b"PhysicalNames":
+                physical_names = _read_physical_names(f)
+            elif name == b"Entities":
+                entities = _read_entities(f)
+            elif name == b"Nodes":
+                node_tags, nodes, node_blocks = _read_nodes(f)
+            elif name == b"Elements":
+                blocks = _read_elements(f)
+            else:
+                _skip_section(f, name)
+    if nodes is None:
+        raise MshFormatError(f"В файле {path} нет раздела $Nodes")
+    return MshMesh(node_tags, nodes, blocks, entities, physical_names, node_blocks)
@@ -0,0 +1,211 @@
+"""Чтение двоичных файлов MSH 4.1 через отображение в память"""
+
+import mmap
+import shlex
+
+import numpy as np
+
+from .msh import ELEMENT_NODES, ElementBlock, Entity, MshFormatError, MshMesh, node_columns
+
+
+class NodeBlockInfo:
+    """Положение блока узлов одной сущности внутри файла"""
+
+    def __init__(self, dim, entity_tag, count, cols, tags_offset, coords_offset):
+        self.dim = dim
+        self.entity_tag = entity_tag
+        self.count = count
+        self.cols = cols
+        self.tags_offset = tags_offset
+        self.coords_offset = coords_offset
+
+
+class ElementBlockInfo:
+    """Положение блока элементов одной сущности внутри файла"""
+
+    def __init__(self, dim, entity_tag, element_type, count, offset):
+        self.dim = dim
+        self.entity_tag = entity_tag
+        self.element_type = element_type
+        self.count = count
+        self.offset = offset
+
+
+class BinaryMsh:
+    """Двоичный файл MSH 4.1: блоки узлов и элементов доступны как представления без копирования"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entities = {}
+        self.physical_names = {}
+        self.sections = {}  # {имя раздела: смещение начала его данных}
+        self.node_blocks = []
+        self.element_blocks = []
+        self._parse()
+
+    def close(self):
+        try:
+            self._mm.close()
+        except BufferError:
+            # Пока живы представления массивов, отображение освободится вместе с ними
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Низкоуровневое чтение
+
+    def _line(self, pos):
+        end = self._mm.find(b"\n", pos)
+        if end < 0:
+            end = len(self._mm)
+        return self._mm[pos:end].strip(), end + 1
+
+    def _array(self, dtype, count, pos):
+        dtype = np.dtype(dtype).newbyteorder(self.byte_order)
+        return np.frombuffer(self._mm, dtype=dtype, count=count, offset=pos), pos + dtype.itemsize * count
+
+    def _scalars(self, dtype, count, pos):
+        values, pos = self._array(dtype, count, pos)
+        return [int(v) for v in values], pos
+
+    def _expect_end(self, pos, name):
+        # После двоичных данных перед $End<name> записан перевод строки
+        while self._mm[pos:pos + 1] in (b"\n", b"\r"):
+            pos += 1
+        line, pos = self._line(pos)
+        if line != b"$End" + name:
+            raise MshFormatError(f"Ожидалось $End{name.decode()}, получено {line[:40]!r}")
+        return pos
+
+    # Разделы файла
+
+    def _parse(self):
+        pos = 0
+        self.byte_order = "<"
+        self.size_t = "u8"
+        while pos < len(self._mm):
+            line, pos = self._line(pos)
+            if not line.startswith(b"$"):
+                continue
+            name = line[1:]
+            self.sections[name.decode()] = pos
+            if name == b"MeshFormat":
+                pos = self._read_format(pos)
+            elif name == b"PhysicalNames":
+                pos = self._read_physical_names(pos)
+            elif name == b"Entities":
+                pos = self._read_entities(pos)
+            elif name == b"Nodes":
+                pos = self._read_nodes(pos)
+            elif name == b"Elements":
+                pos = self._read_elements(pos)
+            else:
+                end = self._mm.find(b"$End" + name, pos)
+                if end < 0:
+                    raise MshFormatError(f"Раздел ${name.decode()} не закрыт")
+                _, pos = self._line(end)
+
+    def _read_format(self, pos):
+        line, pos = self._line(pos)
+        version, file_type, data_size = line.split()
+        if not version.startswith(b"4") or file_type != b"1":
+            raise MshFormatError("Ожидался двоичный файл MSH 4.x")
+        self.size_t = {b"4": "u4", b"8": "u8"}[data_size]
+        # Целое 1 позволяет определить порядок байтов
+        one = self._mm[pos:pos + 4]
+        self.byte_order = "<" if one == b"\x01\x00\x00\x00" else ">"
+        return self._expect_end(pos + 4, b"MeshFormat")
+
+    def _read_physical_names(self, pos):
+        line, pos = self._line(pos)
+        for _ in range(int(line)):
+            line, pos = self._line(pos)
+            dim, tag, name = line.decode("utf-8").split(maxsplit=2)
+            self.physical_names[(int(dim), int(tag))] = shlex.split(name)[0]
+        return self._expect_end(pos, b"PhysicalNames")
+
+    def _read_entities(self, pos):
+        counts, pos = self._scalars(self.size_t, 4, pos)
+        for dim, count in enumerate(counts):
+            for _ in range(count):
+                (tag,), pos = self._scalars("i4", 1, pos)
+                # Точка: x y z; остальные сущности: ограничивающий параллелепипед
+                pos += 8 * (3 if dim == 0 else 6)
+                (n_phys,), pos = self._scalars(self.size_t, 1, pos)
+                physical, pos = self._scalars("i4", n_phys, pos)
+                bounding = ()
+                if dim > 0:
+                    (n_bound,), pos = self._scalars(self.size_t, 1, pos)
+                    bounding, pos = self._scalars("i4", n_bound, pos)
+                self.entities[(dim, tag)] = Entity(dim, tag, physical, bounding)
+        return self._expect_end(pos, b"Entities")
+
+    def _read_nodes(self, pos):
+        (num_blocks, _, _, _), pos = self._scalars(self.size_t, 4, pos)
+        size_t = np.dtype(self.size_t).itemsize
+        for _ in range(num_blocks):
+            (dim, entity_tag, parametric), pos = self._scalars("i4", 3, pos)
+            (count,), pos = self._scalars(self.size_t, 1, pos)
+            cols = node_columns(dim, parametric)
+            tags_offset = pos
+            coords_offset = tags_offset + size_t * count
+            self.node_blocks.append(NodeBlockInfo(dim, entity_tag, count, cols, tags_offset, coords_offset))
+            # Сами данные не читаются, блок пропускается по известному размеру
+            pos = coords_offset + 8 * cols * count
+        return self._expect_end(pos, b"Nodes")
+
+    def _read_elements(self, pos):
+        (num_blocks, _, _, _), pos = self._scalars(self.size_t, 4, pos)
+        size_t = np.dtype(self.size_t).itemsize
+        for _ in range(num_blocks):
+            (dim, entity_tag, element_type), pos = self._scalars("i4", 3, pos)
+            (count,), pos = self._scalars(self.size_t, 1, pos)
+            self.element_blocks.append(ElementBlockInfo(dim, entity_tag, element_type, count, pos))
+            pos += size_t * count * (ELEMENT_NODES[element_type] + 1)
+        return self._expect_end(pos, b"Elements")
+
+    # Доступ к данным
+
+    def node_block(self, i):
+        """Теги и координаты i-го блока узлов (представления без копирования)"""
+        info = self.node_blocks[i]
+        tags, _ = self._array(self.size_t, info.count, info.tags_offset)
+        coords, _ = self._array("f8", info.count * info.cols, info.coords_offset)
+        return tags, coords.reshape(info.count, info.cols)[:, :3]
+
+    def element_block(self, i):
+        """i-й блок элементов; теги элементов и узлов — представления без копирования"""
+        info = self.element_blocks[i]
+        npe = ELEMENT_NODES[info.element_type]
+        data, _ = self._array(self.size_t, info.count * (npe + 1), info.offset)
+        data = data.reshape(info.count, npe + 1)
+        return ElementBlock(info.dim, info.entity_tag, info.element_type, data[:, 0], data[:, 1:])
+
+    def nodes(self):
+        """Теги и координаты всех узлов; при одном блоке — без копирования"""
+        blocks = [self.node_block(i) for i in range(len(self.node_blocks))]
+        if len(blocks) == 1:
+            return blocks[0]
+        if not blocks:
+            return np.empty(0, dtype=np.int64), np.empty((0, 3))
+        return np.concatenate([b[0] for b in blocks]), np.concatenate([b[1] for b in blocks])
+
+    def to_mesh(self):
+        """Сетка в том же виде, что возвращает read_msh"""
+        node_tags, nodes = self.nodes()
+        blocks = [self.element_block(i) for i in range(len(self.element_blocks))]
+        node_blocks = [(b.dim, b.entity_tag, b.count) for b in self.node_blocks]
+        return MshMesh(node_tags, nodes, blocks, self.entities, self.physical_names, node_blocks)
+
+
+def is_binary_msh(path):
+    """Проверка по заголовку $MeshFormat, записан ли файл в двоичном виде"""
+    with open(path, "rb") as f:
+        head = f.read(64).split(b"\n")
+    return len(head) > 1 and head[0].strip() == b"$MeshFormat" and head[1].split()[1:2] == [b"1"]
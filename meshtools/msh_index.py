@@ -0,0 +1,261 @@
+"""Индекс смещений блоков файла MSH для чтения отдельных сущностей без разбора всего файла
+
+Индекс записывается рядом с файлом (path + ".idx.json"), а если каталог файла закрыт
+для записи — в MESH_INDEX_DIR (по умолчанию ~/.cache/gmsh_meshes/index); если не удалось
+и это, индекс остается только в памяти.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .msh import (ELEMENT_NODES, ElementBlock, Entity, MshFormatError, MshMesh, _expect_end, _ints,
+                  _parse_lines, _read_entities, _read_physical_names, _skip_section, node_columns)
+from .msh_binary import BinaryMsh, is_binary_msh
+
+INDEX_VERSION = 3
+INDEX_SUFFIX = ".idx.json"
+
+# Блоки при построении индекса пропускаются чтением по столько байтов с подсчетом строк
+SKIP_CHUNK = 1 << 20
+
+# Контрольная сумма считается по началу, концу и равномерно расположенным фрагментам файла
+SAMPLE_SIZE = 1 << 16
+SAMPLE_COUNT = 16
+
+
+def file_checksum(path):
+    """Быстрая контрольная сумма: размер, время изменения и выборка содержимого"""
+    stat = os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        step = max(stat.st_size // SAMPLE_COUNT, 1)
+        for pos in list(range(0, stat.st_size, step)) + [max(stat.st_size - SAMPLE_SIZE, 0)]:
+            f.seek(pos)
+            h.update(f.read(SAMPLE_SIZE))
+    return h.hexdigest()
+
+
+def _tag_range(tags):
+    return [int(tags.min()), int(tags.max())] if len(tags) else [0, -1]
+
+
+def _index_paths(path):
+    """Файл индекса рядом с данными и запасной файл в каталоге кэша"""
+    directory = os.environ.get("MESH_INDEX_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "gmsh_meshes", "index")
+    name = hashlib.blake2b(os.path.abspath(path).encode(), digest_size=16).hexdigest()
+    return [path + INDEX_SUFFIX, os.path.join(directory, name + INDEX_SUFFIX)]
+
+
+def _skip_lines(f, count):
+    """Переход за count строк без их разбора"""
+    while count > 0:
+        start = f.tell()
+        # Небольшие блоки не читаются целым SKIP_CHUNK
+        chunk = f.read(min(SKIP_CHUNK, 64 * max(count, 64)))
+        if not chunk:
+            raise MshFormatError("Файл короче, чем указано в заголовке блока")
+        ends = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord("\n"))
+        if len(ends) < count:
+            count -= len(ends)
+            continue
+        f.seek(start + int(ends[count - 1]) + 1)
+        return
+
+
+def _scan_ascii(path):
+    nodes, elements = [], []
+    entities, physical_names = {}, {}
+    sections = {}
+    with open(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            name = line.strip()
+            if not name.startswith(b"$"):
+                continue
+            name = name[1:]
+            sections[name.decode(errors="replace")] = f.tell()
+            if name == b"MeshFormat":
+                f.readline()
+                _expect_end(f, name)
+            elif name == b"PhysicalNames":
+                physical_names = _read_physical_names(f)
+            elif name == b"Entities":
+                entities = _read_entities(f)
+            elif name == b"Nodes":
+                num_blocks = _ints(f.readline())[0]
+                for _ in range(num_blocks):
+                    dim, tag, parametric, count = _ints(f.readline())
+                    tags_offset = f.tell()
+                    # Разбираются только теги узлов: по их диапазону read_entities отбирает блоки
+                    tags = _parse_lines(f, count, 1, np.int64)[:, 0]
+                    coords_offset = f.tell()
+                    _skip_lines(f, count)
+                    cols = node_columns(dim, parametric)
+                    nodes.append(dict(dim=dim, tag=tag, count=count, cols=cols, offset=tags_offset,
+                                      coords_offset=coords_offset, end=f.tell(), tags=_tag_range(tags)))
+                _expect_end(f, name)
+            elif name == b"Elements":
+                num_blocks = _ints(f.readline())[0]
+                for _ in range(num_blocks):
+                    dim, tag, element_type, count = _ints(f.readline())
+                    offset = f.tell()
+                    _skip_lines(f, count)
+                    elements.append(dict(dim=dim, tag=tag, type=element_type, count=count, offset=offset,
+                                         end=f.tell()))
+                _expect_end(f, name)
+            else:
+                _skip_section(f, name)
+    return dict(format="ascii", sections=sections, nodes=nodes, elements=elements,
+                entities=entities, physical_names=physical_names)
+
+
+def _scan_binary(path):
+    with BinaryMsh(path) as m:
+        nodes, elements = [], []
+        for i, info in enumerate(m.node_blocks):
+            tags, _ = m.node_block(i)
+            nodes.append(dict(dim=info.dim, tag=info.entity_tag, count=info.count, cols=info.cols,
+                              offset=info.tags_offset, coords_offset=info.coords_offset,
+                              end=info.coords_offset + 8 * info.cols * info.count, tags=_tag_range(tags)))
+        size_t = np.dtype(m.size_t).itemsize
+        for info in m.element_blocks:
+            end = info.offset + size_t * info.count * (ELEMENT_NODES[info.element_type] + 1)
+            elements.append(dict(dim=info.dim, tag=info.entity_tag, type=info.element_type, count=info.count,
+                                 offset=info.offset, end=end))
+        return dict(format="binary", byte_order=m.byte_order, size_t=m.size_t, sections=m.sections,
+                    nodes=nodes, elements=elements, entities=m.entities, physical_names=m.physical_names)
+
+
+def build_index(path):
+    """Построение индекса за один проход по файлу и запись его рядом с файлом или в каталог кэша"""
+    scan = _scan_binary(path) if is_binary_msh(path) else _scan_ascii(path)
+    index = dict(
+        version=INDEX_VERSION,
+        checksum=file_checksum(path),
+        format=scan["format"],
+        byte_order=scan.get("byte_order"),
+        size_t=scan.get("size_t"),
+        sections=scan["sections"],
+        physical_names=[[d, t, n] for (d, t), n in scan["physical_names"].items()],
+        entities=[[e.dim, e.tag, list(e.physical_tags), list(e.bounding)] for e in scan["entities"].values()],
+        nodes=scan["nodes"],
+        elements=scan["elements"],
+    )
+    for index_path in _index_paths(path):
+        try:
+            os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+            with open(index_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False)
+            break
+        except OSError:
+            continue
+    return MshIndex(path, index)
+
+
+def load_index(path, rebuild=True):
+    """Индекс файла; при отсутствии или изменении файла он перестраивается"""
+    for index_path in _index_paths(path):
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION and index.get("checksum") == file_checksum(path):
+                return MshIndex(path, index)
+        except (OSError, ValueError):
+            pass
+    if not rebuild:
+        return None
+    return build_index(path)
+
+
+class MshIndex:
+    """Смещения блоков узлов и элементов файла MSH"""
+
+    def __init__(self, path, index):
+        self.path = path
+        self.format = index["format"]
+        self.nodes = index["nodes"]
+        self.elements = index["elements"]
+        self.physical_names = {(d, t): n for d, t, n in index["physical_names"]}
+        self.entities = {(d, t): Entity(d, t, phys, bound) for d, t, phys, bound in index["entities"]}
+        self._order = index.get("byte_order") or "<"
+        self._size_t = index.get("size_t") or "u8"
+
+    def _dtype(self, dtype):
+        return np.dtype(dtype).newbyteorder(self._order)
+
+    def _read(self, f, offset, count, cols, dtype):
+        f.seek(offset)
+        if self.format == "ascii":
+            return _parse_lines(f, count, cols, dtype)
+        data = np.fromfile(f, dtype=self._dtype(dtype), count=count * cols)
+        if data.size != count * cols:
+            raise MshFormatError(f"Файл {self.path} короче, чем указано в индексе")
+        return data.reshape(count, cols)
+
+    def _read_node_block(self, f, info):
+        tag_dtype = np.int64 if self.format == "ascii" else self._size_t
+        tags = self._read(f, info["offset"], info["count"], 1, tag_dtype)[:, 0]
+        coords = self._read(f, info["coords_offset"], info["count"], info["cols"], np.float64)[:, :3]
+        return tags.astype(np.int64, copy=False), coords
+
+    def _read_element_block(self, f, info):
+        npe = ELEMENT_NODES[info["type"]]
+        tag_dtype = np.int64 if self.format == "ascii" else self._size_t
+        data = self._read(f, info["offset"], info["count"], npe + 1, tag_dtype).astype(np.int64, copy=False)
+        return ElementBlock(info["dim"], info["tag"], info["type"], data[:, 0], data[:, 1:])
+
+    def entity_tags(self, group, dim=None):
+        """Сущности (dim, tag), входящие в физическую группу (по имени или номеру)"""
+        if isinstance(group, str):
+            matches = [key for key, name in self.physical_names.items()
+                       if name == group and (dim is None or key[0] == dim)]
+            if not matches:
+                raise KeyError(f"Физическая группа {group!r} не найдена")
+            dim, group = matches[0]
+        return {key for key, e in self.entities.items()
+                if (dim is None or key[0] == dim) and group in e.physical_tags}
+
+    def read_entities(self, keys):
+        """Чтение только блоков элементов указанных сущностей и узлов, на которые они ссылаются"""
+        keys = set(keys)
+        with open(self.path, "rb") as f:
+            blocks = [self._read_element_block(f, info) for info in self.elements
+                      if (info["dim"], info["tag"]) in keys]
+            if blocks:
+                needed = np.unique(np.concatenate([b.node_tags.ravel() for b in blocks]))
+            else:
+                needed = np.empty(0, dtype=np.int64)
+            node_tags, nodes, node_blocks = [], [], []
+            for info in self.nodes:
+                lo, hi = info["tags"]
+                # Блок узлов читается, только если диапазон его тегов пересекается с нужными
+                if not len(needed) or needed[-1] < lo or needed[0] > hi:
+                    continue
+                first = np.searchsorted(needed, lo)
+                if first == len(needed) or needed[first] > hi:
+                    continue
+                tags, coords = self._read_node_block(f, info)
+                keep = np.isin(tags, needed)
+                node_tags.append(tags[keep])
+                nodes.append(coords[keep])
+                node_blocks.append((info["dim"], info["tag"], int(keep.sum())))
+        node_tags = np.concatenate(node_tags) if node_tags else np.empty(0, dtype=np.int64)
+        nodes = np.concatenate(nodes) if nodes else np.empty((0, 3))
+        entities = {k: e for k, e in self.entities.items() if k in keys}
+        return MshMesh(node_tags, nodes, blocks, entities, self.physical_names, node_blocks)
+
+    def read_physical_group(self, group, dim=None):
+        """Элементы и узлы одной физической группы, например Obstacle или Walls"""
+        return self.read_entities(self.entity_tags(group, dim))
+
+
+def read_physical_group(path, group, dim=None):
+    """Чтение физической группы через индекс (он строится при первом обращении)"""
+    return load_index(path).read_physical_group(group, dim)
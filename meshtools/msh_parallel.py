@@ -0,0 +1,162 @@
+"""Параллельный разбор текстовых файлов MSH 4.1 по блокам узлов и элементов"""
+
+import mmap
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+from .msh import ELEMENT_NODES, ElementBlock, MshFormatError, MshMesh, _iter_lines, read_msh
+from .msh_index import load_index
+from .transport import _ALIGN, SharedArrays, _shm_dir, unpack_arrays
+
+# Размер порции файла, которую разбирает один процесс; крупные блоки делятся на несколько порций
+PIECE_BYTES = 32 << 20
+
+
+class _Piece:
+    """Диапазон строк файла и массивы, в которые записываются его столбцы"""
+
+    def __init__(self, start, end, rows, cols, dtype, outputs):
+        self.start = start
+        self.end = end
+        self.rows = rows  # None, пока строки не подсчитаны
+        self.row = 0
+        self.cols = cols
+        self.dtype = dtype
+        self.outputs = outputs  # [(номер массива, столбцы)]
+
+
+def _split(mm, start, end, rows, piece_bytes):
+    """Деление диапазона байтов на порции по границам строк"""
+    if end - start <= piece_bytes:
+        return [(start, end, rows)]
+    bounds = [start]
+    for pos in range(start + piece_bytes, end, piece_bytes):
+        pos = mm.find(b"\n", max(pos, bounds[-1]), end) + 1
+        if 0 < pos < end and pos > bounds[-1]:
+            bounds.append(pos)
+    bounds.append(end)
+    return [(a, b, None) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def _count_lines(path, start, end):
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[start:end].count(b"\n")
+
+
+def _count(args):
+    return _count_lines(*args)
+
+
+def _parse_piece(args):
+    path, shm_path, specs, piece = args
+    outputs = []
+    for index, columns in piece.outputs:
+        dtype, shape, offset = specs[index]
+        out = np.memmap(shm_path, dtype=dtype, mode="r+", offset=offset, shape=shape)
+        outputs.append((out, columns))
+    row = piece.row
+    with open(path, "rb") as f:
+        f.seek(piece.start)
+        for values in _iter_lines(f, piece.rows, piece.cols, piece.dtype):
+            for out, columns in outputs:
+                out[row:row + len(values)] = values[:, columns]
+            row += len(values)
+    for out, _ in outputs:
+        out.flush()
+
+
+class _Layout:
+    """Размещение выходных массивов в общем файле"""
+
+    def __init__(self):
+        self.specs = []
+        self.size = 0
+
+    def add(self, dtype, shape):
+        dtype = np.dtype(dtype)
+        self.specs.append((dtype.str, shape, self.size))
+        self.size += int(np.prod(shape)) * dtype.itemsize
+        self.size += -self.size % _ALIGN
+        return len(self.specs) - 1
+
+
+def _plan(index, mm, piece_bytes):
+    """Порции файла и размещение узлов и блоков элементов в выходных массивах"""
+    layout = _Layout()
+    num_nodes = sum(info["count"] for info in index.nodes)
+    node_tags = layout.add(np.int64, (num_nodes,))
+    nodes = layout.add(np.float64, (num_nodes, 3))
+    sections = []  # [(первая строка, число строк, [порции])]
+    row = 0
+    for info in index.nodes:
+        count, cols = info["count"], info["cols"]
+        tags = [_Piece(a, b, n, 1, np.int64, [(node_tags, 0)])
+                for a, b, n in _split(mm, info["offset"], info["coords_offset"], count, piece_bytes)]
+        coords = [_Piece(a, b, n, cols, np.float64, [(nodes, slice(0, 3))])
+                  for a, b, n in _split(mm, info["coords_offset"], info["end"], count, piece_bytes)]
+        sections += [(row, count, tags), (row, count, coords)]
+        row += count
+    blocks = []
+    for info in index.elements:
+        count, npe = info["count"], ELEMENT_NODES[info["type"]]
+        tags = layout.add(np.int64, (count,))
+        connectivity = layout.add(np.int64, (count, npe))
+        pieces = [_Piece(a, b, n, npe + 1, np.int64, [(tags, 0), (connectivity, slice(1, None))])
+                  for a, b, n in _split(mm, info["offset"], info["end"], count, piece_bytes)]
+        sections.append((0, count, pieces))
+        blocks.append((info, tags, connectivity))
+    return layout, sections, blocks
+
+
+def read_msh_parallel(path, processes=None, piece_bytes=PIECE_BYTES):
+    """Чтение файла MSH 4.1 несколькими процессами; результат совпадает с read_msh
+
+    Смещения блоков берутся из индекса (meshtools.msh_index). Блоки делятся на порции
+    по границам строк, процессы сначала считают строки в порциях, затем разбирают их
+    и пишут значения прямо в общий выходной массив. Двоичные файлы и так читаются
+    без разбора через отображение в память, для них вызывается read_msh.
+    """
+    index = load_index(path)
+    if index.format != "ascii":
+        return read_msh(path)
+    processes = processes or os.cpu_count() or 1
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            layout, sections, blocks = _plan(index, mm, piece_bytes)
+
+    pieces = [p for _, _, section in sections for p in section]
+    fd, shm_path = tempfile.mkstemp(prefix="mesh_", suffix=".bin", dir=_shm_dir())
+    try:
+        os.ftruncate(fd, layout.size)
+        os.close(fd)
+        pool = multiprocessing.Pool(processes) if processes > 1 else None
+        try:
+            run = pool.map if pool is not None else lambda func, jobs: list(map(func, jobs))
+            # Первый проход: число строк в порциях, для которых оно не известно из заголовка блока
+            unknown = [p for p in pieces if p.rows is None]
+            for p, rows in zip(unknown, run(_count, [(path, p.start, p.end) for p in unknown])):
+                p.rows = rows
+            for row, count, section in sections:
+                for p in section:
+                    p.row = row
+                    row += p.rows
+                if sum(p.rows for p in section) != count:
+                    raise MshFormatError(f"Число строк блока в {path} не совпадает с заголовком")
+            # Второй проход: разбор порций в общий массив
+            run(_parse_piece, [(path, shm_path, layout.specs, p) for p in pieces if p.rows])
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    except BaseException:
+        os.remove(shm_path)
+        raise
+    arrays = unpack_arrays(SharedArrays(shm_path, layout.specs, False))
+    element_blocks = [ElementBlock(info["dim"], info["tag"], info["type"], arrays[tags], arrays[connectivity])
+                      for info, tags, connectivity in blocks]
+    node_blocks = [(info["dim"], info["tag"], info["count"]) for info in index.nodes]
+    return MshMesh(arrays[0], arrays[1], element_blocks, index.entities, index.physical_names, node_blocks)
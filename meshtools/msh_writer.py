@@ -0,0 +1,263 @@
+"""Запись сеток в формате MSH 4.1 (текстовом и двоичном) без gmsh"""
+
+import os
+import shutil
+
+import numpy as np
+
+from .msh import ELEMENT_NODES, Entity
+
+# Запись текстовых блоков порциями, чтобы форматирование не требовало памяти на весь блок
+CHUNK_ROWS = 1 << 16
+
+# Ширина полей текстовых заголовков, которые дописываются после записи всех блоков
+_INT_WIDTH = 20
+_FLOAT_WIDTH = 24
+
+
+class _Output:
+    """Запись чисел в текстовом или двоичном виде"""
+
+    def __init__(self, f, binary, size_t="<u8"):
+        self.f = f
+        self.binary = binary
+        self.size_t = size_t
+
+    def line(self, *values):
+        self.f.write((" ".join(str(v) for v in values) + "\n").encode())
+
+    def header(self, ints, sizes):
+        """Заголовок блока: числа int, затем size_t"""
+        if self.binary:
+            self.f.write(np.asarray(ints, dtype="<i4").tobytes())
+            self.f.write(np.asarray(sizes, dtype=self.size_t).tobytes())
+        else:
+            self.line(*ints, *sizes)
+
+    def fixed(self, values, dtype):
+        """Поля постоянной ширины, которые можно переписать на месте"""
+        if self.binary:
+            self.f.write(np.asarray(values, dtype=dtype).tobytes())
+        elif dtype == "<f8":
+            self.f.write(" ".join(f"{v:>{_FLOAT_WIDTH}.17g}" for v in values).encode())
+        else:
+            self.f.write(" ".join(f"{v:>{_INT_WIDTH}d}" for v in values).encode())
+
+    def rows(self, array, fmt):
+        if self.binary:
+            dtype = self.size_t if array.dtype.kind in "iu" else "<f8"
+            self.f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            return
+        for start in range(0, len(array), CHUNK_ROWS):
+            np.savetxt(self.f, array[start:start + CHUNK_ROWS], fmt=fmt)
+
+
+class _TagRange:
+    """Число записанных объектов и диапазон их тегов"""
+
+    def __init__(self):
+        self.count = 0
+        self.lo = self.hi = None
+
+    def add(self, tags):
+        self.count += len(tags)
+        if len(tags):
+            lo, hi = int(tags.min()), int(tags.max())
+            self.lo = lo if self.lo is None else min(self.lo, lo)
+            self.hi = hi if self.hi is None else max(self.hi, hi)
+
+    def header(self, blocks):
+        return [blocks, self.count, self.lo or 0, self.hi or 0]
+
+
+class MshWriter:
+    """Потоковая запись файла MSH 4.1 по блокам, без хранения всей сетки в памяти
+
+    Сущности и физические группы объявляются до первого блока, затем блоки узлов
+    и элементов дописываются в любом порядке; крупную сущность можно записать
+    несколькими блоками. Узлы пишутся сразу в файл, элементы — во временный файл
+    рядом с ним, который присоединяется при закрытии. Числа блоков, диапазоны тегов
+    и ограничивающие параллелепипеды сущностей записываются на место заготовок в конце.
+
+        with MshWriter("mesh.msh") as w:
+            w.add_entity(2, 1, physical_tags=[1])
+            w.set_physical_name(2, 1, "Domain")
+            for tags, coords, element_tags, connectivity in parts:
+                w.add_nodes(2, 1, tags, coords)
+                w.add_elements(2, 1, 2, element_tags, connectivity)
+    """
+
+    def __init__(self, path, binary=True):
+        self.path = path
+        self.binary = binary
+        self.entities = {}
+        self.physical_names = {}
+        self._boxes = {}
+        self._box_offsets = {}
+        self._f = open(path, "wb")
+        self._out = _Output(self._f, binary)
+        self._spool_path = f"{path}.{os.getpid()}.elements"
+        self._spool = open(self._spool_path, "w+b")
+        self._spool_out = _Output(self._spool, binary)
+        self._nodes = _TagRange()
+        self._elements = _TagRange()
+        self._node_blocks = self._element_blocks = 0
+        self._nodes_header = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add_entity(self, dim, tag, physical_tags=(), bounding=()):
+        if self._nodes_header is not None:
+            raise ValueError("Сущности объявляются до первого блока узлов или элементов")
+        self.entities[(dim, tag)] = Entity(dim, tag, physical_tags, bounding)
+
+    def set_physical_name(self, dim, tag, name):
+        if self._nodes_header is not None:
+            raise ValueError("Физические группы объявляются до первого блока узлов или элементов")
+        self.physical_names[(dim, tag)] = name
+
+    def _start(self, dim, tag):
+        if (dim, tag) not in self.entities:
+            raise ValueError(f"Сущность ({dim}, {tag}) не объявлена через add_entity")
+        if self._nodes_header is None:
+            self._write_head()
+
+    def _write_head(self):
+        f, out = self._f, self._out
+        f.write(b"$MeshFormat\n")
+        out.line("4.1", 1 if self.binary else 0, 8)
+        if self.binary:
+            # Целое 1 позволяет читателю определить порядок байтов
+            f.write(np.int32(1).astype("<i4").tobytes() + b"\n")
+        f.write(b"$EndMeshFormat\n")
+
+        if self.physical_names:
+            f.write(b"$PhysicalNames\n")
+            out.line(len(self.physical_names))
+            for (dim, tag), name in sorted(self.physical_names.items()):
+                out.line(dim, tag, f'"{name}"')
+            f.write(b"$EndPhysicalNames\n")
+
+        f.write(b"$Entities\n")
+        entities = [self.entities[key] for key in sorted(self.entities)]
+        out.header([], [sum(e.dim == dim for e in entities) for dim in range(4)])
+        for e in entities:
+            f.write(np.int32(e.tag).astype("<i4").tobytes() if self.binary else f"{e.tag} ".encode())
+            # Параллелепипед известен только после записи узлов
+            self._box_offsets[(e.dim, e.tag)] = f.tell()
+            out.fixed([0.0] * (3 if e.dim == 0 else 6), "<f8")
+            if self.binary:
+                f.write(np.asarray([len(e.physical_tags)], dtype=out.size_t).tobytes())
+                f.write(np.asarray(e.physical_tags, dtype="<i4").tobytes())
+                if e.dim > 0:
+                    f.write(np.asarray([len(e.bounding)], dtype=out.size_t).tobytes())
+                    f.write(np.asarray(e.bounding, dtype="<i4").tobytes())
+            else:
+                values = [len(e.physical_tags), *e.physical_tags]
+                if e.dim > 0:
+                    values += [len(e.bounding), *e.bounding]
+                out.line("", *values)
+        f.write(b"\n$EndEntities\n" if self.binary else b"$EndEntities\n")
+
+        f.write(b"$Nodes\n")
+        self._nodes_header = f.tell()
+        out.fixed([0] * 4, out.size_t)
+        if not self.binary:
+            f.write(b"\n")
+
+    def add_nodes(self, dim, entity_tag, tags, coords):
+        """Блок узлов сущности: теги (n,) и координаты (n, 3)"""
+        self._start(dim, entity_tag)
+        tags = np.asarray(tags, dtype=np.int64).ravel()
+        coords = np.asarray(coords, dtype=np.float64).reshape(len(tags), 3)
+        self._out.header([dim, entity_tag, 0], [len(tags)])
+        self._out.rows(tags[:, None], "%d")
+        self._out.rows(coords, "%.17g")
+        self._nodes.add(tags)
+        self._node_blocks += 1
+        if len(coords):
+            self._extend_box((dim, entity_tag), coords.min(axis=0), coords.max(axis=0))
+
+    def add_elements(self, dim, entity_tag, element_type, tags, node_tags):
+        """Блок элементов сущности: теги (n,) и теги узлов (n, число узлов элемента)"""
+        self._start(dim, entity_tag)
+        tags = np.asarray(tags, dtype=np.int64).ravel()
+        data = np.empty((len(tags), ELEMENT_NODES[element_type] + 1), dtype=np.int64)
+        data[:, 0] = tags
+        data[:, 1:] = np.asarray(node_tags).reshape(len(tags), -1)
+        self._spool_out.header([dim, entity_tag, element_type], [len(tags)])
+        self._spool_out.rows(data, "%d")
+        self._elements.add(tags)
+        self._element_blocks += 1
+
+    def _extend_box(self, key, lo, hi):
+        if key in self._boxes:
+            lo, hi = np.minimum(lo, self._boxes[key][0]), np.maximum(hi, self._boxes[key][1])
+        self._boxes[key] = (lo, hi)
+
+    def close(self):
+        """Присоединение блоков элементов и запись итоговых чисел на место заготовок"""
+        if self._f.closed:
+            return
+        if self._nodes_header is None:
+            self._write_head()
+        f, out = self._f, self._out
+        f.write(b"\n$EndNodes\n" if self.binary else b"$EndNodes\n")
+        f.write(b"$Elements\n")
+        out.header([], self._elements.header(self._element_blocks))
+        self._spool.seek(0)
+        shutil.copyfileobj(self._spool, f, 1 << 20)
+        f.write(b"\n$EndElements\n" if self.binary else b"$EndElements\n")
+
+        f.seek(self._nodes_header)
+        out.fixed(self._nodes.header(self._node_blocks), out.size_t)
+        # Параллелепипед сущности включает узлы на ее границе
+        for key in sorted(self.entities):
+            for tag in self.entities[key].bounding:
+                inner = self._boxes.get((key[0] - 1, abs(tag)))
+                if inner is not None:
+                    self._extend_box(key, *inner)
+        for key, (lo, hi) in self._boxes.items():
+            f.seek(self._box_offsets[key])
+            out.fixed(list(lo) if key[0] == 0 else list(lo) + list(hi), "<f8")
+        f.close()
+        self._spool.close()
+        os.remove(self._spool_path)
+
+    def abort(self):
+        """Прерывание записи с удалением неполного файла"""
+        for f, path in ((self._f, self.path), (self._spool, self._spool_path)):
+            f.close()
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def save_msh(path, mesh, binary=True):
+    """Запись сетки (MshMesh) в файл MSH 4.1"""
+    node_blocks = mesh.node_blocks
+    if node_blocks is None:
+        # Неизвестно, каким сущностям принадлежат узлы: все узлы относятся к сущности наибольшей размерности
+        dim, tag = max(((b.dim, b.entity_tag) for b in mesh.element_blocks), default=(0, 1))
+        node_blocks = [(dim, tag, len(mesh.nodes))]
+    with MshWriter(path, binary) as w:
+        for (dim, tag), name in mesh.physical_names.items():
+            w.set_physical_name(dim, tag, name)
+        for e in mesh.entities.values():
+            w.add_entity(e.dim, e.tag, e.physical_tags, e.bounding)
+        # Сущности без раздела $Entities восстанавливаются по блокам
+        for dim, tag in [(b.dim, b.entity_tag) for b in mesh.element_blocks] + [b[:2] for b in node_blocks]:
+            if (dim, tag) not in w.entities:
+                w.add_entity(dim, tag)
+        pos = 0
+        for dim, tag, count in node_blocks:
+            w.add_nodes(dim, tag, mesh.node_tags[pos:pos + count], mesh.nodes[pos:pos + count])
+            pos += count
+        for b in mesh.element_blocks:
+            w.add_elements(b.dim, b.entity_tag, b.element_type, b.tags, b.node_tags)
@@ -0,0 +1,126 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import plotly.graph_objects as go
+from matplotlib.collections import LineCollection, PolyCollection
+
+from .quality import _HEX_EDGES, _TET_EDGES
+
+# Ребра объемных элементов по типу gmsh; у плоских элементов ребра идут по контуру
+_VOLUME_EDGES = {4: _TET_EDGES, 5: _HEX_EDGES}
+
+
+def element_edges(elements, element_type=None):
+    """Все ребра элементов в виде пар индексов узлов (без удаления повторов)"""
+    elements = np.asarray(elements)
+    table = _VOLUME_EDGES.get(element_type)
+    if table is not None:
+        return elements[:, table].reshape(-1, 2)
+    return np.stack([elements, np.roll(elements, -1, axis=1)], axis=-1).reshape(-1, 2)
+
+
+def unique_edges(elements, element_type=None):
+    """Ребра сетки без повторов: каждое общее ребро соседних элементов берется один раз"""
+    edges = np.sort(element_edges(elements, element_type), axis=1).astype(np.int64, copy=False)
+    if edges.size == 0:
+        return edges
+    # Пара (a, b) кодируется одним целым числом, что быстрее np.unique(axis=0)
+    n = edges.max() + 1
+    keys = np.unique(edges[:, 0] * n + edges[:, 1])
+    return np.stack([keys // n, keys % n], axis=1)
+
+
+def plot_mesh_2d(ax, nodes, elements, dedupe_edges=False, color="black", linewidth=1.0):
+    """Отрисовка 2D-сетки одной коллекцией вместо отдельной линии на каждый элемент"""
+    nodes = np.asarray(nodes)[:, :2]
+    if dedupe_edges:
+        collection = LineCollection(nodes[unique_edges(elements)], colors=color, linewidths=linewidth)
+    else:
+        collection = PolyCollection(nodes[np.asarray(elements)], closed=True, facecolors="none",
+                                    edgecolors=color, linewidths=linewidth)
+    ax.add_collection(collection)
+    return collection
+
+
+def wireframe_coordinates(nodes, elements, element_type=None):
+    """Координаты ребер сетки для одной трассы: a, b, NaN для каждого ребра (float32)"""
+    edges = unique_edges(elements, element_type)
+    points = np.full((len(edges), 3, 3), np.nan, dtype=np.float32)
+    points[:, :2] = np.asarray(nodes, dtype=np.float32)[edges]
+    points = points.reshape(-1, 3)
+    return points[:, 0], points[:, 1], points[:, 2]
+
+
+def wireframe_trace(nodes, elements, color="red", width=2, element_type=None):
+    """Каркас 3D-сетки одной трассой Scatter3d вместо трассы на каждый элемент
+
+    Для тетраэдров и шестигранников (element_type 4 и 5) берутся все их ребра, а не контур.
+    """
+    x, y, z = wireframe_coordinates(nodes, elements, element_type)
+    return go.Scatter3d(x=x, y=y, z=z, mode="lines", line=dict(color=color, width=width),
+                        hoverinfo="skip", showlegend=False)
+
+
+# Подписи показателей качества (meshtools.quality) на гистограммах
+QUALITY_LABELS = {
+    "min_angle": "Минимальный угол, °",
+    "max_angle": "Максимальный угол, °",
+    "aspect_ratio": "Вытянутость",
+    "gamma": "Gamma (r/R)",
+    "sicn": "SICN",
+    "scaled_jacobian": "Нормированный якобиан",
+}
+
+
+def plot_quality_histograms(quality, metrics=("min_angle", "aspect_ratio", "sicn"), bins=40):
+    """Гистограммы показателей качества элементов в одной строке графиков"""
+    fig, axes = plt.subplots(1, len(metrics), figsize=(4 * len(metrics), 3))
+    for ax, metric in zip(np.atleast_1d(axes), metrics):
+        values = np.asarray(quality[metric])
+        values = values[np.isfinite(values)]
+        # У структурированной сетки значения совпадают с точностью до округления: один столбец
+        flat = len(values) == 0 or np.ptp(values) <= 1e-9 * np.abs(values).max()
+        ax.hist(values, bins=1 if flat else bins, color="steelblue", edgecolor="white")
+        ax.set_xlabel(QUALITY_LABELS.get(metric, metric))
+        if len(values):
+            ax.set_title(f"мин. {values.min():.3g}, сред. {values.mean():.3g}", fontsize=9)
+    fig.tight_layout()
+    return fig
+
+
+def plot_quality_comparison(qualities, metrics=("min_angle", "sicn"), bins=40):
+    """Распределения показателей качества нескольких сеток ({название: показатели}) на общих осях"""
+    fig, axes = plt.subplots(1, len(metrics), figsize=(5 * len(metrics), 3.5))
+    for ax, metric in zip(np.atleast_1d(axes), metrics):
+        for name, quality in qualities.items():
+            values = np.asarray(quality[metric])
+            values = values[np.isfinite(values)]
+            if len(values):
+                # Доли вместо числа элементов: сетки разного размера сравнимы
+                ax.hist(values, bins=bins, histtype="step", linewidth=1.5, label=name,
+                        weights=np.full(len(values), 1 / len(values)))
+        ax.set_xlabel(QUALITY_LABELS.get(metric, metric))
+        ax.set_ylabel("Доля элементов")
+    np.atleast_1d(axes)[0].legend(fontsize=7)
+    fig.tight_layout()
+    return fig
+
+
+def plot_thread_scaling(report):
+    """Кривые масштабирования из отчета meshtools.bench_3d: тетраэдры в секунду и ускорение по потокам"""
+    fig, (rate_ax, speedup_ax) = plt.subplots(1, 2, figsize=(10, 3.5))
+    runs = [run for run in report["runs"] if run.get("elements_per_second")]
+    for algorithm in dict.fromkeys(run["algorithm"] for run in runs):
+        curve = [run for run in runs if run["algorithm"] == algorithm]
+        threads = [run["threads"] for run in curve]
+        rate_ax.plot(threads, [run["elements_per_second"] for run in curve], marker="o", label=algorithm)
+        speedup_ax.plot(threads, [run["speedup"] for run in curve], marker="o", label=algorithm)
+    if runs:
+        most = max(run["threads"] for run in runs)
+        speedup_ax.plot([1, most], [1, most], color="gray", linestyle="--", linewidth=1, label="Идеальное")
+    rate_ax.set_xlabel("Потоки")
+    rate_ax.set_ylabel("Тетраэдры в секунду")
+    speedup_ax.set_xlabel("Потоки")
+    speedup_ax.set_ylabel("Ускорение")
+    rate_ax.legend(fontsize=7)
+    fig.tight_layout()
+    return fig
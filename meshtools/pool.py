@@ -0,0 +1,274 @@
+import atexit
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from .limits import CrashWatch, JobLimits, JobUsage, crash_error, record_usage
+from .transport import discard, pack_arrays, unpack_arrays
+from . import warm
+
+
+class MeshWorkerError(RuntimeError):
+    """Рабочий процесс gmsh аварийно завершился во время задания"""
+
+
+def _forward_output(fd, conn, lock, current):
+    """Разбор вывода gmsh в рабочем процессе и отправка сообщений о ходе задания current[0]"""
+    from .jobs import GmshProgress
+
+    index, progress = None, None
+    with os.fdopen(fd, "r", errors="replace") as lines:
+        for line in lines:
+            if current[0] != index:
+                index, progress = current[0], GmshProgress()
+            update = progress.parse(line)
+            if update is None:
+                continue
+            try:
+                with lock:
+                    conn.send(("progress", index, *update))
+            except OSError:
+                # Канал закрыт, но вывод читается дальше, иначе gmsh остановится на записи в полный канал
+                pass
+
+
+def _worker_main(conn, max_jobs, stderr_path):
+    """Цикл рабочего процесса: gmsh инициализируется один раз на весь срок жизни"""
+    import gmsh
+
+    # stderr пишется в файл, по нему пул после падения процесса узнает о нехватке памяти
+    err_fd = os.open(stderr_path, os.O_WRONLY | os.O_APPEND)
+    os.dup2(err_fd, 2)
+    os.close(err_fd)
+    gmsh.initialize()
+    # Вывод gmsh направляется в канал, по нему определяется ход построения
+    read_fd, write_fd = os.pipe()
+    os.dup2(write_fd, 1)
+    os.close(write_fd)
+    gmsh.option.setNumber("General.Terminal", 1)
+    lock, current = threading.Lock(), [0]
+    threading.Thread(target=_forward_output, args=(read_fd, conn, lock, current), daemon=True).start()
+    try:
+        for _ in range(max_jobs):
+            try:
+                job = conn.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            func, args, kwargs, limits = job
+            current[0] += 1
+            usage = JobUsage(limits)
+            with lock:
+                conn.send(("started", current[0], usage.memory_limit))
+            try:
+                # Массивы передаются через общую память, по каналу уходит только описатель
+                payload, error = pack_arrays(func(*args, **kwargs)), None
+            except Exception as e:
+                payload, error = None, e
+            finally:
+                # Временные модели удаляются, у сохраненных (meshtools.warm) очищается сетка,
+                # чтобы следующее задание начиналось с чистого листа
+                warm.reset()
+            stats, error = usage.finish(error)
+            stats["warm_model"] = warm.take_hit()
+            # Пул выбирает процесс для задания по тому, какие модели в нем действительно остались
+            kept = warm.kept_keys()
+            reply = (True, payload) if error is None else (False, error)
+            with lock:
+                try:
+                    conn.send(("done", *reply, stats, kept))
+                except Exception as e:
+                    # Ошибка могла оказаться непиклируемой
+                    discard(reply[1])
+                    conn.send(("done", False, MeshWorkerError(repr(e)), stats, kept))
+    finally:
+        gmsh.finalize()
+        conn.close()
+
+
+class _Worker:
+    def __init__(self, max_jobs):
+        fd, self.stderr_path = tempfile.mkstemp(prefix="gmsh_worker_", suffix=".err")
+        os.close(fd)
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_main, args=(child_conn, max_jobs, self.stderr_path),
+                                               daemon=True)
+        try:
+            self.process.start()
+        except BaseException:
+            os.remove(self.stderr_path)
+            raise
+        child_conn.close()
+        self.jobs_left = max_jobs
+        self.index = 0  # номер текущего задания, как его считает рабочий процесс
+        # Ключи моделей, сохраненных в процессе (meshtools.warm), по его отчету о последнем задании
+        self.warm = []
+
+    def kill(self):
+        """Немедленное завершение процесса вместе с выполняемым заданием"""
+        self.process.kill()
+        self.process.join()
+
+    def stop(self, timeout=1.0):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        try:
+            os.remove(self.stderr_path)
+        except OSError:
+            pass
+
+
+class MeshWorkerPool:
+    """Пул прогретых процессов gmsh, переиспользуемых между заданиями
+
+    limits (meshtools.limits.JobLimits) — пределы памяти и времени на задание,
+    по умолчанию из переменных окружения.
+    """
+
+    def __init__(self, size=None, max_jobs=50, limits=None):
+        self.size = size or max(1, min(4, multiprocessing.cpu_count()))
+        self.max_jobs = max_jobs
+        self.limits = limits if limits is not None else JobLimits.from_env(self.size)
+        self._idle = []
+        self._started = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _acquire(self, job=None, affinity=None):
+        with self._cond:
+            while not self._idle and self._started >= self.size:
+                if self._closed:
+                    raise RuntimeError("Пул рабочих процессов закрыт")
+                # Задание, ожидающее свободный процесс, можно отменить
+                reason = job.stop_reason() if job is not None else None
+                if reason is not None:
+                    raise reason
+                self._cond.wait(0.1 if job is not None else None)
+            if self._closed:
+                raise RuntimeError("Пул рабочих процессов закрыт")
+            if affinity is not None:
+                # Процесс с готовой моделью для affinity берется первым, остальные — в прежнем порядке
+                self._idle.sort(key=lambda w: affinity in w.warm)
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                # Процесс умер во время простоя
+                self._started -= 1
+                worker.stop()
+            self._started += 1
+        try:
+            return _Worker(self.max_jobs)
+        except BaseException:
+            with self._cond:
+                self._started -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker, healthy):
+        with self._cond:
+            if healthy and worker.jobs_left > 0 and not self._closed:
+                self._idle.append(worker)
+                worker = None
+            else:
+                self._started -= 1
+            self._cond.notify()
+        if worker is not None:
+            # Исчерпавший лимит заданий или упавший процесс заменяется новым при следующем запросе
+            worker.stop()
+
+    def run(self, func, *args, **kwargs):
+        """Выполнение func(*args, **kwargs) в одном из рабочих процессов"""
+        return self.execute(func, args, kwargs)
+
+    def execute(self, func, args=(), kwargs=None, job=None, limits=None, affinity=None):
+        """Выполнение func(*args, **kwargs) с передачей хода построения в job (meshtools.jobs.MeshJob)
+
+        При отмене или превышении времени задания процесс gmsh завершается немедленно
+        и заменяется новым, а job.stop_reason() поднимается как исключение.
+        Превышение пределов limits (по умолчанию self.limits) поднимает MeshTooLarge;
+        использование ресурсов записывается в job.usage и журнал MESH_USAGE_LOG.
+        affinity — ключ модели meshtools.warm: задание по возможности получает процесс,
+        где эта модель уже построена.
+        """
+        limits = limits or self.limits
+        usage = dict(function=func.__name__, args=list(args), limits=repr(limits))
+        start = time.perf_counter()
+        worker = self._acquire(job, affinity)
+        healthy = False
+        try:
+            worker.index += 1
+            watch = CrashWatch(worker.process.pid, worker.stderr_path)
+            worker.conn.send((func, args, kwargs or {}, limits))
+            try:
+                while True:
+                    while not worker.conn.poll(0.1):
+                        # Замеры памяти нужны, чтобы отличить нехватку памяти от прочих падений
+                        watch.sample()
+                        reason = job.stop_reason() if job is not None else None
+                        if reason is not None:
+                            worker.kill()
+                            record_usage(dict(usage, status="stopped", error=str(reason),
+                                              seconds=time.perf_counter() - start))
+                            raise reason
+                    message = worker.conn.recv()
+                    if message[0] == "done":
+                        break
+                    if message[0] == "started":
+                        watch.memory_limit = message[2]
+                        continue
+                    # Сообщения о предыдущем задании могли прийти с опозданием
+                    if job is not None and message[1] == worker.index:
+                        job.report(*message[2:])
+            except (EOFError, OSError):
+                worker.process.join()
+                error = crash_error(worker.process.exitcode, limits, watch)
+                record_usage(dict(usage, status="too_large" if error else "crashed",
+                                  seconds=time.perf_counter() - start))
+                raise error or MeshWorkerError(f"Процесс gmsh завершился с кодом {worker.process.exitcode}")
+            _, ok, result, stats, worker.warm = message
+            usage.update(stats)
+            record_usage(usage)
+            if job is not None:
+                job.usage = usage
+            worker.jobs_left -= 1
+            healthy = True
+        finally:
+            self._release(worker, healthy)
+        if not ok:
+            raise result
+        return unpack_arrays(result)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Общий для всех сессий пул рабочих процессов"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = MeshWorkerPool()
+            atexit.register(_pool.close)
+        return _pool
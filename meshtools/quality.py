@@ -0,0 +1,262 @@
+"""Показатели качества элементов, вычисляемые векторно по массиву связности
+
+Для каждого элемента вычисляются:
+- min_angle, max_angle — углы в градусах (для тетраэдров — двугранные);
+- aspect_ratio — 1 у правильного элемента, растет с вытянутостью
+  (треугольники и тетраэдры: по радиусу вписанной окружности/сферы, четырехугольники
+  и шестигранники: отношение длин наибольшего и наименьшего ребра);
+- gamma — отношение радиусов вписанной и описанной окружности/сферы, нормированное
+  к 1 (определено только для симплексов, для остальных элементов NaN);
+- sicn — обратное число обусловленности якобиана относительно правильного элемента
+  со знаком ориентации (норма Фробениуса, минимум по углам);
+- scaled_jacobian — минимальный по углам определитель якобиана, деленный на длины
+  ребер угла и нормированный к 1.
+Элементы высокого порядка оцениваются по угловым узлам.
+
+Все показатели выражаются через длины ребер из углов и их скалярные произведения
+(матрицу Грама), а углы — через косинусы, поэтому arccos берется только от крайних значений.
+Шестигранники считаются в float32: углы у них точны примерно до 0.02°.
+"""
+
+import functools
+
+import numpy as np
+
+# Угловые узлы: тип элемента gmsh -> (линейный тип, число угловых узлов)
+LINEAR = {
+    2: (2, 3), 9: (2, 3), 20: (2, 3), 21: (2, 3),
+    3: (3, 4), 10: (3, 4), 16: (3, 4),
+    4: (4, 4), 11: (4, 4), 29: (4, 4), 30: (4, 4),
+    5: (5, 8), 12: (5, 8), 17: (5, 8), 92: (5, 8), 93: (5, 8),
+}
+
+METRICS = ("min_angle", "max_angle", "aspect_ratio", "gamma", "sicn", "scaled_jacobian")
+
+# Ребра правильного тетраэдра, выходящие из первой вершины (столбцы матрицы W)
+_TET_IDEAL_INV = np.linalg.inv(np.array([[1, 0.5, 0.5],
+                                         [0, np.sqrt(3) / 2, np.sqrt(3) / 6],
+                                         [0, 0, np.sqrt(2 / 3)]]))
+
+_TET_EDGES = np.array([[0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]])
+
+_HEX_CORNERS = np.array([[0, 1, 3, 4], [1, 2, 0, 5], [2, 3, 1, 6], [3, 0, 2, 7],
+                         [4, 7, 5, 0], [5, 4, 6, 1], [6, 5, 7, 2], [7, 6, 4, 3]])
+_HEX_EDGES = np.array([[0, 1], [1, 2], [2, 3], [3, 0], [4, 5], [5, 6], [6, 7], [7, 4],
+                       [0, 4], [1, 5], [2, 6], [3, 7]])
+
+
+# Элементы обрабатываются порциями по CHUNK угловых узлов, чтобы промежуточные массивы
+# оставались в кэше процессора
+CHUNK = 1 << 15
+
+
+def _dot(a, b):
+    """Скалярное произведение векторов, заданных компонентами по первой оси"""
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross(a, b):
+    return np.stack([a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]])
+
+
+def _points(nodes, elements, corners):
+    """Координаты угловых узлов в виде (3 компоненты, узел элемента, элемент)
+
+    Компоненты и узлы элемента идут по первым осям, поэтому все операции ниже —
+    поэлементные действия над длинными непрерывными массивами. Узлы выбираются
+    строками (take по оси 0 быстрее индексации массивом) и затем транспонируются.
+    """
+    return np.ascontiguousarray(nodes.take(elements[:, :corners], axis=0).transpose(2, 1, 0))
+
+
+def _angles(cosines):
+    """Наименьший и наибольший углы в градусах по косинусам углов (угол, элемент)"""
+    return (np.degrees(np.arccos(np.clip(cosines.max(axis=0), -1, 1))),
+            np.degrees(np.arccos(np.clip(cosines.min(axis=0), -1, 1))))
+
+
+def _corner_area(u, v, uu, vv, uv, planar):
+    """Удвоенная площадь треугольника на векторах u, v: со знаком для плоской сетки,
+    для поверхности в пространстве (ориентация не определена) — по модулю"""
+    if planar:
+        return u[0] * v[1] - u[1] * v[0]
+    return np.sqrt(np.maximum(uu * vv - uv ** 2, 0))
+
+
+def _triangles(p, planar):
+    u = p[:, [1, 2, 0]] - p  # ребро i — от вершины i к следующей
+    l2 = _dot(u, u)
+    # Так как u0 + u1 + u2 = 0, скалярные произведения соседних ребер выражаются через длины
+    uv = (l2[[1, 2, 0]] - l2 - l2[[2, 0, 1]]) / 2  # u_i · u_{i-1}
+    area2 = _corner_area(u[:, 0], -u[:, 2], l2[0], l2[2], -uv[0], planar)  # удвоенная площадь
+    lengths = np.sqrt(l2)
+    min_angle, max_angle = _angles(-uv / np.sqrt(l2 * l2[[2, 0, 1]]))
+    perimeter = lengths.sum(axis=0)
+    product = lengths.prod(axis=0)
+    shortest, longest = lengths.min(axis=0), lengths.max(axis=0)
+    return dict(
+        min_angle=min_angle,
+        max_angle=max_angle,
+        aspect_ratio=longest * perimeter / (2 * np.sqrt(3) * np.abs(area2)),
+        # 2r/R = 4 (2A)^2 / (P * l1 * l2 * l3)
+        gamma=4 * area2 ** 2 / (perimeter * product) * np.sign(area2),
+        sicn=2 * np.sqrt(3) * area2 / l2.sum(axis=0),
+        # Произведение ребер угла — l1 l2 l3 / (противолежащее ребро); минимум — в угле с наибольшим
+        # произведением при положительной площади и с наименьшим при отрицательной
+        scaled_jacobian=area2 * np.where(area2 >= 0, shortest, longest) / (product * np.sin(np.pi / 3)),
+    )
+
+
+def _quads(p, planar):
+    u = p[:, [1, 2, 3, 0]] - p  # ребро i — от вершины i к следующей
+    w = -u[:, [3, 0, 1, 2]]  # в вершине i — ребро к предыдущей вершине
+    l2 = _dot(u, u)
+    w2 = l2[[3, 0, 1, 2]]
+    uw = _dot(u, w)
+    det = _corner_area(u, w, l2, w2, uw, planar)
+    min_angle, max_angle = _angles(uw / np.sqrt(l2 * w2))
+    return dict(
+        min_angle=min_angle,
+        max_angle=max_angle,
+        aspect_ratio=np.sqrt(l2.max(axis=0) / l2.min(axis=0)),
+        gamma=np.full(p.shape[2], np.nan),
+        sicn=(2 * det / (l2 + w2)).min(axis=0),
+        scaled_jacobian=(det / np.sqrt(l2 * w2)).min(axis=0),
+    )
+
+
+def _gram(a, b, c):
+    """Попарные скалярные произведения векторов a, b, c: aa, bb, cc, ab, bc, ca"""
+    return _dot(a, a), _dot(b, b), _dot(c, c), _dot(a, b), _dot(b, c), _dot(c, a)
+
+
+def _second_invariant(aa, bb, cc, ab, bc, ca):
+    """Квадрат нормы Фробениуса присоединенной матрицы [a b c] по ее матрице Грама:
+    |b×c|² + |c×a|² + |a×b|² = aa·bb + bb·cc + cc·aa − ab² − bc² − ca²"""
+    return aa * bb + bb * cc + cc * aa - ab ** 2 - bc ** 2 - ca ** 2
+
+
+# Матрица Грама столбцов T = J W^-1 через матрицу Грама G ребер из первой вершины: W^-T G W^-1.
+# Элементы (00, 11, 22, 01, 12, 20) — линейные комбинации элементов G в том же порядке
+_GRAM_INDEX = [(0, 0), (1, 1), (2, 2), (0, 1), (1, 2), (2, 0)]
+_IDEAL_GRAM = np.array([[_TET_IDEAL_INV[i, k] * _TET_IDEAL_INV[j, l] + (_TET_IDEAL_INV[j, k] * _TET_IDEAL_INV[i, l]
+                                                                        if i != j else 0)
+                         for i, j in _GRAM_INDEX] for k, l in _GRAM_INDEX])
+
+
+def _tetrahedra(p):
+    a, b, c = p[:, 1] - p[:, 0], p[:, 2] - p[:, 0], p[:, 3] - p[:, 0]
+    gram = _gram(a, b, c)
+    aa, bb, cc, ab, bc, ca = gram
+    # Квадраты длин ребер 01, 02, 03, 12, 13, 23
+    edges = np.stack([aa, bb, cc, aa + bb - 2 * ab, aa + cc - 2 * ca, bb + cc - 2 * bc])
+    # Внешние нормали граней (как connectivity.TET_FACES): −b×c, −c×a, −a×b и их сумма с обратным знаком
+    crosses = _cross(b, c), _cross(c, a), _cross(a, b)
+    volume6 = _dot(a, crosses[0])
+    g11, g22, g33, g12, g23, g31 = _gram(*crosses)
+    areas = np.sqrt(np.stack([g11 + g22 + g33 + 2 * (g12 + g23 + g31), g11, g22, g33]))
+    # Скалярные произведения нормалей граней 01, 02, 03, 12, 13, 23
+    normal_dots = np.stack([-(g11 + g12 + g31), -(g12 + g22 + g23), -(g31 + g23 + g33), g12, g31, g23])
+    # Двугранный угол — дополнение угла между внешними нормалями граней
+    min_angle, max_angle = _angles(-normal_dots / (areas[[0, 0, 0, 1, 1, 2]] * areas[[1, 2, 3, 2, 3, 3]]))
+    inradius = np.abs(volume6) / areas.sum(axis=0)
+    # Центр описанной сферы: (aa·b×c + bb·c×a + cc·a×b) / (2·6V), его длина — через g11..g31
+    center2 = (aa ** 2 * g11 + bb ** 2 * g22 + cc ** 2 * g33
+               + 2 * (aa * bb * g12 + bb * cc * g23 + cc * aa * g31)) / (2 * volume6) ** 2
+    # Якобиан относительно правильного тетраэдра T = J W^-1: след и второй инвариант матрицы Грама
+    ideal = np.tensordot(_IDEAL_GRAM, np.stack(gram), axes=1)
+    trace = ideal[:3].sum(axis=0)
+    ideal_invariant = _second_invariant(*ideal)
+    # Определитель якобиана во всех углах равен 6V, произведения длин ребер угла различаются
+    corners = np.stack([edges[0] * edges[1] * edges[2], edges[0] * edges[3] * edges[4],
+                        edges[1] * edges[3] * edges[5], edges[2] * edges[4] * edges[5]])
+    corner = np.where(volume6 >= 0, corners.max(axis=0), corners.min(axis=0))
+    return dict(
+        min_angle=min_angle,
+        max_angle=max_angle,
+        aspect_ratio=np.sqrt(edges.max(axis=0)) / (2 * np.sqrt(6) * inradius),
+        gamma=3 * inradius / np.sqrt(center2) * np.sign(volume6),
+        sicn=3 * volume6 * np.linalg.det(_TET_IDEAL_INV) / np.sqrt(trace * ideal_invariant),
+        scaled_jacobian=np.sqrt(2) * volume6 / np.sqrt(corner),
+    )
+
+
+def _hexahedra(p):
+    # Показатели считаются в float32: у шестигранника по 24 ребра из углов, и вдвое меньший объем
+    # данных заметно ускоряет расчет. Координаты отсчитываются от первого узла элемента в float64,
+    # иначе у малых элементов далеко от начала координат float32 не хватило бы точности
+    p = (p - p[:, :1]).astype(np.float32)
+    # Первый узел угла k — сам узел k, поэтому копируются только три соседних
+    a, b, c = (p[:, _HEX_CORNERS[:, k]] - p for k in (1, 2, 3))
+    aa, bb, cc, ab, bc, ca = _gram(a, b, c)
+    det = _dot(_cross(a, b), c)
+    la, lb, lc = np.sqrt(aa), np.sqrt(bb), np.sqrt(cc)
+    # Каждое ребро шестигранника выходит из двух углов, поэтому длины берутся из aa, bb, cc
+    lengths = np.concatenate([la, lb, lc])
+    min_angle, max_angle = _angles(np.concatenate([ab / (la * lb), bc / (lb * lc), ca / (lc * la)]))
+    return dict(
+        min_angle=min_angle,
+        max_angle=max_angle,
+        aspect_ratio=lengths.max(axis=0) / lengths.min(axis=0),
+        gamma=np.full(p.shape[2], np.nan),
+        sicn=(3 * det / np.sqrt((aa + bb + cc) * _second_invariant(aa, bb, cc, ab, bc, ca))).min(axis=0),
+        scaled_jacobian=(det / (la * lb * lc)).min(axis=0),
+    )
+
+
+_KERNELS = {2: _triangles, 3: _quads, 4: _tetrahedra, 5: _hexahedra}
+
+
+def element_quality(nodes, elements, element_type):
+    """Показатели качества всех элементов: {имя показателя: массив длины числа элементов}
+
+    element_type — тип элемента gmsh (2 — треугольник, 3 — четырехугольник,
+    4 — тетраэдр, 5 — шестигранник, а также их варианты высокого порядка).
+    Ориентация треугольников и четырехугольников учитывается, если все узлы лежат в плоскости z = const.
+    """
+    if element_type not in LINEAR:
+        raise ValueError(f"Показатели качества для элементов типа {element_type} не определены")
+    linear, corners = LINEAR[element_type]
+    nodes = np.asarray(nodes, dtype=np.float64)
+    if nodes.shape[1] == 2:
+        nodes = np.column_stack([nodes, np.zeros(len(nodes))])
+    nodes = np.ascontiguousarray(nodes)
+    kernel = _KERNELS[linear]
+    if linear in (2, 3):
+        kernel = functools.partial(kernel, planar=not len(nodes) or np.ptp(nodes[:, 2]) == 0)
+    elements = np.asarray(elements)
+    quality = {metric: np.empty(len(elements)) for metric in METRICS}
+    step = CHUNK // corners
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, len(elements), step):
+            part = kernel(_points(nodes, elements[start:start + step], corners))
+            for metric, values in part.items():
+                quality[metric][start:start + step] = values
+    return quality
+
+
+def worst_elements(quality, metric="sicn", count=None, fraction=0.05):
+    """Индексы худших элементов по показателю (для углов и вытянутости — по отклонению от идеала)"""
+    values = np.asarray(quality[metric], dtype=np.float64)
+    if metric in ("max_angle", "aspect_ratio"):
+        values = -values
+    values = np.where(np.isnan(values), np.inf, values)
+    count = count if count is not None else max(1, int(np.ceil(fraction * len(values))))
+    count = min(count, len(values))
+    worst = np.argpartition(values, count - 1)[:count] if count else np.empty(0, dtype=np.int64)
+    return worst[np.argsort(values[worst], kind="stable")]
+
+
+def quality_summary(quality, percentiles=(5, 50)):
+    """Сводка по показателям: {показатель: {"min", "mean", "max", "p5", "p50"}} без NaN"""
+    summary = {}
+    for metric, values in quality.items():
+        values = np.asarray(values)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            continue
+        row = {"min": float(values.min()), "mean": float(values.mean()), "max": float(values.max())}
+        for q, v in zip(percentiles, np.percentile(values, percentiles)):
+            row[f"p{q}"] = float(v)
+        summary[metric] = row
+    return summary
@@ -0,0 +1,138 @@
+"""Структурированные (трансфинитные) сетки прямоугольника и параллелепипеда без gmsh.
+
+Узлы нумеруются так же, как в gmsh: сначала угловые точки, затем внутренние узлы
+линий в направлении линии, затем внутренние узлы поверхностей в порядке
+трансфинитного алгоритма (индекс вдоль первой стороны контура — внешний цикл).
+Треугольники "Left" строятся в том же порядке, что и в gmsh.
+"""
+
+import numpy as np
+
+STRUCTURED = "Структурированная"
+TRIANGLES = "Треугольные"
+QUADS = "Четырехугольные"
+
+
+def _segment(a, b, n):
+    """Внутренние узлы отрезка ab, разбитого на n равных частей"""
+    t = (np.arange(1, n) / n)[:, None]
+    return a * (1 - t) + b * t
+
+
+class _Builder:
+    """Сборка узлов по сущностям в порядке gmsh: точки, линии, поверхности"""
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=float)
+        self.blocks = [self.points]
+        self.count = len(self.points)
+        self.curves = []
+
+    def _append(self, coords):
+        start = self.count
+        self.blocks.append(coords)
+        self.count += len(coords)
+        return np.arange(start, self.count)
+
+    def add_curve(self, p, q, n):
+        """Линия из точки p в точку q с n отрезками; возвращает ее номер с единицы"""
+        inner = self._append(_segment(self.points[p], self.points[q], n))
+        self.curves.append(np.concatenate([[p], inner, [q]]))
+        return len(self.curves)
+
+    def _side(self, signed_curve):
+        nodes = self.curves[abs(signed_curve) - 1]
+        return nodes if signed_curve > 0 else nodes[::-1]
+
+    def add_surface(self, loop):
+        """Трансфинитная поверхность по контуру из четырех линий; возвращает таблицу узлов tab[i, j]"""
+        sides = [self._side(c) for c in loop]
+        L, H = len(sides[0]) - 1, len(sides[1]) - 1
+        tab = np.empty((L + 1, H + 1), dtype=np.int64)
+        tab[:, 0] = sides[0]
+        tab[L, :] = sides[1]
+        tab[::-1, H] = sides[2]
+        tab[0, ::-1] = sides[3]
+
+        # Углы поверхности всегда совпадают с точками модели
+        c0, c1, c2, c3 = self.points[[tab[0, 0], tab[L, 0], tab[L, H], tab[0, H]]]
+        u = (np.arange(1, L) / L)[:, None, None]
+        v = (np.arange(1, H) / H)[None, :, None]
+        inner = (1 - u) * (1 - v) * c0 + u * (1 - v) * c1 + u * v * c2 + (1 - u) * v * c3
+        tab[1:L, 1:H] = self._append(inner.reshape(-1, 3)).reshape(L - 1, H - 1)
+        return tab
+
+    def nodes(self):
+        return np.concatenate(self.blocks)
+
+
+def _cells(tab):
+    # Вершины ячейки (i, j): v1 = (i, j), v2 = (i + 1, j), v3 = (i + 1, j + 1), v4 = (i, j + 1)
+    v1 = tab[:-1, :-1].ravel()
+    v2 = tab[1:, :-1].ravel()
+    v3 = tab[1:, 1:].ravel()
+    v4 = tab[:-1, 1:].ravel()
+    return v1, v2, v3, v4
+
+
+def surface_elements(tab, element_type):
+    """Треугольники "Left" или четырехугольники по таблице узлов поверхности"""
+    v1, v2, v3, v4 = _cells(tab)
+    if element_type == QUADS:
+        return np.stack([v1, v2, v3, v4], axis=1)
+    return np.stack([v1, v2, v4, v4, v2, v3], axis=1).reshape(-1, 3)
+
+
+def structured_rectangle(element_type, width, height, nx, ny):
+    """Структурированная сетка прямоугольника [0, width] x [0, height]"""
+    b = _Builder([(0, 0, 0), (width, 0, 0), (width, height, 0), (0, height, 0)])
+    l1 = b.add_curve(0, 1, nx)
+    l2 = b.add_curve(1, 2, ny)
+    l3 = b.add_curve(2, 3, nx)
+    l4 = b.add_curve(3, 0, ny)
+    tab = b.add_surface([l1, l2, l3, l4])
+    return b.nodes()[:, :2], surface_elements(tab, element_type)
+
+
+def _box_surfaces(width, height, length, nx, ny, nz):
+    b = _Builder([
+        (0, 0, 0), (width, 0, 0), (width, height, 0), (0, height, 0),
+        (0, 0, length), (width, 0, length), (width, height, length), (0, height, length),
+    ])
+    # Те же линии и контуры, что и в generate_box_mesh
+    edges = [(0, 1, nx), (1, 2, ny), (2, 3, nx), (3, 0, ny),
+             (4, 5, nx), (5, 6, ny), (6, 7, nx), (7, 4, ny),
+             (0, 4, nz), (1, 5, nz), (2, 6, nz), (3, 7, nz)]
+    lines = [b.add_curve(p, q, n) for p, q, n in edges]
+    loops = [
+        [lines[0], lines[1], lines[2], lines[3]],
+        [lines[4], lines[5], lines[6], lines[7]],
+        [lines[0], lines[9], -lines[4], -lines[8]],
+        [lines[1], lines[10], -lines[5], -lines[9]],
+        [lines[2], lines[11], -lines[6], -lines[10]],
+        [lines[3], lines[8], -lines[7], -lines[11]],
+    ]
+    tabs = [b.add_surface(loop) for loop in loops]
+    return b, tabs
+
+
+def structured_box_surface(element_type, width, height, length, nx, ny, nz):
+    """Структурированная поверхностная сетка граней параллелепипеда"""
+    b, tabs = _box_surfaces(width, height, length, nx, ny, nz)
+    elements = np.concatenate([surface_elements(tab, element_type) for tab in tabs])
+    return b.nodes(), elements
+
+
+def rectangle_fast_path(mesh_type, element_type, width, height, nx, ny):
+    """Сетка без gmsh, если геометрия это позволяет, иначе None"""
+    if mesh_type != STRUCTURED or element_type not in (TRIANGLES, QUADS):
+        return None
+    return structured_rectangle(element_type, width, height, nx, ny)
+
+
+def box_fast_path(mesh_type, element_type, width, height, length, nx, ny, nz):
+    """Поверхностная сетка параллелепипеда без gmsh, если геометрия это позволяет, иначе None"""
+    if mesh_type != STRUCTURED or element_type not in (TRIANGLES, QUADS):
+        return None
+    return structured_box_surface(element_type, width, height, length, nx, ny, nz)
+
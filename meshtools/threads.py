@@ -0,0 +1,134 @@
+"""Многопоточное построение сеток: параметры потоков gmsh и общий бюджет потоков"""
+
+import os
+import threading
+
+import numpy as np
+
+# Алгоритмы gmsh (Mesh.Algorithm3D) для тетраэдральных сеток
+ALGORITHMS_3D = {
+    "Delaunay": 1,
+    "Frontal": 4,
+    "MMG3D": 7,
+    "HXT": 10,
+}
+
+
+class MeshingOptions:
+    """Потоки и алгоритм 3D-сетки для одного построения
+
+    threads — General.NumThreads; max_threads_1d/2d/3d — Mesh.MaxNumThreads1D/2D/3D,
+    0 означает «как General.NumThreads». Параметры задаются при каждом построении,
+    поэтому настройки предыдущего задания в рабочем процессе не сохраняются.
+    """
+
+    FIELDS = ("threads", "max_threads_1d", "max_threads_2d", "max_threads_3d", "algorithm_3d")
+
+    def __init__(self, threads=1, algorithm_3d="Delaunay", max_threads_1d=0, max_threads_2d=0, max_threads_3d=0):
+        if algorithm_3d not in ALGORITHMS_3D:
+            raise ValueError(f"Неизвестный алгоритм 3D-сетки: {algorithm_3d}")
+        self.threads = int(threads)
+        self.algorithm_3d = algorithm_3d
+        self.max_threads_1d = int(max_threads_1d)
+        self.max_threads_2d = int(max_threads_2d)
+        self.max_threads_3d = int(max_threads_3d)
+
+    def __repr__(self):
+        # Используется и в ключе кэша сеток
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"MeshingOptions({values})"
+
+    def __eq__(self, other):
+        return isinstance(other, MeshingOptions) and repr(self) == repr(other)
+
+    @property
+    def demand(self):
+        """Наибольшее число потоков, которое может занять построение"""
+        return max(1, self.threads, self.max_threads_1d, self.max_threads_2d, self.max_threads_3d)
+
+    def limited(self, threads):
+        """Те же параметры, но не больше threads потоков на любом этапе"""
+        return MeshingOptions(
+            min(self.threads, threads), self.algorithm_3d,
+            *(min(n, threads) for n in (self.max_threads_1d, self.max_threads_2d, self.max_threads_3d)),
+        )
+
+    def apply(self):
+        """Установка параметров в текущей сессии gmsh"""
+        import gmsh
+
+        gmsh.option.setNumber("General.NumThreads", self.threads)
+        gmsh.option.setNumber("Mesh.MaxNumThreads1D", self.max_threads_1d)
+        gmsh.option.setNumber("Mesh.MaxNumThreads2D", self.max_threads_2d)
+        gmsh.option.setNumber("Mesh.MaxNumThreads3D", self.max_threads_3d)
+        gmsh.option.setNumber("Mesh.Algorithm3D", ALGORITHMS_3D[self.algorithm_3d])
+
+    def to_array(self):
+        """Запись в массив int64 — в таком виде параметры возвращаются вместе с сеткой"""
+        return np.array([self.threads, self.max_threads_1d, self.max_threads_2d, self.max_threads_3d,
+                         ALGORITHMS_3D[self.algorithm_3d]], dtype=np.int64)
+
+    @classmethod
+    def from_array(cls, array):
+        threads, max_1d, max_2d, max_3d, algorithm = (int(v) for v in array)
+        names = {code: name for name, code in ALGORITHMS_3D.items()}
+        return cls(threads, names[algorithm], max_1d, max_2d, max_3d)
+
+    def describe(self):
+        """Описание для интерфейса"""
+        if self.threads == 0:
+            return "Сетка построена без gmsh"
+        limits = [f"{d}D: {n}" for d, n in zip((1, 2, 3), (self.max_threads_1d, self.max_threads_2d,
+                                                           self.max_threads_3d)) if n]
+        text = f"Потоков: {self.threads}, алгоритм 3D: {self.algorithm_3d}"
+        return text + (f", ограничения по этапам — {', '.join(limits)}" if limits else "")
+
+
+# Параметры сетки, построенной без gmsh (структурированные случаи в meshtools.structured)
+WITHOUT_GMSH = MeshingOptions(threads=0)
+
+
+class ThreadBudget:
+    """Общее на все сессии число потоков построения сеток
+
+    Задание получает не больше total потоков и ждет, пока столько освободится,
+    поэтому одновременные сессии в сумме не занимают больше ядер, чем выделено.
+    """
+
+    def __init__(self, total=None):
+        self.total = max(1, total or int(os.environ.get("MESH_THREAD_BUDGET", 0)) or os.cpu_count() or 1)
+        self.free = self.total
+        self._cond = threading.Condition()
+
+    def acquire(self, threads, job=None):
+        """Занятие потоков; возвращает выделенное число (не больше total)
+
+        Ожидание прерывается, если задание job (meshtools.jobs.MeshJob) отменено.
+        """
+        threads = max(1, min(threads, self.total))
+        with self._cond:
+            while self.free < threads:
+                reason = job.stop_reason() if job is not None else None
+                if reason is not None:
+                    raise reason
+                self._cond.wait(0.1 if job is not None else None)
+            self.free -= threads
+        return threads
+
+    def release(self, threads):
+        with self._cond:
+            self.free += threads
+            self._cond.notify_all()
+
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def get_thread_budget():
+    """Общий для всех сессий бюджет потоков (MESH_THREAD_BUDGET, по умолчанию число процессоров)"""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = ThreadBudget()
+        return _budget
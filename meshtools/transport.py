@@ -0,0 +1,79 @@
+import mmap
+import os
+import tempfile
+
+import numpy as np
+
+# Выравнивание начала каждого массива внутри общего блока
+_ALIGN = 64
+
+
+def _shm_dir():
+    # /dev/shm находится в оперативной памяти; в остальных системах используется временный каталог
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+class SharedArrays:
+    """Небольшой описатель массивов, записанных в общий отображаемый в память файл"""
+
+    def __init__(self, path, specs, single):
+        self.path = path
+        self.specs = specs  # [(dtype, shape, offset), ...]
+        self.single = single
+
+
+def pack_arrays(result):
+    """Запись массива или кортежа массивов в общий блок; прочие значения возвращаются как есть"""
+    if os.name == "nt":
+        # В Windows нельзя удалить файл, пока он отображен в память
+        return result
+    single = isinstance(result, np.ndarray)
+    arrays = (result,) if single else result
+    if not isinstance(arrays, tuple) or not arrays or not all(isinstance(a, np.ndarray) for a in arrays):
+        return result
+
+    fd, path = tempfile.mkstemp(prefix="mesh_", suffix=".bin", dir=_shm_dir())
+    specs = []
+    try:
+        with os.fdopen(fd, "wb") as f:
+            offset = 0
+            for a in arrays:
+                a = np.ascontiguousarray(a)
+                specs.append((a.dtype.str, a.shape, offset))
+                f.write(a.reshape(-1).view(np.uint8))
+                offset += a.nbytes
+                pad = -offset % _ALIGN
+                f.write(b"\0" * pad)
+                offset += pad
+    except BaseException:
+        os.remove(path)
+        raise
+    return SharedArrays(path, specs, single)
+
+
+def unpack_arrays(reply):
+    """Обертка общего блока в массивы NumPy без копирования"""
+    if not isinstance(reply, SharedArrays):
+        return reply
+    try:
+        with open(reply.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # Закрытая копия при записи: массивы доступны для изменения, а файл остается нетронутым
+            buf = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_COPY) if size else b""
+    finally:
+        # Отображение остается действительным после удаления файла
+        os.remove(reply.path)
+    arrays = tuple(
+        np.frombuffer(buf, dtype=np.dtype(dtype), count=int(np.prod(shape)), offset=offset).reshape(shape)
+        for dtype, shape, offset in reply.specs
+    )
+    return arrays[0] if reply.single else arrays
+
+
+def discard(reply):
+    """Удаление общего блока, который не будет прочитан"""
+    if isinstance(reply, SharedArrays):
+        try:
+            os.remove(reply.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,46 @@
+"""Общие элементы интерфейса Streamlit для страниц с построением сеток"""
+
+import time
+
+import streamlit as st
+
+from .estimate import element_budget
+
+
+# Фоновое построение сетки: страница не блокируется, а опрашивает задание при каждом перезапуске
+def poll_mesh_job(key):
+    """Завершенное задание из st.session_state[key] или None; пока задание идет, показывает его ход"""
+    job = st.session_state.get(key)
+    if job is None:
+        return None
+    if not job.done:
+        st.progress(job.progress, text=f"{job.message} ({job.elapsed:.0f} с)")
+        if st.button("Отменить", key=f"{key}_cancel"):
+            job.cancel()
+        time.sleep(0.5)
+        st.rerun()
+    if job.state in ("cancelled", "timeout"):
+        st.warning(str(job.error))
+        return None
+    if job.state == "too_large":
+        st.error(str(job.error))
+        changes = job.coarser()
+        if changes is not None:
+            text = ", ".join(f"{name} = {value}" for name, value in changes.items())
+            if st.button(f"Построить более грубую сетку ({text})", key=f"{key}_coarser"):
+                st.session_state[key] = job.retry(changes)
+                st.rerun()
+        return None
+    if job.state == "failed":
+        st.error(f"Ошибка построения сетки: {job.error}")
+        return None
+    return job
+
+
+def show_estimate(estimate):
+    """Оценка сетки до построения; предупреждение, если она превышает бюджет элементов"""
+    budget = element_budget()
+    if budget and estimate.elements > budget:
+        st.warning(f"По оценке сетка слишком большая: {estimate.describe()}; бюджет — {budget:_} элементов".replace("_", " "))
+    else:
+        st.caption(f"Оценка до построения: {estimate.describe()}")
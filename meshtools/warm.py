@@ -0,0 +1,79 @@
+"""Модели gmsh, сохраняемые в рабочем процессе между заданиями
+
+Геометрия строится и синхронизируется один раз на ключ — генератор и параметры, от которых
+зависит топология и ограничения сетки. Задание, в котором изменились только числа разбиений,
+берет готовую модель: сетка очищается, заново задаются setTransfiniteCurve и строится сетка.
+В процессе хранятся последние MAX_MODELS моделей; после задания у них очищается только сетка,
+а остальные модели удаляются (reset). Если очистка не удалась, сохраненные модели отбрасываются.
+"""
+
+import collections
+import itertools
+
+MAX_MODELS = 8
+
+# Ключ -> (имя модели gmsh, результат построителя геометрии), в порядке использования
+_models = collections.OrderedDict()
+_names = itertools.count(1)
+_last_hit = None
+
+
+def warm_model(key, build):
+    """Сделать текущей модель для key; при первом обращении она строится вызовом build()
+
+    Возвращает результат build() (например, теги линий и поверхностей), сохраненный при построении.
+    """
+    import gmsh
+
+    global _last_hit
+    entry = _models.get(key)
+    _last_hit = entry is not None
+    if entry is not None:
+        _models.move_to_end(key)
+        name, tags = entry
+        gmsh.model.setCurrent(name)
+        gmsh.model.mesh.clear()
+        return tags
+    name = f"{key[0]}_{next(_names)}"
+    gmsh.model.add(name)
+    tags = build()
+    _models[key] = (name, tags)
+    while len(_models) > MAX_MODELS:
+        _, (old, _) = _models.popitem(last=False)
+        gmsh.model.setCurrent(old)
+        gmsh.model.remove()
+    gmsh.model.setCurrent(name)
+    return tags
+
+
+def take_hit():
+    """Взята ли в последнем задании готовая модель (True/False; None — warm_model не вызывался)"""
+    global _last_hit
+    hit, _last_hit = _last_hit, None
+    return hit
+
+
+def kept_keys():
+    """Ключи сохраненных моделей от давних к недавним"""
+    return list(_models)
+
+
+def reset():
+    """Очистка после задания: сохраненные модели теряют только сетку, остальные удаляются"""
+    import gmsh
+
+    keep = {name for name, _ in _models.values()}
+    try:
+        for name in gmsh.model.list():
+            gmsh.model.setCurrent(name)
+            if name in keep:
+                gmsh.model.mesh.clear()
+            else:
+                gmsh.model.remove()
+    except Exception:
+        # Состояние моделей неизвестно: все они удаляются, геометрия построится заново
+        _models.clear()
+        try:
+            gmsh.clear()
+        except Exception:
+            pass
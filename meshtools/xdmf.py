@@ -0,0 +1,254 @@
+"""Потоковое преобразование MSH 4.1 в XDMF/HDF5 для FEniCS: python -m meshtools.xdmf mesh.msh"""
+
+import os
+import sys
+
+import h5py
+import numpy as np
+
+from .connectivity import TagIndex
+from .msh import (CHUNK_LINES, ELEMENT_NODES, MshFormatError, _expect_end, _ints, _iter_lines,
+                  _read_entities, _read_format, _read_physical_names, _skip_section, node_columns)
+from .msh_binary import BinaryMsh, is_binary_msh
+
+# Типы элементов gmsh и соответствующие типы топологии XDMF
+XDMF_TOPOLOGY = {
+    1: "Polyline", 2: "Triangle", 3: "Quadrilateral", 4: "Tetrahedron", 5: "Hexahedron",
+    8: "Edge_3", 9: "Triangle_6", 10: "Quadrilateral_9", 11: "Tetrahedron_10", 16: "Quadrilateral_8",
+}
+
+# Перестановка узлов там, где порядок gmsh отличается от XDMF
+NODE_ORDER = {11: [0, 1, 2, 3, 4, 5, 6, 7, 9, 8]}
+
+XDMF_TEMPLATE = """<?xml version="1.0"?>
+<Xdmf Version="3.0">
+  <Domain>
+    <Grid Name="{grid}" GridType="Uniform">
+      <Topology TopologyType="{topology}" NumberOfElements="{cells}" NodesPerElement="{npe}">
+        <DataItem Dimensions="{cells} {npe}" NumberType="Int" Precision="8" Format="HDF">{h5}:/{grid}/topology</DataItem>
+      </Topology>
+      <Geometry GeometryType="{geometry}">
+        <DataItem Dimensions="{nodes} {gdim}" NumberType="Float" Precision="8" Format="HDF">{h5}:/geometry</DataItem>
+      </Geometry>
+      <Attribute Name="{name}" AttributeType="Scalar" Center="Cell">
+        <DataItem Dimensions="{cells}" NumberType="Int" Precision="8" Format="HDF">{h5}:/{grid}/markers</DataItem>
+      </Attribute>
+    </Grid>
+  </Domain>
+</Xdmf>
+"""
+
+
+class _CellSet:
+    """Ячейки одной размерности, дописываемые в расширяемые наборы данных HDF5"""
+
+    def __init__(self, h5, grid, chunk):
+        self.h5 = h5
+        self.grid = grid
+        self.chunk = chunk
+        self.element_type = None
+        self.count = 0
+        self.topology = self.markers = None
+
+    def append(self, element_type, connectivity, marker):
+        if self.element_type is None:
+            if element_type not in XDMF_TOPOLOGY:
+                raise ValueError(f"Тип элементов gmsh {element_type} не поддерживается при записи XDMF")
+            npe = ELEMENT_NODES[element_type]
+            group = self.h5.create_group(self.grid)
+            self.topology = group.create_dataset("topology", (0, npe), maxshape=(None, npe), dtype=np.int64,
+                                                 chunks=(self.chunk, npe))
+            self.markers = group.create_dataset("markers", (0,), maxshape=(None,), dtype=np.int64,
+                                                chunks=(self.chunk,))
+            self.element_type = element_type
+        elif element_type != self.element_type:
+            raise ValueError(f"Разные типы ячеек в {self.grid} ({self.element_type} и {element_type}) "
+                             "не поддерживаются")
+        n = len(connectivity)
+        self.topology.resize(self.count + n, axis=0)
+        self.markers.resize(self.count + n, axis=0)
+        order = NODE_ORDER.get(element_type)
+        self.topology[self.count:] = connectivity if order is None else connectivity[:, order]
+        self.markers[self.count:] = marker
+        self.count += n
+
+    def write_xdmf(self, path, h5_name, nodes, gdim, name):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(XDMF_TEMPLATE.format(grid=self.grid, topology=XDMF_TOPOLOGY[self.element_type],
+                                         cells=self.count, npe=ELEMENT_NODES[self.element_type], h5=h5_name,
+                                         geometry="XY" if gdim == 2 else "XYZ", nodes=nodes, gdim=gdim,
+                                         name=name))
+
+
+class _Converter:
+    """Запись узлов и ячеек по мере чтения файла; в памяти держится только индекс тегов узлов"""
+
+    def __init__(self, h5, dim, prune_z, chunk):
+        self.h5 = h5
+        self.dim = dim
+        self.prune_z = prune_z
+        self.chunk = chunk
+        self.entities = {}
+        self.geometry = None
+        self.index = None
+        self.cells = _CellSet(h5, "domain", chunk)
+        self.facets = _CellSet(h5, "facets", chunk)
+
+    def start(self, entities, dim):
+        self.entities = entities
+        if self.dim is None:
+            self.dim = dim
+        if self.prune_z is None:
+            self.prune_z = self.dim == 2
+
+    @property
+    def gdim(self):
+        return 2 if self.prune_z else 3
+
+    def start_nodes(self, num_nodes):
+        self.geometry = self.h5.create_dataset("geometry", (num_nodes, self.gdim), dtype=np.float64,
+                                               chunks=(max(min(self.chunk, num_nodes), 1), self.gdim))
+        self._tags = []
+
+    def add_node_tags(self, tags):
+        self._tags.append(np.asarray(tags, dtype=np.int64).ravel())
+
+    def add_coords(self, row, coords):
+        if self.prune_z and np.any(coords[:, 2] != 0):
+            raise ValueError("У двумерной сетки есть узлы с z != 0; используйте prune_z=False")
+        self.geometry[row:row + len(coords)] = coords[:, :self.gdim]
+
+    def end_nodes(self):
+        tags = np.concatenate(self._tags) if self._tags else np.empty(0, dtype=np.int64)
+        self.index = TagIndex(tags)
+        del self._tags
+
+    def target(self, dim, entity_tag):
+        """Набор ячеек для блока и его метка (первая физическая группа сущности)"""
+        entity = self.entities.get((dim, entity_tag))
+        marker = entity.physical_tags[0] if entity is not None and entity.physical_tags else 0
+        if dim == self.dim:
+            return self.cells, marker
+        # Граничные грани без физической группы в файл меток не попадают
+        if dim == self.dim - 1 and marker:
+            return self.facets, marker
+        return None, marker
+
+    def add_cells(self, cells, element_type, node_tags, marker):
+        cells.append(element_type, self.index(node_tags), marker)
+
+
+def _convert_ascii(path, conv):
+    with open(path, "rb") as f:
+        entities = {}
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            name = line.strip()
+            if not name.startswith(b"$"):
+                continue
+            name = name[1:]
+            if name == b"MeshFormat":
+                _read_format(f)
+            elif name == b"PhysicalNames":
+                _read_physical_names(f)
+            elif name == b"Entities":
+                entities = _read_entities(f)
+            elif name == b"Nodes":
+                if not entities and conv.dim is None:
+                    # Без $Entities размерность сетки до раздела $Elements неизвестна
+                    raise MshFormatError(f"В файле {path} нет раздела $Entities, укажите размерность dim")
+                conv.start(entities, max(dim for dim, _ in entities) if entities else conv.dim)
+                num_blocks, num_nodes, _, _ = _ints(f.readline())
+                conv.start_nodes(num_nodes)
+                row = 0
+                for _ in range(num_blocks):
+                    dim, _, parametric, count = _ints(f.readline())
+                    for tags in _iter_lines(f, count, 1, np.int64, conv.chunk):
+                        conv.add_node_tags(tags)
+                    cols = node_columns(dim, parametric)
+                    for coords in _iter_lines(f, count, cols, np.float64, conv.chunk):
+                        conv.add_coords(row, coords)
+                        row += len(coords)
+                conv.end_nodes()
+                _expect_end(f, name)
+            elif name == b"Elements":
+                if conv.index is None:
+                    raise MshFormatError("Раздел $Elements расположен до $Nodes")
+                num_blocks = _ints(f.readline())[0]
+                for _ in range(num_blocks):
+                    dim, entity_tag, element_type, count = _ints(f.readline())
+                    cells, marker = conv.target(dim, entity_tag)
+                    if cells is None:
+                        for _ in range(count):
+                            f.readline()
+                        continue
+                    for data in _iter_lines(f, count, ELEMENT_NODES[element_type] + 1, np.int64, conv.chunk):
+                        conv.add_cells(cells, element_type, data[:, 1:], marker)
+                _expect_end(f, name)
+            else:
+                _skip_section(f, name)
+
+
+def _convert_binary(path, conv):
+    with BinaryMsh(path) as m:
+        dims = [b.dim for b in m.element_blocks]
+        conv.start(m.entities, max(dims, default=3))
+        conv.start_nodes(sum(b.count for b in m.node_blocks))
+        row = 0
+        for i in range(len(m.node_blocks)):
+            tags, coords = m.node_block(i)
+            conv.add_node_tags(tags)
+            for start in range(0, len(coords), conv.chunk):
+                part = np.asarray(coords[start:start + conv.chunk])
+                conv.add_coords(row, part)
+                row += len(part)
+        conv.end_nodes()
+        for i, info in enumerate(m.element_blocks):
+            cells, marker = conv.target(info.dim, info.entity_tag)
+            if cells is None:
+                continue
+            # Блок читается из отображения порциями, в память попадает только текущая порция
+            node_tags = m.element_block(i).node_tags
+            for start in range(0, info.count, conv.chunk):
+                conv.add_cells(cells, info.element_type, node_tags[start:start + conv.chunk], marker)
+
+
+def msh_to_xdmf(msh_path, xdmf_path=None, boundaries_path=None, dim=None, prune_z=None,
+                name="name_to_read", chunk=CHUNK_LINES):
+    """Сетка и метки граничных граней в XDMF за один проход по файлу MSH
+
+    Узлы и ячейки записываются в HDF5 порциями по chunk строк, поэтому расход памяти
+    не зависит от размера сетки (кроме индекса тегов узлов, 8-16 байт на узел).
+    Возвращает пути к файлу сетки и к файлу меток границы (None, если меченых граней нет).
+    """
+    stem = os.path.splitext(msh_path)[0]
+    xdmf_path = xdmf_path or stem + ".xdmf"
+    stem = os.path.splitext(xdmf_path)[0]
+    boundaries_path = boundaries_path or stem + "_boundaries.xdmf"
+    h5_path = stem + ".h5"
+    with h5py.File(h5_path, "w") as h5:
+        conv = _Converter(h5, dim, prune_z, chunk)
+        if is_binary_msh(msh_path):
+            _convert_binary(msh_path, conv)
+        else:
+            _convert_ascii(msh_path, conv)
+        if conv.geometry is None or conv.cells.element_type is None:
+            raise MshFormatError(f"В файле {msh_path} нет ячеек размерности {conv.dim}")
+        nodes = conv.geometry.shape[0]
+    # Оба файла XDMF ссылаются на общий набор координат в одном файле HDF5
+    h5_name = os.path.basename(h5_path)
+    conv.cells.write_xdmf(xdmf_path, h5_name, nodes, conv.gdim, name)
+    if conv.facets.element_type is None:
+        return xdmf_path, None
+    conv.facets.write_xdmf(boundaries_path, h5_name, nodes, conv.gdim, name)
+    return xdmf_path, boundaries_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Использование: python -m meshtools.xdmf mesh.msh [mesh.xdmf]")
+    for path in msh_to_xdmf(*sys.argv[1:]):
+        if path:
+            print(path)
@@ -5,6 +5,9 @@ import pygmsh
 # Задание разрешения сетки
 resolution = 0.01
 
+# Запись сетки в двоичном формате MSH: файл меньше, записывается и читается быстрее
+binary = True
+
 # Параметры канала
 L = 2.2  # Длина канала
 H = 0.41  # Высота канала
@@ -52,6 +55,7 @@ model.add_physical(circle.curve_loop.curves, "Obstacle")  # Физическая
 geometry.generate_mesh(dim=2)
 
 # Запись сетки в файл
+gmsh.option.setNumber("Mesh.Binary", 1 if binary else 0)
 gmsh.write("mesh.msh")
 
 # Опционально: визуализация сетки в графическом интерфейсе GMSH
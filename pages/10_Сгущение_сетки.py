@@ -1,32 +1,22 @@
 import streamlit as st
 from PIL import Image
 import base64
-import subprocess
-import os
 import math
-import gmsh
-import numpy as np
 import matplotlib.pyplot as plt
-import multiprocessing
 import plotly.graph_objects as go  # Для 3D-визуализации
+from meshtools.generators import ELEMENT_TYPES, generate_rectangle_mesh
+from meshtools.jobs import submit_mesh_job
+from meshtools.ui import poll_mesh_job, show_estimate
+from meshtools.estimate import estimate_rectangle
+from meshtools.cache import get_cache
+from meshtools.plotting import plot_mesh_2d, plot_quality_histograms
+from meshtools.quality import element_quality, worst_elements
 st.set_page_config(page_title="֎", layout="wide")
 
 # Функция для отображения кода с возможностью копирования
 def show_code(code, language="python"):
     st.code(code, language)
 
-def run_gmsh(file_path):
-    try:
-        env = os.environ.copy()
-        env["LIBGL_ALWAYS_SOFTWARE"] = "1"  # Используем программный рендеринг
-        subprocess.run(["gmsh", file_path], check=True, env=env)
-        st.success("Gmsh успешно запущен в программном режиме!")
-    except FileNotFoundError:
-        st.error("Gmsh не найден. Убедитесь, что он установлен и доступен в PATH.")
-    except subprocess.CalledProcessError as e:
-        st.error(f"Ошибка при запуске Gmsh: {e.returncode}")
-        st.text(f"Вывод ошибки:\n{e.stderr}")
-
 sections = {
     "Сгущение сетки": "",
     "Пример сгущения 2D-сеток на границе": "",
@@ -92,63 +82,6 @@ elif choice == "Пример сгущения 2D-сеток на границе"
     # Основной код Streamlit
     st.markdown("##### Пример сгущения 2D-сеток на границе")
 
-    def generate_mesh(mesh_type, element_type, nx, ny):
-        """Генерация 2D-сетки для прямоугольника"""
-        gmsh.initialize()
-        gmsh.model.add("rectangle")
-        
-        # Фиксированные размеры прямоугольника
-        width = 10
-        height = 10
-        
-        # Создание точек
-        p1 = gmsh.model.geo.addPoint(0, 0, 0)
-        p2 = gmsh.model.geo.addPoint(width, 0, 0)
-        p3 = gmsh.model.geo.addPoint(width, height, 0)
-        p4 = gmsh.model.geo.addPoint(0, height, 0)
-        
-        # Создание линий
-        l1 = gmsh.model.geo.addLine(p1, p2)
-        l2 = gmsh.model.geo.addLine(p2, p3)
-        l3 = gmsh.model.geo.addLine(p3, p4)
-        l4 = gmsh.model.geo.addLine(p4, p1)
-        
-        # Создание области
-        cl = gmsh.model.geo.addCurveLoop([l1, l2, l3, l4])
-        s = gmsh.model.geo.addPlaneSurface([cl])
-        
-        gmsh.model.geo.synchronize()
-        
-        gmsh.model.mesh.setTransfiniteCurve(l1, nx + 1)
-        gmsh.model.mesh.setTransfiniteCurve(l2, ny + 1)
-        gmsh.model.mesh.setTransfiniteCurve(l3, nx + 1)
-        gmsh.model.mesh.setTransfiniteCurve(l4, ny + 1)
-        
-        if mesh_type == "Структурированная":
-            if element_type == "Треугольные":
-                gmsh.model.mesh.setTransfiniteSurface(s, "Left")
-            elif element_type == "Четырехугольные":
-                gmsh.model.mesh.setTransfiniteSurface(s)
-        
-        gmsh.model.mesh.generate(2)
-
-        if element_type == "Четырехугольные":
-            gmsh.model.mesh.recombine()
-        
-        node_tags, node_coords, _ = gmsh.model.mesh.getNodes()
-        element_types, element_tags, element_nodes = gmsh.model.mesh.getElements(2)
-        
-        gmsh.finalize()
-        
-        nodes = np.array(node_coords).reshape(-1, 3)[:, :2]
-        elements = [np.array(e).reshape(-1, 4 if element_type == "Четырехугольные" else 3) - 1 for e in element_nodes]
-        
-        return nodes, np.vstack(elements)
-
-    def mesh_worker(mesh_type, element_type, nx, ny, result_queue):
-        nodes, elements = generate_mesh(mesh_type, element_type, nx, ny)
-        result_queue.put((nodes, elements))
-
     # Выбор типа сетки
     mesh_type = st.selectbox("Тип сетки", ["Структурированная", "Неструктурированная"])
 
@@ -159,24 +92,31 @@ elif choice == "Пример сгущения 2D-сеток на границе"
     nx = st.number_input("Число узлов по X", min_value=2, max_value=100, value=10)
     ny = st.number_input("Число узлов по Y", min_value=2, max_value=100, value=10)
 
+    timeout = st.number_input("Ограничение времени, с (0 — без ограничения)", min_value=0, value=0)
+    show_estimate(estimate_rectangle(mesh_type, element_type, 10, 10, nx, ny))
+
     if st.button("Сгенерировать сетку"):
-        with multiprocessing.Manager() as manager:
-            result_queue = manager.Queue()
-            process = multiprocessing.Process(target=mesh_worker, args=(mesh_type, element_type, nx, ny, result_queue))
-            process.start()
-            process.join()
-            nodes, elements = result_queue.get()
+        # Фиксированные размеры прямоугольника 10 x 10
+        st.session_state["refinement_job"] = submit_mesh_job(generate_rectangle_mesh, mesh_type, element_type, 10, 10, nx, ny, timeout=timeout or None, cache=get_cache())
+
+    job = poll_mesh_job("refinement_job")
+    if job is not None:
+        # Тип элементов задания: виджеты могли измениться, пока сетка строилась
+        element_type = job.args[1]
+        nodes, elements, _ = job.result
             
         fig, ax = plt.subplots()
         ax.scatter(nodes[:, 0], nodes[:, 1], s=15, color='blue')
             
-        for element in elements:
-            if np.all(element < len(nodes)):
-                polygon = nodes[element]
-                polygon = np.vstack([polygon, polygon[0]])  # Замыкаем элемент
-                ax.plot(polygon[:, 0], polygon[:, 1], color='black')
+        # Все ребра сетки одной коллекцией линий
+        plot_mesh_2d(ax, nodes, elements)
+
+        # Качество элементов: 5% худших по SICN выделяются красным
+        quality = job.derived("quality", lambda: element_quality(nodes, elements, ELEMENT_TYPES[element_type]))
+        plot_mesh_2d(ax, nodes, elements[worst_elements(quality)], color='red', linewidth=2)
             
         ax.set_xlim(0, 10)
         ax.set_ylim(0, 10)
         ax.set_aspect('equal')
         st.pyplot(fig)
+        st.pyplot(plot_quality_histograms(quality))
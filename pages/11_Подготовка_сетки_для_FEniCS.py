@@ -122,12 +122,11 @@ elif choice == "Пример подготовки сетки с граничны
     st.markdown("##### Пример подготовки сетки с граничными условиями")
     st.write("""
     ```bash
-    import meshio
+    from meshtools.xdmf import msh_to_xdmf
 
-    # Чтение .msh файла
-    mesh = meshio.read("mesh_with_bc.msh")
-    # Запись в .xdmf формат
-    meshio.write("mesh_with_bc.xdmf", mesh)
+    # Потоковая запись .msh в .xdmf/.h5: сетка и метки границы за один проход,
+    # без загрузки всей сетки в память (создаются mesh_with_bc.xdmf и mesh_with_bc_boundaries.xdmf)
+    msh_to_xdmf("mesh_with_bc.msh")
     from fenics import *
 
     # Загрузка сетки
@@ -156,5 +155,6 @@ elif choice == "Замечание":
 
     - Для подготовки сетки в FEniCS нужно использовать Gmsh, `mshr` или другие инструменты. 
     - Конвертировать сетку в формат `.xml` или `.xdmf` с помощью `meshio` или `dolfin-convert`.
+    - Для больших сеток использовать потоковое преобразование `python -m meshtools.xdmf mesh.msh`, которое не держит сетку в памяти целиком.
     - Загрузить сетку в FEniCS и определить граничные условия с помощью физических групп.
               """)
\ No newline at end of file
@@ -1,32 +1,27 @@
 import streamlit as st
 from PIL import Image
 import base64
-import subprocess
-import os
 import math
-import gmsh
 import numpy as np
 import matplotlib.pyplot as plt
-import multiprocessing
 import plotly.graph_objects as go  # Для 3D-визуализации
+from meshtools.generators import ELEMENT_TYPES, generate_rectangle_mesh, generate_box_mesh
+from meshtools.jobs import submit_mesh_job
+from meshtools.ui import poll_mesh_job, show_estimate
+from meshtools.estimate import estimate_box, estimate_rectangle
+from meshtools.bench_3d import default_threads, run_scaling
+from meshtools.bench_algorithms import ALGORITHMS_2D, run_benchmark
+from meshtools.cache import get_cache
+from meshtools.connectivity import boundary_faces, compact_nodes
+from meshtools.plotting import plot_mesh_2d, plot_quality_comparison, plot_quality_histograms, plot_thread_scaling, wireframe_trace
+from meshtools.quality import element_quality, worst_elements
+from meshtools.threads import ALGORITHMS_3D, MeshingOptions, get_thread_budget
 st.set_page_config(page_title="⌗", layout="wide")
 
 # Функция для отображения кода с возможностью копирования
 def show_code(code, language="python"):
     st.code(code, language)
 
-def run_gmsh(file_path):
-    try:
-        env = os.environ.copy()
-        env["LIBGL_ALWAYS_SOFTWARE"] = "1"  # Используем программный рендеринг
-        subprocess.run(["gmsh", file_path], check=True, env=env)
-        st.success("Gmsh успешно запущен в программном режиме!")
-    except FileNotFoundError:
-        st.error("Gmsh не найден. Убедитесь, что он установлен и доступен в PATH.")
-    except subprocess.CalledProcessError as e:
-        st.error(f"Ошибка при запуске Gmsh: {e.returncode}")
-        st.text(f"Вывод ошибки:\n{e.stderr}")
-
 sections = {
     "Алгоритмы построения 2D сеток": "",
     "Типы сеток в Gmsh": "",
@@ -128,59 +123,6 @@ elif choice == "Генерация 2D-сеток на прямоугольник
     # Основной код Streamlit
     st.write("""##### Генерация 2D-сеток на прямоугольнике с использованием Gmsh""")
 
-    def generate_mesh(mesh_type, element_type, width, height, nx, ny):
-        """Генерация 2D-сетки для прямоугольника"""
-        gmsh.initialize()
-        gmsh.model.add("rectangle")
-        
-        # Создание точек
-        p1 = gmsh.model.geo.addPoint(0, 0, 0)
-        p2 = gmsh.model.geo.addPoint(width, 0, 0)
-        p3 = gmsh.model.geo.addPoint(width, height, 0)
-        p4 = gmsh.model.geo.addPoint(0, height, 0)
-        
-        # Создание линий
-        l1 = gmsh.model.geo.addLine(p1, p2)
-        l2 = gmsh.model.geo.addLine(p2, p3)
-        l3 = gmsh.model.geo.addLine(p3, p4)
-        l4 = gmsh.model.geo.addLine(p4, p1)
-        
-        # Создание области
-        cl = gmsh.model.geo.addCurveLoop([l1, l2, l3, l4])
-        s = gmsh.model.geo.addPlaneSurface([cl])
-        
-        gmsh.model.geo.synchronize()
-        
-        gmsh.model.mesh.setTransfiniteCurve(l1, nx + 1)
-        gmsh.model.mesh.setTransfiniteCurve(l2, ny + 1)
-        gmsh.model.mesh.setTransfiniteCurve(l3, nx + 1)
-        gmsh.model.mesh.setTransfiniteCurve(l4, ny + 1)
-        
-        if mesh_type == "Структурированная":
-            if element_type == "Треугольные":
-                gmsh.model.mesh.setTransfiniteSurface(s, "Left")
-            elif element_type == "Четырехугольные":
-                gmsh.model.mesh.setTransfiniteSurface(s)
-        
-        gmsh.model.mesh.generate(2)
-
-        if element_type == "Четырехугольные":
-            gmsh.model.mesh.recombine()
-        
-        node_tags, node_coords, _ = gmsh.model.mesh.getNodes()
-        element_types, element_tags, element_nodes = gmsh.model.mesh.getElements(2)
-        
-        gmsh.finalize()
-        
-        nodes = np.array(node_coords).reshape(-1, 3)[:, :2]
-        elements = [np.array(e).reshape(-1, 4 if element_type == "Четырехугольные" else 3) - 1 for e in element_nodes]
-        
-        return nodes, np.vstack(elements)
-
-    def mesh_worker(mesh_type, element_type, width, height, nx, ny, result_queue):
-        nodes, elements = generate_mesh(mesh_type, element_type, width, height, nx, ny)
-        result_queue.put((nodes, elements))
-
     # Выбор типа сетки
     mesh_type = st.selectbox("Тип сетки", ["Структурированная", "Неструктурированная"])
 
@@ -193,27 +135,41 @@ elif choice == "Генерация 2D-сеток на прямоугольник
     nx = st.number_input("Число узлов по X", min_value=2, max_value=100, value=10)
     ny = st.number_input("Число узлов по Y", min_value=2, max_value=100, value=10)
 
+    # Потоки gmsh: General.NumThreads и ограничения по этапам (0 — как General.NumThreads)
+    threads = st.number_input("Число потоков", min_value=1, max_value=get_thread_budget().total, value=1)
+    with st.expander("Потоки по этапам построения"):
+        max_threads_1d = st.number_input("Mesh.MaxNumThreads1D", min_value=0, max_value=get_thread_budget().total, value=0)
+        max_threads_2d = st.number_input("Mesh.MaxNumThreads2D", min_value=0, max_value=get_thread_budget().total, value=0)
+    options = MeshingOptions(threads, max_threads_1d=max_threads_1d, max_threads_2d=max_threads_2d)
+    timeout = st.number_input("Ограничение времени, с (0 — без ограничения)", min_value=0, value=0)
+    show_estimate(estimate_rectangle(mesh_type, element_type, width, height, nx, ny))
+
     if st.button("Сгенерировать сетку"):
-        with multiprocessing.Manager() as manager:
-            result_queue = manager.Queue()
-            process = multiprocessing.Process(target=mesh_worker, args=(mesh_type, element_type, width, height, nx, ny, result_queue))
-            process.start()
-            process.join()
-            nodes, elements = result_queue.get()
+        st.session_state["rectangle_job"] = submit_mesh_job(generate_rectangle_mesh, mesh_type, element_type, width, height, nx, ny, options=options, timeout=timeout or None, cache=get_cache())
+
+    job = poll_mesh_job("rectangle_job")
+    if job is not None:
+        # Параметры задания: виджеты могли измениться, пока сетка строилась
+        mesh_type, element_type, width, height, nx, ny = job.args
+        nodes, elements, config = job.result
+        st.caption(f"{MeshingOptions.from_array(config).describe()}, время: {job.elapsed:.1f} с"
+                   + (f", пик памяти: {job.usage['peak_rss_mib']:.0f} МиБ" if job.usage and job.usage["peak_rss_mib"] else ""))
         
         fig, ax = plt.subplots()
         ax.scatter(nodes[:, 0], nodes[:, 1], s=15, color='blue')
         
-        for element in elements:
-            if np.all(element < len(nodes)):
-                polygon = nodes[element]
-                polygon = np.vstack([polygon, polygon[0]])  # Замыкаем элемент
-                ax.plot(polygon[:, 0], polygon[:, 1], color='black')
+        # Все ребра сетки одной коллекцией линий
+        plot_mesh_2d(ax, nodes, elements)
+
+        # Качество элементов: 5% худших по SICN выделяются красным
+        quality = job.derived("quality", lambda: element_quality(nodes, elements, ELEMENT_TYPES[element_type]))
+        plot_mesh_2d(ax, nodes, elements[worst_elements(quality)], color='red', linewidth=2)
         
         ax.set_xlim(0, width)
         ax.set_ylim(0, height)
         ax.set_aspect('equal')
         st.pyplot(fig)
+        st.pyplot(plot_quality_histograms(quality))
 
 
 elif choice == "Различия между методом Delaunay и методом Frontal":
@@ -305,6 +261,28 @@ elif choice == "Различия между методом Delaunay и мето
     В целом, метод Delaunay быстрее и более устойчив, но может уступать Frontal по качеству элементов. Выбор метода зависит от требований к точности и сложности геометрии.  
     """)
 
+    # Замеры на одной и той же геометрии
+    st.markdown("---")
+    st.markdown("###### Проверка на практике")
+    st.write("""
+    Одна и та же геометрия строится выбранными алгоритмами в отдельных процессах параллельно. 
+    Для каждого алгоритма измеряются время построения, число элементов, пиковая память процесса и качество элементов. 
+    Результаты сохраняются в кэше, повторный запуск с теми же параметрами показывает сохраненные замеры.
+    """)
+    geometries = {"Канал с цилиндром (gmsh_example.py)": "channel", "Пластина с отверстием (rectangle_geometry.geo)": "plate"}
+    geometry = st.selectbox("Геометрия", list(geometries))
+    size = st.number_input("Размер элементов", min_value=0.005, max_value=0.5, value=0.05, step=0.005, format="%.3f")
+    algorithms = st.multiselect("Алгоритмы", list(ALGORITHMS_2D), default=["MeshAdapt", "Delaunay", "Frontal-Delaunay"])
+
+    if st.button("Запустить замеры") and algorithms:
+        with st.spinner("Построение сеток..."):
+            results, errors = run_benchmark(geometries[geometry], algorithms, size)
+        if results:
+            st.dataframe([r.summary() for r in results.values()])
+            st.pyplot(plot_quality_comparison({a: r.quality() for a, r in results.items()}))
+        for algorithm, error in errors.items():
+            st.warning(f"{algorithm}: {error}")
+
 elif choice == "Алгоритмы для построения 3D сеток":
     # Заголовок страницы
     st.markdown("##### Алгоритмы для построения 3D сеток")
@@ -398,110 +376,45 @@ elif choice == "Алгоритмы для построения 3D сеток":
         HXT **существенно опережает** другие алгоритмы, такие как Delaunay и Frontal, по скорости генерации сеток.
         """)
 
+    # Замеры скорости 3D-алгоритмов и масштабирования по потокам
+    st.markdown("---")
+    st.markdown("###### Проверка на практике")
+    st.write("""
+    Каждый алгоритм строит одну и ту же сетку с разным числом потоков (`General.NumThreads`, `Mesh.MaxNumThreads3D`). 
+    Замеры выполняются по очереди в отдельных процессах, чтобы они не делили ядра процессора между собой.
+    """)
+    geometries = {"Куб": "box", "Два цилиндра (CSG)": "cylinders"}
+    geometry = st.selectbox("Геометрия", list(geometries), key="bench_3d_geometry")
+    size = st.number_input("Размер элементов", min_value=0.02, max_value=0.5, value=0.1, step=0.01, key="bench_3d_size")
+    algorithms = st.multiselect("Алгоритмы", list(ALGORITHMS_3D), default=list(ALGORITHMS_3D), key="bench_3d_algorithms")
+    threads = st.multiselect("Число потоков", default_threads(), default=default_threads(), key="bench_3d_threads")
+
+    if st.button("Запустить замеры", key="bench_3d_button") and algorithms and threads:
+        with st.spinner("Построение сеток..."):
+            report = run_scaling(geometries[geometry], algorithms, threads, size)
+        rows = [
+            {
+                "Алгоритм": run["algorithm"],
+                "Потоки": run["threads"],
+                "Тетраэдры": run.get("tetrahedra"),
+                "Время 3D, с": round(run["volume_time"], 3) if "volume_time" in run else None,
+                "Тетраэдры в секунду": round(run["elements_per_second"]) if run.get("elements_per_second") else None,
+                "Ускорение": round(run["speedup"], 2) if run.get("speedup") else None,
+                "SICN мин.": round(run["quality"]["sicn"]["min"], 3) if run.get("quality") else None,
+                "Пик памяти, МиБ": round(run["peak_rss_mib"]) if "peak_rss_mib" in run else None,
+                "Ошибка": run.get("error"),
+            }
+            for run in report["runs"]
+        ]
+        st.dataframe(rows)
+        st.pyplot(plot_thread_scaling(report))
+
 
 
 elif choice == "Генерация 3D-сеток":
     # Основной код Streamlit
     st.markdown("##### Генерация 3D-сеток")
 
-    def generate_mesh(mesh_type, element_type, width, height, length, nx, ny, nz):
-        """Генерация 3D-сетки"""
-        gmsh.initialize()
-        gmsh.model.add("mesh")
-
-        # Создание точек
-        p1 = gmsh.model.geo.addPoint(0, 0, 0)
-        p2 = gmsh.model.geo.addPoint(width, 0, 0)
-        p3 = gmsh.model.geo.addPoint(width, height, 0)
-        p4 = gmsh.model.geo.addPoint(0, height, 0)
-        p5 = gmsh.model.geo.addPoint(0, 0, length)
-        p6 = gmsh.model.geo.addPoint(width, 0, length)
-        p7 = gmsh.model.geo.addPoint(width, height, length)
-        p8 = gmsh.model.geo.addPoint(0, height, length)
-
-        # Создание линий
-        lines = [
-            gmsh.model.geo.addLine(p1, p2),  # l1
-            gmsh.model.geo.addLine(p2, p3),  # l2
-            gmsh.model.geo.addLine(p3, p4),  # l3
-            gmsh.model.geo.addLine(p4, p1),  # l4
-            gmsh.model.geo.addLine(p5, p6),  # l5
-            gmsh.model.geo.addLine(p6, p7),  # l6
-            gmsh.model.geo.addLine(p7, p8),  # l7
-            gmsh.model.geo.addLine(p8, p5),  # l8
-            gmsh.model.geo.addLine(p1, p5),  # l9
-            gmsh.model.geo.addLine(p2, p6),  # l10
-            gmsh.model.geo.addLine(p3, p7),  # l11
-            gmsh.model.geo.addLine(p4, p8),  # l12
-        ]
-
-        # Создание поверхностей
-        curve_loops = [
-            gmsh.model.geo.addCurveLoop([lines[0], lines[1], lines[2], lines[3]]),  # cl1
-            gmsh.model.geo.addCurveLoop([lines[4], lines[5], lines[6], lines[7]]),  # cl2
-            gmsh.model.geo.addCurveLoop([lines[0], lines[9], -lines[4], -lines[8]]),  # cl3
-            gmsh.model.geo.addCurveLoop([lines[1], lines[10], -lines[5], -lines[9]]),  # cl4
-            gmsh.model.geo.addCurveLoop([lines[2], lines[11], -lines[6], -lines[10]]),  # cl5
-            gmsh.model.geo.addCurveLoop([lines[3], lines[8], -lines[7], -lines[11]]),  # cl6
-        ]
-
-        surfaces = [gmsh.model.geo.addPlaneSurface([cl]) for cl in curve_loops]
-
-        # Создание объема
-        surface_loop = gmsh.model.geo.addSurfaceLoop(surfaces)
-        volume = gmsh.model.geo.addVolume([surface_loop])
-
-        gmsh.model.geo.synchronize()
-
-        gmsh.model.mesh.setTransfiniteCurve(lines[0], nx + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[2], nx + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[4], nx + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[6], nx + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[1], ny + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[3], ny + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[5], ny + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[7], ny + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[8], nz + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[9], nz + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[10], nz + 1)
-        gmsh.model.mesh.setTransfiniteCurve(lines[11], nz + 1)
-            
-        # Настройка сетки
-        if mesh_type == "Структурированная":
-            gmsh.model.mesh.setTransfiniteSurface(surfaces[0])
-            gmsh.model.mesh.setTransfiniteVolume(volume)
-
-        # Генерация сетки
-        if element_type == "Тетраэдальные":
-            gmsh.model.mesh.generate(3)
-        else:
-            if mesh_type == "Структурированная":
-                if element_type == "Треугольные":
-                    for s in surfaces:
-                        gmsh.model.mesh.setTransfiniteSurface(s, "Left")
-                elif element_type == "Четырехугольные":
-                    for s in surfaces:
-                        gmsh.model.mesh.setTransfiniteSurface(s)
-            
-            gmsh.model.mesh.generate(2)
-
-            if element_type == "Четырехугольные":
-                gmsh.model.mesh.recombine()
-            
-        node_tags, node_coords, _ = gmsh.model.mesh.getNodes()
-        element_types, element_tags, element_nodes = gmsh.model.mesh.getElements()
-            
-        nodes = np.array(node_coords).reshape(-1, 3)
-        elements = [np.array(e).reshape(-1, 4) - 1 for e in element_nodes]  # Только тетраэдальные элементы
-            
-        gmsh.finalize()
-        
-        return nodes, np.vstack(elements)
-
-    def mesh_worker(mesh_type, element_type, width, height, length, nx, ny, nz, result_queue):
-        nodes, elements = generate_mesh(mesh_type, element_type, width, height, length, nx, ny, nz)
-        result_queue.put((nodes, elements))
-
     st.markdown("""
     **Трехмерные сетки**  
     Могут быть как структурированными, так и неструктурированными.  
@@ -527,49 +440,63 @@ elif choice == "Генерация 3D-сеток":
     ny = st.number_input("Число узлов по Y", min_value=2, max_value=100, value=10, key="ny_input")
     nz = st.number_input("Число узлов по Z", min_value=2, max_value=100, value=10, key="nz_input")
 
+    # Потоки gmsh и алгоритм построения тетраэдров
+    threads = st.number_input("Число потоков", min_value=1, max_value=get_thread_budget().total, value=1, key="threads_input")
+    algorithm_3d = st.selectbox("Алгоритм 3D-сетки", list(ALGORITHMS_3D), key="algorithm_3d_select")
+    with st.expander("Потоки по этапам построения"):
+        max_threads = [
+            st.number_input(f"Mesh.MaxNumThreads{d}D", min_value=0, max_value=get_thread_budget().total, value=0, key=f"max_threads_{d}d")
+            for d in (1, 2, 3)
+        ]
+    options = MeshingOptions(threads, algorithm_3d, *max_threads)
+    timeout = st.number_input("Ограничение времени, с (0 — без ограничения)", min_value=0, value=0, key="timeout_input")
+    show_estimate(estimate_box(mesh_type, element_type, width, height, length, nx, ny, nz))
+
 
     if st.button("Сгенерировать сетку", key="generate_mesh_button"):
         # Проверка: если выбрана структурированная тетраэдальная сетка
         if mesh_type == "Структурированная" and element_type == "Тетраэдальные":
             st.warning("В 3D Gmsh позволяет строить только неструктурированные тетраэдальные сетки. Пожалуйста, не пытайтесь построить структурированные тетраэдальные сетки, оно не будет работать...")
         else:
-            with multiprocessing.Manager() as manager:
-                result_queue = manager.Queue()
-                process = multiprocessing.Process(target=mesh_worker, args=(mesh_type, element_type, width, height, length, nx, ny, nz, result_queue))
-                process.start()
-                process.join()
-                nodes, elements = result_queue.get()
-            
-            fig = go.Figure()
-            
-            if element_type in ["Треугольные", "Четырехугольные"]:
-                # Визуализация каркасной сетки по граням
-                for element in elements:
-                    element_closed = np.append(element, element[0])  # Замыкаем элемент
-                    fig.add_trace(go.Scatter3d(
-                        x=nodes[element_closed, 0],
-                        y=nodes[element_closed, 1],
-                        z=nodes[element_closed, 2],
-                        mode='lines',
-                        line=dict(color='red', width=2),
-                        showlegend=False  # Убираем из легенды
-                    ))
-            else:
-                # Визуализация объемной сетки
-                fig.add_trace(go.Mesh3d(
-                    x=nodes[:, 0],
-                    y=nodes[:, 1],
-                    z=nodes[:, 2],
-                    i=elements[:, 0],
-                    j=elements[:, 1],
-                    k=elements[:, 2],
-                    opacity=0.5,
-                    color='lightblue',
-                    showlegend=False  # Убираем из легенды
-                ))
-
-            # Полностью отключаем легенду
-            fig.update_layout(showlegend=False)
-
-            # Отображение в Streamlit
-            st.plotly_chart(fig)
+            st.session_state["box_job"] = submit_mesh_job(generate_box_mesh, mesh_type, element_type, width, height, length, nx, ny, nz, options=options, timeout=timeout or None, cache=get_cache())
+
+    job = poll_mesh_job("box_job")
+    if job is not None:
+        # Параметры задания: виджеты могли измениться, пока сетка строилась
+        mesh_type, element_type, width, height, length, nx, ny, nz = job.args
+        nodes, elements, config = job.result
+        st.caption(f"{MeshingOptions.from_array(config).describe()}, время: {job.elapsed:.1f} с"
+                   + (f", пик памяти: {job.usage['peak_rss_mib']:.0f} МиБ" if job.usage and job.usage["peak_rss_mib"] else ""))
+        
+        fig = go.Figure()
+        
+        if element_type in ["Треугольные", "Четырехугольные"]:
+            # Визуализация каркасной сетки: все ребра одной трассой
+            fig.add_trace(wireframe_trace(nodes, elements, color='red', width=2))
+        else:
+            # Визуализация объемной сетки: только граничные грани тетраэдров
+            skin_nodes, skin_faces = compact_nodes(nodes, boundary_faces(nodes, elements))
+            skin_nodes = skin_nodes.astype(np.float32)
+            fig.add_trace(go.Mesh3d(
+                x=skin_nodes[:, 0],
+                y=skin_nodes[:, 1],
+                z=skin_nodes[:, 2],
+                i=skin_faces[:, 0],
+                j=skin_faces[:, 1],
+                k=skin_faces[:, 2],
+                opacity=0.5,
+                color='lightblue',
+                showlegend=False  # Убираем из легенды
+            ))
+
+        # Качество элементов: каркас 5% худших по SICN
+        quality = job.derived("quality", lambda: element_quality(nodes, elements, ELEMENT_TYPES[element_type]))
+        fig.add_trace(wireframe_trace(nodes, elements[worst_elements(quality)], color='black', width=4,
+                                      element_type=ELEMENT_TYPES[element_type]))
+
+        # Полностью отключаем легенду
+        fig.update_layout(showlegend=False)
+
+        # Отображение в Streamlit
+        st.plotly_chart(fig)
+        st.pyplot(plot_quality_histograms(quality))
@@ -0,0 +1,84 @@
+"""Кэш сеток на диске: python -m pytest tests"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from meshtools.cache import MeshCache, _FileLock
+
+
+def _arrays(seed):
+    rng = np.random.default_rng(seed)
+    return rng.random((1000, 3)), rng.integers(0, 1000, (500, 3))
+
+
+def _touch(cache, key, mtime):
+    os.utime(cache._path(key), (mtime, mtime))
+
+
+def test_round_trip(tmp_path):
+    cache = MeshCache(tmp_path)
+    nodes, elements = _arrays(0)
+    cache.put("a", (nodes, elements))
+    got = cache.get("a")
+    assert np.array_equal(got[0], nodes) and np.array_equal(got[1], elements)
+    # Связность хранится в компактном типе, но возвращается в исходном
+    assert got[1].dtype == elements.dtype
+    assert cache.get("missing") is None
+
+
+def test_lru_within_budget(tmp_path):
+    cache = MeshCache(tmp_path)
+    cache.put("a", _arrays(0))
+    size = os.path.getsize(cache._path("a"))
+    cache.max_bytes = int(2.5 * size)
+
+    cache.put("b", _arrays(1))
+    _touch(cache, "a", 1000)
+    _touch(cache, "b", 2000)
+    # Чтение обновляет отметку использования: самой старой становится b
+    cache.get("a")
+    cache.put("c", _arrays(2))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_new_entry_is_not_evicted(tmp_path):
+    cache = MeshCache(tmp_path)
+    cache.put("a", _arrays(0))
+    cache.put("b", _arrays(1))
+    # Даже с самой старой отметкой только что записанная запись остается
+    _touch(cache, "a", 1000)
+    cache.max_bytes = int(1.5 * os.path.getsize(cache._path("a")))
+    cache._evict(keep="a.npz")
+    assert cache.get("a") is not None and cache.get("b") is None
+
+
+def test_entry_over_budget_is_skipped(tmp_path):
+    cache = MeshCache(tmp_path)
+    cache.put("a", _arrays(0))
+    cache.max_bytes = int(1.5 * os.path.getsize(cache._path("a")))
+    cache.put("big", (np.zeros((100_000, 3)),))
+    assert cache.get("big") is None
+    assert cache.get("a") is not None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_readers_wait_for_writer(tmp_path):
+    cache = MeshCache(tmp_path)
+    cache.put("a", _arrays(0))
+    done = threading.Event()
+
+    def read():
+        cache.get("a")
+        done.set()
+
+    with _FileLock(cache._lock_path):
+        thread = threading.Thread(target=read)
+        thread.start()
+        time.sleep(0.2)
+        assert not done.is_set()
+    thread.join(5)
+    assert done.is_set()
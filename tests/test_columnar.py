@@ -0,0 +1,69 @@
+"""Столбцовый формат сеток .mshc: python -m pytest tests"""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from meshtools.columnar import ColumnarMesh, columnar_to_msh, load_columnar, msh_to_columnar
+from meshtools.msh import read_msh
+
+MESH = os.path.join(os.path.dirname(__file__), os.pardir, "pages", "mesh.msh")
+
+
+@pytest.fixture
+def msh_path(tmp_path):
+    path = str(tmp_path / "mesh.msh")
+    shutil.copy(MESH, path)
+    return path
+
+
+@pytest.mark.parametrize("mmap_mode", [True, False])
+def test_round_trip(tmp_path, msh_path, mmap_mode):
+    mesh = read_msh(msh_path)
+    path = msh_to_columnar(msh_path)
+    assert path == str(tmp_path / "mesh.mshc")
+
+    col = load_columnar(path, mmap_mode)
+    np.testing.assert_array_equal(col.nodes, mesh.nodes)
+    np.testing.assert_array_equal(col.node_tags, mesh.node_tags)
+    for element_type in {b.element_type for b in mesh.element_blocks}:
+        assert col.elements_of_type(element_type).dtype == np.int32
+        np.testing.assert_array_equal(col.elements_of_type(element_type), mesh.elements_of_type(element_type))
+    assert col.physical_names == mesh.physical_names
+    # Отображенные в память массивы доступны только для чтения
+    assert col.nodes.flags.writeable != mmap_mode
+
+    back = read_msh(columnar_to_msh(path, str(tmp_path / "back.msh")))
+    np.testing.assert_array_equal(back.nodes, mesh.nodes)
+    np.testing.assert_array_equal(back.node_tags, mesh.node_tags)
+    assert [(b.dim, b.entity_tag, b.element_type) for b in back.element_blocks] == \
+        [(b.dim, b.entity_tag, b.element_type) for b in mesh.element_blocks]
+    for a, b in zip(back.element_blocks, mesh.element_blocks):
+        np.testing.assert_array_equal(a.tags, b.tags)
+        np.testing.assert_array_equal(a.node_tags, b.node_tags)
+    assert {k: (e.physical_tags, e.bounding) for k, e in back.entities.items()} == \
+        {k: (e.physical_tags, e.bounding) for k, e in mesh.entities.items()}
+
+
+def test_from_arrays(tmp_path):
+    nodes = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=float)
+    elements = {2: np.array([[0, 1, 2], [0, 2, 3]]), 1: np.array([[0, 1]])}
+    path = str(tmp_path / "square.mshc")
+    ColumnarMesh.from_arrays(nodes, elements, coords_dtype=np.float32).save(path)
+
+    col = load_columnar(path)
+    assert col.nodes.dtype == np.float32
+    np.testing.assert_array_equal(col.nodes, nodes)
+    for element_type, connectivity in elements.items():
+        np.testing.assert_array_equal(col.elements_of_type(element_type), connectivity)
+    mesh = col.to_mesh()
+    np.testing.assert_array_equal(mesh.elements_of_type(2), elements[2])
+    # Теги элементов сквозные по всем типам
+    assert [b.tags.tolist() for b in mesh.element_blocks] == [[1, 2], [3]]
+
+
+def test_not_columnar(msh_path):
+    with pytest.raises(ValueError, match=".mshc"):
+        load_columnar(msh_path)
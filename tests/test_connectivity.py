@@ -0,0 +1,79 @@
+"""Связность сеток без gmsh: python -m pytest tests"""
+
+import numpy as np
+import pytest
+
+from meshtools.connectivity import TagIndex, boundary_faces, remap_connectivity
+
+rng = np.random.default_rng(0)
+# Теги по порядку с пропусками и разреженные теги, как у объединенных сеток OCC
+DENSE_TAGS = rng.permutation(np.arange(1, 3001))[:2000]
+SPARSE_TAGS = rng.permutation(np.arange(1, 3001) * 10 ** 9)[:2000]
+
+
+@pytest.mark.parametrize("node_tags, dense", [(DENSE_TAGS, True), (SPARSE_TAGS, False)])
+def test_tag_index(node_tags, dense):
+    index = TagIndex(node_tags)
+    assert (index._lookup is not None) == dense
+
+    rows = rng.integers(0, len(node_tags), (50, 4))
+    np.testing.assert_array_equal(index(node_tags[rows]), rows)
+    # Теги gmsh приходят как uint64
+    np.testing.assert_array_equal(index(node_tags[rows].astype(np.uint64)), rows)
+
+    elements = remap_connectivity(node_tags, node_tags[rows].ravel(), 4)
+    np.testing.assert_array_equal(elements, rows)
+
+
+@pytest.mark.parametrize("node_tags", [DENSE_TAGS, SPARSE_TAGS])
+@pytest.mark.parametrize("missing", [0, -1, 3001 * 10 ** 9, "unused"])
+def test_missing_tags(node_tags, missing):
+    if missing == "unused":
+        missing = np.setdiff1d(np.arange(1, 3001) * node_tags.min(), node_tags)[0]
+    index = TagIndex(node_tags)
+    with pytest.raises(ValueError, match="отсутствующие узлы"):
+        index([node_tags[0], missing])
+
+
+def test_empty():
+    index = TagIndex([])
+    assert index(np.empty((0, 3), dtype=np.int64)).shape == (0, 3)
+    with pytest.raises(ValueError):
+        index([1])
+
+
+def _cube_tetrahedra(n):
+    """Куб [0, n]^3, разбитый на n^3 кубиков по 6 тетраэдров (разбиение Куна)"""
+    grid = np.stack(np.meshgrid(*[np.arange(n + 1)] * 3, indexing="ij"), axis=-1)
+    nodes = grid.reshape(-1, 3).astype(float)
+    steps = np.array([(n + 1) ** 2, n + 1, 1])
+    corners = (grid[:-1, :-1, :-1].reshape(-1, 3) * steps).sum(axis=1)
+    tets = []
+    for axes in [(0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0)]:
+        path = np.cumsum([0, *steps[list(axes)]])
+        tets.append(corners[:, None] + path)
+    return nodes, np.concatenate(tets)
+
+
+def test_boundary_faces_outward():
+    nodes, tets = _cube_tetrahedra(2)
+    # Половина тетраэдров разбиения Куна уже вывернута; часть переворачивается еще раз
+    flip = rng.random(len(tets)) < 0.5
+    tets[flip] = tets[flip][:, [1, 0, 2, 3]]
+
+    faces = boundary_faces(nodes, tets)
+    assert faces.shape == (6 * 4 * 2, 3)
+    p = nodes[faces]
+    normals = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    outward = np.einsum("ij,ij->i", normals, p.mean(axis=1) - 1.0)
+    assert (outward > 0).all()
+    # Все грани лежат на поверхности куба, а объем по формуле Гаусса совпадает с настоящим
+    assert ((p == 0) | (p == 2)).all(axis=1).any(axis=1).all()
+    assert np.einsum("ij,ij->", p[:, 0], normals) / 6 == pytest.approx(8.0)
+    # Ориентация не зависит от нумерации вершин тетраэдров
+    again = boundary_faces(nodes, tets[:, [1, 0, 2, 3]])
+    assert {tuple(np.roll(f, -f.argmin())) for f in again} == {tuple(np.roll(f, -f.argmin())) for f in faces}
+
+
+def test_boundary_faces_empty():
+    assert boundary_faces(np.zeros((0, 3)), np.empty((0, 4), dtype=np.int64)).shape == (0, 3)
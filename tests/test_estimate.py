@@ -0,0 +1,25 @@
+"""Калибровка модели времени meshtools.estimate: python -m pytest tests"""
+
+import pytest
+
+from meshtools.estimate import MeshEstimate, calibrate
+
+
+def test_calibrate_power_law_and_second_order():
+    # Четырехугольники: время ~ elements^1.5, второй порядок вдвое дольше
+    runs = []
+    for size in (0.04, 0.02, 0.01):
+        elements = round(1 / size ** 2)
+        seconds = 1e-5 * elements ** 1.5
+        runs.append(dict(element_type=3, size=size, order=1, elements=elements, seconds=seconds))
+        runs.append(dict(element_type=3, size=size, order=2, elements=elements, seconds=2 * seconds))
+    calibration = calibrate(runs)
+
+    model = calibration[3]
+    assert model["count_factor"] == pytest.approx(1.0)
+    assert model["time_exponent"] == pytest.approx(1.5)
+    assert model["second_order_time"] == pytest.approx(2.0)
+    assert MeshEstimate(3, 40_000, calibration=calibration).seconds == pytest.approx(1e-5 * 40_000 ** 1.5)
+    assert MeshEstimate(3, 40_000, order=2, calibration=calibration).seconds == pytest.approx(2e-5 * 40_000 ** 1.5)
+    # Для типов без замеров коэффициенты не меняются
+    assert calibration[2] == calibrate([])[2]
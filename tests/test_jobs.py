@@ -0,0 +1,94 @@
+"""Фоновые задания построения сеток: python -m pytest tests"""
+
+import time
+
+import numpy as np
+import pytest
+
+try:
+    import gmsh  # noqa: F401
+except (ImportError, OSError) as e:
+    pytest.skip(f"gmsh недоступен: {e}", allow_module_level=True)
+
+from meshtools.cache import MeshCache
+from meshtools.generators import generate_rectangle_mesh
+from meshtools.jobs import MeshJobCancelled, MeshJobTimeout, submit_mesh_job
+from meshtools.pool import MeshWorkerPool
+
+ARGS = ("Неструктурированная", "Треугольные", 1, 1)
+
+
+def _sleep(seconds, options=None):
+    time.sleep(seconds)
+    return np.zeros(3)
+
+
+@pytest.fixture
+def pool():
+    pool = MeshWorkerPool(size=1)
+    yield pool
+    pool.close()
+
+
+def test_done(pool):
+    job = submit_mesh_job(generate_rectangle_mesh, *ARGS, 6, 6, pool=pool)
+    assert job.wait(30)
+    assert job.state == "done", job.error
+    nodes, elements, _ = job.result
+    assert len(nodes) and len(elements)
+    assert job.progress == 1.0 and job.usage is not None
+    # Производная величина вычисляется один раз
+    calls = []
+    for _ in range(2):
+        assert job.derived("count", lambda: calls.append(1) or len(elements)) == len(elements)
+    assert calls == [1]
+
+
+def test_cancel_replaces_worker(pool):
+    pool.run(_sleep, 0)
+    pid = pool._idle[0].process.pid
+    job = submit_mesh_job(_sleep, 60, pool=pool)
+    time.sleep(0.5)
+    job.cancel()
+    assert job.wait(5)
+    assert job.state == "cancelled" and isinstance(job.error, MeshJobCancelled)
+    assert job.elapsed < 5
+    # Процесс с прерванным заданием заменен, пул продолжает работу
+    assert pool.run(_sleep, 0) is not None
+    assert pool._idle[0].process.pid != pid
+
+
+def test_timeout(pool):
+    job = submit_mesh_job(_sleep, 60, timeout=0.5, pool=pool)
+    assert job.wait(5)
+    assert job.state == "timeout" and isinstance(job.error, MeshJobTimeout)
+    assert job.elapsed < 5
+
+
+def test_cancel_while_queued(pool):
+    # Единственный процесс занят, второе задание ждет его и отменяется без запуска
+    busy = submit_mesh_job(_sleep, 60, pool=pool)
+    queued = submit_mesh_job(_sleep, 0, pool=pool)
+    time.sleep(0.3)
+    queued.cancel()
+    assert queued.wait(5) and queued.state == "cancelled"
+    busy.cancel()
+    assert busy.wait(5) and busy.state == "cancelled"
+
+
+def test_too_large_then_coarser_retry(pool, tmp_path, monkeypatch):
+    monkeypatch.setenv("MESH_ELEMENT_BUDGET", "2000")
+    cache = MeshCache(str(tmp_path))
+    job = submit_mesh_job(generate_rectangle_mesh, *ARGS, 200, 200, cache=cache, pool=pool)
+    assert job.wait(5)
+    assert job.state == "too_large" and job.error.kind == "elements"
+
+    changes = job.coarser()
+    assert set(changes) == {"nx", "ny"} and changes["nx"] < 200
+    retry = job.retry(changes)
+    assert retry.wait(60)
+    assert retry.state == "done", retry.error
+    assert len(retry.result[1]) <= 2000
+    # Повтор с теми же параметрами берется из кэша
+    again = job.retry(changes)
+    assert again.wait(5) and again.state == "done" and again.usage is None
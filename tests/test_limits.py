@@ -0,0 +1,54 @@
+"""Падения рабочих процессов при пределах заданий: python -m pytest tests"""
+
+import faulthandler
+import os
+import signal
+
+import pytest
+
+try:
+    import gmsh  # noqa: F401
+except (ImportError, OSError) as e:
+    pytest.skip(f"gmsh недоступен: {e}", allow_module_level=True)
+
+from meshtools.limits import JobLimits, MeshTooLarge
+from meshtools.pool import MeshWorkerError, MeshWorkerPool
+
+
+def _segfault():
+    # Обработчик pytest, унаследованный процессом, иначе печатает стек в вывод тестов
+    faulthandler.disable()
+    os.kill(os.getpid(), signal.SIGSEGV)
+
+
+def _abort(message=None):
+    faulthandler.disable()
+    if message:
+        # Как libstdc++ перед abort: прямо в дескриптор 2
+        os.write(2, message.encode() + b"\n")
+    os.abort()
+
+
+@pytest.fixture
+def pool():
+    # Предел памяти задан всегда, как у JobLimits.from_env
+    pool = MeshWorkerPool(size=1, limits=JobLimits(memory_mib=4096, cpu_seconds=60))
+    yield pool
+    pool.close()
+
+
+@pytest.mark.parametrize("func, args", [(_segfault, ()), (_abort, ())])
+def test_crash_without_evidence(pool, func, args):
+    with pytest.raises(MeshWorkerError):
+        pool.run(func, *args)
+
+
+def test_bad_alloc_is_memory(pool):
+    message = "terminate called after throwing an instance of 'std::bad_alloc'"
+    with pytest.raises(MeshTooLarge) as info:
+        pool.run(_abort, message)
+    assert info.value.kind == "memory"
+
+    # Сообщение предыдущего задания не относится к следующему
+    with pytest.raises(MeshWorkerError):
+        pool.run(_segfault)
@@ -0,0 +1,73 @@
+"""Чтение файлов MSH 4.1 без gmsh: python -m pytest tests"""
+
+import numpy as np
+import pytest
+
+from meshtools.columnar import msh_to_columnar
+from meshtools.fingerprint import file_fingerprint
+from meshtools.msh import MshFormatError, read_msh
+from meshtools.msh_index import load_index
+
+# Один тетраэдр; объемный блок узлов записан с параметрическими координатами u v w
+PARAMETRIC_VOLUME = """$MeshFormat
+4.1 0 8
+$EndMeshFormat
+$Nodes
+1 4 1 4
+3 1 1 4
+1
+2
+3
+4
+0 0 0 0.1 0.2 0.3
+1 0 0 0.4 0.5 0.6
+0 1 0 0.7 0.8 0.9
+0 0 1 1.0 1.1 1.2
+$EndNodes
+$Elements
+1 1 1 1
+3 1 4 1
+1 1 2 3 4
+$EndElements
+"""
+
+TET_NODES = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=float)
+
+
+def test_parametric_volume_nodes(tmp_path):
+    path = tmp_path / "tet.msh"
+    path.write_text(PARAMETRIC_VOLUME)
+
+    mesh = read_msh(str(path))
+    np.testing.assert_array_equal(mesh.nodes, TET_NODES)
+    np.testing.assert_array_equal(mesh.elements_of_type(4), [[0, 1, 2, 3]])
+
+    part = load_index(str(path)).read_entities({(3, 1)})
+    np.testing.assert_array_equal(part.nodes, TET_NODES)
+
+
+def test_index_outside_read_only_directory(tmp_path, monkeypatch):
+    path = tmp_path / "tet.msh"
+    path.write_text(PARAMETRIC_VOLUME)
+    # Рядом с файлом индекс не записать: на месте файла индекса — каталог
+    (tmp_path / "tet.msh.idx.json").mkdir()
+    monkeypatch.setenv("MESH_INDEX_DIR", str(tmp_path / "cache"))
+
+    index = load_index(str(path))
+    np.testing.assert_array_equal(index.read_entities({(3, 1)}).nodes, TET_NODES)
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    assert load_index(str(path), rebuild=False) is not None
+
+    # Без доступного каталога кэша индекс остается в памяти
+    monkeypatch.setenv("MESH_INDEX_DIR", str(path))
+    assert load_index(str(path)).read_entities({(3, 1)}).nodes.shape == (4, 3)
+
+
+def test_fingerprint_of_columnar_file(tmp_path):
+    path = tmp_path / "tet.msh"
+    path.write_text(PARAMETRIC_VOLUME)
+    columnar = msh_to_columnar(str(path))
+
+    assert file_fingerprint(columnar) == file_fingerprint(str(path))
+    with pytest.raises(MshFormatError):
+        read_msh(columnar)
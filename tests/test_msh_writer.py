@@ -0,0 +1,79 @@
+"""Запись файлов MSH 4.1 без gmsh: python -m pytest tests"""
+
+import os
+
+import numpy as np
+import pytest
+
+from meshtools.msh import read_msh
+from meshtools.msh_writer import MshWriter, save_msh
+
+MESH = os.path.join(os.path.dirname(__file__), os.pardir, "pages", "mesh.msh")
+
+
+def _assert_same_mesh(got, expected):
+    np.testing.assert_array_equal(got.node_tags, expected.node_tags)
+    np.testing.assert_array_equal(got.nodes, expected.nodes)
+    assert got.physical_names == expected.physical_names
+    assert {k: (e.physical_tags, e.bounding) for k, e in got.entities.items()} == \
+        {k: (e.physical_tags, e.bounding) for k, e in expected.entities.items()}
+    assert len(got.element_blocks) == len(expected.element_blocks)
+    for a, b in zip(got.element_blocks, expected.element_blocks):
+        assert (a.dim, a.entity_tag, a.element_type) == (b.dim, b.entity_tag, b.element_type)
+        np.testing.assert_array_equal(a.tags, b.tags)
+        np.testing.assert_array_equal(a.node_tags, b.node_tags)
+
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_round_trip(tmp_path, binary):
+    mesh = read_msh(MESH)
+    path = str(tmp_path / "mesh.msh")
+    save_msh(path, mesh, binary=binary)
+    _assert_same_mesh(read_msh(path), mesh)
+    # Второй проход дает тот же файл
+    again = str(tmp_path / "again.msh")
+    save_msh(again, read_msh(path), binary=binary)
+    with open(path, "rb") as a, open(again, "rb") as b:
+        assert a.read() == b.read()
+    # Временный файл элементов удален
+    assert sorted(os.listdir(tmp_path)) == ["again.msh", "mesh.msh"]
+
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_blocks_in_any_order(tmp_path, binary):
+    # Квадрат из двух треугольников, записанный двумя блоками узлов и элементами вперемешку
+    path = str(tmp_path / "square.msh")
+    with MshWriter(path, binary) as w:
+        w.add_entity(2, 1, physical_tags=[7])
+        w.set_physical_name(2, 7, "Domain")
+        w.add_elements(2, 1, 2, [10], [[1, 2, 3]])
+        w.add_nodes(2, 1, [1, 2], [[0, 0, 0], [1, 0, 0]])
+        w.add_elements(2, 1, 2, [11], [[1, 3, 4]])
+        w.add_nodes(2, 1, [3, 4], [[1, 1, 0], [0, 1, 0]])
+
+    mesh = read_msh(path)
+    np.testing.assert_array_equal(mesh.nodes, [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]])
+    np.testing.assert_array_equal(mesh.elements_of_type(2), [[0, 1, 2], [0, 2, 3]])
+    assert mesh.physical_names == {(2, 7): "Domain"}
+    assert mesh.entities[(2, 1)].physical_tags == (7,)
+    assert os.listdir(tmp_path) == ["square.msh"]
+
+
+def test_abort_removes_files(tmp_path):
+    path = str(tmp_path / "broken.msh")
+    with pytest.raises(RuntimeError):
+        with MshWriter(path) as w:
+            w.add_entity(2, 1)
+            w.add_nodes(2, 1, [1], [[0, 0, 0]])
+            raise RuntimeError
+    assert os.listdir(tmp_path) == []
+
+
+def test_entities_before_blocks(tmp_path):
+    with MshWriter(str(tmp_path / "mesh.msh")) as w:
+        w.add_entity(2, 1)
+        w.add_nodes(2, 1, [1], [[0, 0, 0]])
+        with pytest.raises(ValueError):
+            w.add_entity(2, 2)
+        with pytest.raises(ValueError):
+            w.add_nodes(2, 3, [2], [[1, 0, 0]])
@@ -0,0 +1,15 @@
+"""Ребра элементов для отрисовки сеток: python -m pytest tests"""
+
+import numpy as np
+
+from meshtools.plotting import unique_edges, wireframe_coordinates
+
+
+def test_tetrahedron_edges():
+    # По контуру 0-1-2-3 у тетраэдра нашлись бы только 4 ребра из 6
+    edges = unique_edges([[0, 1, 2, 3]], element_type=4)
+    assert edges.tolist() == [[0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]]
+    assert len(unique_edges([[0, 1, 2, 3]], element_type=3)) == 4
+
+    x, _, _ = wireframe_coordinates(np.eye(4, 3), [[0, 1, 2, 3]], element_type=4)
+    assert len(x) == 3 * 6
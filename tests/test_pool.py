@@ -0,0 +1,53 @@
+"""Прогретые модели в рабочих процессах пула: python -m pytest tests"""
+
+import pytest
+
+try:
+    import gmsh  # noqa: F401
+except (ImportError, OSError) as e:
+    # Без системных библиотек (libGLU, libXcursor) модуль gmsh не загружается с OSError
+    pytest.skip(f"gmsh недоступен: {e}", allow_module_level=True)
+
+from meshtools.generators import generate_rectangle_mesh, warm_key
+from meshtools.pool import MeshWorkerPool
+
+ARGS = ("Неструктурированная", "Треугольные", 1, 1)
+
+
+def _break_next_reset():
+    """Следующая очистка моделей (warm.reset) завершится ошибкой gmsh"""
+    import gmsh
+
+    set_current = gmsh.model.setCurrent
+
+    def fail(name):
+        gmsh.model.setCurrent = set_current
+        raise RuntimeError("model is broken")
+
+    gmsh.model.add("broken")
+    gmsh.model.setCurrent = fail
+
+
+@pytest.fixture
+def pool():
+    pool = MeshWorkerPool(size=1)
+    yield pool
+    pool.close()
+
+
+def test_warm_keys_follow_worker(pool):
+    # Без affinity пул все равно узнает, какая модель осталась в процессе
+    pool.run(generate_rectangle_mesh, *ARGS, 4, 4)
+    worker = pool._idle[0]
+    assert worker.warm == [warm_key(generate_rectangle_mesh, ARGS)]
+
+    # Неудачная очистка отбрасывает сохраненные модели, процесс продолжает работу
+    pid = worker.process.pid
+    pool.run(_break_next_reset)
+    worker = pool._idle[0]
+    assert worker.process.pid == pid
+    assert worker.warm == []
+
+    nodes, elements, _ = pool.run(generate_rectangle_mesh, *ARGS, 5, 5)
+    assert len(elements) and pool._idle[0].process.pid == pid
+    assert pool._idle[0].warm == [warm_key(generate_rectangle_mesh, ARGS)]
@@ -0,0 +1,46 @@
+"""Показатели качества правильных элементов meshtools.quality: python -m pytest tests"""
+
+import numpy as np
+import pytest
+
+from meshtools.quality import element_quality
+
+TRIANGLE = [[0, 0], [1, 0], [0.5, np.sqrt(3) / 2]]
+SQUARE = [[0, 0], [1, 0], [1, 1], [0, 1]]
+TETRAHEDRON = [[1, 1, 1], [-1, -1, 1], [-1, 1, -1], [1, -1, -1]]
+CUBE = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]]
+# Двугранный угол правильного тетраэдра
+DIHEDRAL = np.degrees(np.arccos(1 / 3))
+
+
+@pytest.mark.parametrize("nodes, element_type, flipped, angle, gamma", [
+    (TRIANGLE, 2, [0, 2, 1], 60, 1),
+    (SQUARE, 3, [0, 3, 2, 1], 90, np.nan),
+    (TETRAHEDRON, 4, [1, 0, 2, 3], DIHEDRAL, 1),
+    (CUBE, 5, [4, 5, 6, 7, 0, 1, 2, 3], 90, np.nan),
+])
+def test_regular_elements(nodes, element_type, flipped, angle, gamma):
+    nodes = np.asarray(nodes, dtype=float)
+    # Тот же элемент, сдвинутый далеко от начала координат, и он же с обратной ориентацией
+    shifted = np.vstack([nodes, nodes + 1e4])
+    n = len(nodes)
+    elements = np.array([np.arange(n), np.arange(n) + n, flipped])
+    quality = element_quality(shifted, elements, element_type)
+
+    for metric in ("min_angle", "max_angle"):
+        np.testing.assert_allclose(quality[metric], angle, atol=1e-2)
+    np.testing.assert_allclose(quality["aspect_ratio"], 1, rtol=1e-5)
+    np.testing.assert_allclose(quality["sicn"], [1, 1, -1], rtol=1e-5)
+    np.testing.assert_allclose(quality["scaled_jacobian"], [1, 1, -1], rtol=1e-5)
+    np.testing.assert_allclose(quality["gamma"][:2], gamma, rtol=1e-5)
+
+
+def test_chunks_match_single_pass(monkeypatch):
+    rng = np.random.default_rng(0)
+    nodes = rng.random((200, 3))
+    elements = np.array([rng.choice(len(nodes), 4, replace=False) for _ in range(1000)])
+    whole = element_quality(nodes, elements, 4)
+    monkeypatch.setattr("meshtools.quality.CHUNK", 64)
+    parts = element_quality(nodes, elements, 4)
+    for metric, values in whole.items():
+        np.testing.assert_array_equal(parts[metric], values)
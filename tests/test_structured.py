@@ -0,0 +1,40 @@
+"""Сверка структурированных сеток meshtools.structured с gmsh: python -m pytest tests"""
+
+import numpy as np
+import pytest
+
+try:
+    import gmsh
+except (ImportError, OSError) as e:
+    pytest.skip(f"gmsh недоступен: {e}", allow_module_level=True)
+
+from meshtools.generators import generate_box_mesh, generate_rectangle_mesh
+from meshtools.structured import QUADS, STRUCTURED, TRIANGLES, box_fast_path, rectangle_fast_path
+
+CASES = [
+    (generate_rectangle_mesh, rectangle_fast_path, (3, 2, 7, 5)),
+    (generate_rectangle_mesh, rectangle_fast_path, (3.7, 0.9, 11, 4)),
+    (generate_box_mesh, box_fast_path, (3, 2, 4, 6, 5, 3)),
+    (generate_box_mesh, box_fast_path, (1.3, 2.9, 0.7, 4, 7, 2)),
+]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def gmsh_session():
+    gmsh.initialize()
+    gmsh.option.setNumber("General.Terminal", 0)
+    yield
+    gmsh.finalize()
+
+
+@pytest.mark.parametrize("element_type", [TRIANGLES, QUADS])
+@pytest.mark.parametrize("func, fast_path, args", CASES)
+def test_fast_path_matches_gmsh(func, fast_path, args, element_type):
+    nodes, elements, _ = func(STRUCTURED, element_type, *args)
+    fast_nodes, fast_elements = fast_path(STRUCTURED, element_type, *args)
+
+    # gmsh вычисляет координаты иначе, расхождение — в последних знаках
+    assert fast_nodes.shape == nodes.shape
+    np.testing.assert_allclose(fast_nodes, nodes, rtol=1e-9, atol=1e-12)
+    # Порядок элементов и узлов в них совпадает с gmsh, включая четырехугольники после recombine()
+    np.testing.assert_array_equal(fast_elements, elements)
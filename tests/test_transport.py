@@ -0,0 +1,50 @@
+"""Передача массивов рабочих процессов через общую память: python -m pytest tests"""
+
+import os
+
+import numpy as np
+import pytest
+
+from meshtools.transport import SharedArrays, _ALIGN, discard, pack_arrays, unpack_arrays
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="в Windows массивы передаются по каналу")
+
+
+def test_round_trip():
+    nodes = np.random.default_rng(0).random((7, 3))
+    elements = np.arange(15, dtype=np.int32).reshape(5, 3)
+    # Срез без непрерывной памяти и пустой массив тоже передаются
+    tags = np.arange(20, dtype=np.uint64)[::3]
+    empty = np.empty((0, 4), dtype=np.int64)
+
+    reply = pack_arrays((nodes, elements, tags, empty))
+    assert isinstance(reply, SharedArrays)
+    assert all(offset % _ALIGN == 0 for _, _, offset in reply.specs)
+
+    result = unpack_arrays(reply)
+    assert not os.path.exists(reply.path)
+    for got, expected in zip(result, (nodes, elements, tags, empty)):
+        assert got.dtype == expected.dtype
+        np.testing.assert_array_equal(got, expected)
+    # Массивы доступны для записи
+    result[0][0, 0] = -1.0
+
+
+def test_single_array():
+    array = np.arange(6.0).reshape(2, 3)
+    result = unpack_arrays(pack_arrays(array))
+    assert isinstance(result, np.ndarray)
+    np.testing.assert_array_equal(result, array)
+
+
+@pytest.mark.parametrize("value", [None, 42, "text", (), (np.zeros(3), 1), [np.zeros(3)]])
+def test_other_values_pass_through(value):
+    assert pack_arrays(value) is value
+    assert unpack_arrays(value) is value
+
+
+def test_discard():
+    reply = pack_arrays((np.zeros(10),))
+    discard(reply)
+    assert not os.path.exists(reply.path)
+    discard(reply)
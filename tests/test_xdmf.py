@@ -0,0 +1,88 @@
+"""Преобразование MSH в XDMF/HDF5 для FEniCS: python -m pytest tests"""
+
+import os
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+
+from meshtools.msh import read_msh
+from meshtools.msh_writer import save_msh
+from meshtools.xdmf import XDMF_TOPOLOGY, msh_to_xdmf
+
+MESH = os.path.join(os.path.dirname(__file__), os.pardir, "pages", "mesh.msh")
+
+
+def _expected_markers(mesh, dim):
+    """Связность и метки ячеек размерности dim по первой физической группе сущности"""
+    cells, markers = [], []
+    for block in mesh.element_blocks:
+        tags = mesh.entities[(block.dim, block.entity_tag)].physical_tags
+        if block.dim == dim and tags:
+            cells.append(mesh.connectivity(block))
+            markers.append(np.full(len(block.tags), tags[0]))
+    return np.concatenate(cells), np.concatenate(markers)
+
+
+@pytest.mark.parametrize("binary, chunk", [(False, 1 << 16), (False, 7), (True, 1 << 16)])
+def test_markers(tmp_path, binary, chunk):
+    mesh = read_msh(MESH)
+    msh_path = str(tmp_path / "mesh.msh")
+    save_msh(msh_path, mesh, binary=binary)
+
+    xdmf, boundaries = msh_to_xdmf(msh_path, chunk=chunk)
+    assert xdmf == str(tmp_path / "mesh.xdmf")
+    assert boundaries == str(tmp_path / "mesh_boundaries.xdmf")
+    with h5py.File(tmp_path / "mesh.h5", "r") as h5:
+        # Двумерная сетка записывается без координаты z
+        np.testing.assert_array_equal(h5["geometry"][:], mesh.nodes[:, :2])
+        cells, markers = _expected_markers(mesh, 2)
+        np.testing.assert_array_equal(h5["domain/topology"][:], cells)
+        np.testing.assert_array_equal(h5["domain/markers"][:], markers)
+        facets, facet_markers = _expected_markers(mesh, 1)
+        np.testing.assert_array_equal(h5["facets/topology"][:], facets)
+        np.testing.assert_array_equal(h5["facets/markers"][:], facet_markers)
+    # Метки границы: Inflow, Outflow, Walls, Obstacle
+    assert set(facet_markers) == {mesh.physical_tag(name, 1)[1]
+                                  for name in ("Inflow", "Outflow", "Walls", "Obstacle")}
+
+    with open(boundaries, encoding="utf-8") as f:
+        text = f.read()
+    # Сетка второго порядка: ребра с тремя узлами
+    topology = XDMF_TOPOLOGY[mesh.physical_group("Walls", 1)[0].element_type]
+    assert f'TopologyType="{topology}" NumberOfElements="{len(facets)}"' in text
+    assert "mesh.h5:/facets/markers" in text and "mesh.h5:/geometry" in text
+
+
+def test_no_boundary_markers(tmp_path):
+    path = tmp_path / "tet.msh"
+    path.write_text("""$MeshFormat
+4.1 0 8
+$EndMeshFormat
+$Nodes
+1 4 1 4
+3 1 0 4
+1
+2
+3
+4
+0 0 0
+1 0 0
+0 1 0
+0 0 1
+$EndNodes
+$Elements
+1 1 1 1
+3 1 4 1
+1 1 2 3 4
+$EndElements
+""")
+    # Без раздела $Entities размерность задается явно
+    xdmf, boundaries = msh_to_xdmf(str(path), dim=3)
+    assert boundaries is None
+    with h5py.File(tmp_path / "tet.h5", "r") as h5:
+        assert h5["geometry"].shape == (4, 3)
+        np.testing.assert_array_equal(h5["domain/topology"][:], [[0, 1, 2, 3]])
+        # Сущность без физической группы получает метку 0
+        np.testing.assert_array_equal(h5["domain/markers"][:], [0])